@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""
+Benchmark the Excel paths in src/excel.py against the pandas defaults.
+
+Compares, on a synthetic sheet of mixed numeric, text and date columns:
+
+* ``DataFrame.to_excel`` vs ``write_excel`` (write-only streaming workbook)
+* ``pd.read_excel`` vs ``read_excel`` on a cold cache (read-only streaming)
+* ``pd.read_excel`` vs ``read_excel`` on a warm cache (cached Parquet sheet)
+
+Each variant runs in a fresh interpreter so peak RSS is measured in
+isolation; the RSS figure is the growth of the high-water mark over the
+post-import baseline.
+
+Usage
+-----
+python benchmarks/bench_excel.py --rows 10000 100000 --repeat 3
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+from src.excel import write_excel  # noqa: E402
+
+# Runs inside the child interpreter: perform one variant `repeat` times and report
+# the median latency and the growth in peak RSS.
+CHILD_SCRIPT = """
+import json, resource, shutil, statistics, sys, time
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+import pandas as pd
+from src.excel import read_excel, write_excel
+from src.loading import LoadCache
+
+variant, workdir, repeat = sys.argv[2], Path(sys.argv[3]), int(sys.argv[4])
+source = workdir / "source.xlsx"
+cache_dir = workdir / f"cache-{variant}"
+
+def pandas_write():
+    pd.read_parquet(workdir / "frame.parquet").to_excel(workdir / "out.xlsx", index=False)
+
+def stream_write():
+    write_excel(pd.read_parquet(workdir / "frame.parquet"), workdir / "out.xlsx")
+
+def pandas_read():
+    pd.read_excel(source)
+
+def stream_read_cold():
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    read_excel(source, cache=LoadCache(cache_dir, max_bytes=1 << 40))
+
+def stream_read_warm():
+    read_excel(source, cache=LoadCache(cache_dir, max_bytes=1 << 40))
+
+run = globals()[variant]
+if variant == "stream_read_warm":
+    run()  # populate the cache before measuring
+baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+timings = []
+for _ in range(repeat):
+    start = time.perf_counter()
+    run()
+    timings.append(time.perf_counter() - start)
+peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": statistics.median(timings), "rss_mb": (peak_kb - baseline_kb) / 1024}))
+"""
+
+COMPARISONS = [
+    ("write", "pandas_write", "stream_write"),
+    ("read (cold)", "pandas_read", "stream_read_cold"),
+    ("read (cached)", "pandas_read", "stream_read_warm"),
+]
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    """Return a synthetic frame resembling a typical business extract."""
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "id": np.arange(rows),
+            "amount": rng.normal(100, 25, rows).round(2),
+            "quantity": rng.integers(1, 50, rows),
+            "region": rng.choice(["north", "south", "east", "west"], rows),
+            "customer": [f"customer-{i % 5000}" for i in range(rows)],
+            "day": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+        }
+    )
+
+
+def run_variant(variant: str, workdir: Path, repeat: int) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, str(ROOT_DIR), variant, str(workdir), str(repeat)],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(result.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Excel reading and writing.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000], help="Sheet sizes in rows.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement.")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}  {'operation':<14} {'pandas':>10} {'src.excel':>10} {'speedup':>8} {'RSS pandas/src':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            workdir = Path(tmp) / str(rows)
+            workdir.mkdir()
+            frame = make_frame(rows)
+            frame.to_parquet(workdir / "frame.parquet")
+            write_excel(frame, workdir / "source.xlsx")
+            for label, baseline, candidate in COMPARISONS:
+                base = run_variant(baseline, workdir, args.repeat)
+                fast = run_variant(candidate, workdir, args.repeat)
+                print(
+                    f"{rows:>8}  {label:<14} {base['seconds']:9.2f}s {fast['seconds']:9.2f}s "
+                    f"{base['seconds'] / fast['seconds']:7.1f}x {base['rss_mb']:7.0f}/{fast['rss_mb']:.0f} MB"
+                )
+
+
+if __name__ == "__main__":
+    main()
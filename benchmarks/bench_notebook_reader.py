@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Benchmark the notebook reader used by utils/pipeline_graph.py.
+
+Compares ``nbformat.read`` against ``pipeline_graph.iter_code_cells`` on
+synthetic notebooks whose cells carry large base64 plot and HTML outputs.
+Each reader runs in a fresh interpreter so peak RSS is measured in isolation.
+The RSS figure is the growth of the high-water mark over the post-import
+baseline; pages touched through the fast reader's memory map are file-backed
+and reclaimable, unlike the decoded objects nbformat builds.
+
+Usage
+-----
+python benchmarks/bench_notebook_reader.py --sizes 1 10 50 --repeat 5
+"""
+
+import argparse
+import base64
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import nbformat
+
+UTILS_DIR = Path(__file__).resolve().parents[1] / "utils"
+
+# Runs inside the child interpreter: read the notebook `repeat` times and report
+# the median latency and the growth in peak RSS caused by reading.
+CHILD_SCRIPT = """
+import json, resource, statistics, sys, time
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+import nbformat, pipeline_graph
+
+reader, nb_path, repeat = sys.argv[2], Path(sys.argv[3]), int(sys.argv[4])
+
+def read_nbformat(path):
+    nb = nbformat.read(path, as_version=4)
+    return [cell.source for cell in nb.cells if cell.cell_type == "code"]
+
+def read_fast(path):
+    return list(pipeline_graph.iter_code_cells(path))
+
+read = read_fast if reader == "fast" else read_nbformat
+baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+timings = []
+for _ in range(repeat):
+    start = time.perf_counter()
+    read(nb_path)
+    timings.append(time.perf_counter() - start)
+peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": statistics.median(timings), "rss_mb": (peak_kb - baseline_kb) / 1024}))
+"""
+
+
+def make_notebook(path: Path, size_mb: int, cells: int = 20) -> None:
+    """Write a notebook of roughly ``size_mb`` MB, mostly cell outputs."""
+    payload = max(1, size_mb * 1024 * 1024 // (cells * 2))
+    png = base64.b64encode(os.urandom(payload * 3 // 4)).decode("ascii")
+    html = "<table>" + "<tr><td>value</td></tr>" * (payload // 24) + "</table>"
+
+    nb = nbformat.v4.new_notebook()
+    for idx in range(cells):
+        cell = nbformat.v4.new_code_cell(f"df_{idx} = pd.read_csv(DATA_DIR / 'part_{idx}.csv')\ndf_{idx}.plot()")
+        cell.outputs = [
+            nbformat.v4.new_output("display_data", data={"image/png": png, "text/plain": "<Figure>"}),
+            nbformat.v4.new_output("execute_result", data={"text/html": html}, execution_count=idx + 1),
+        ]
+        nb.cells.append(cell)
+    nbformat.write(nb, path)
+
+
+def run_reader(reader: str, nb_path: Path, repeat: int) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, str(UTILS_DIR), reader, str(nb_path), str(repeat)],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(result.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark notebook readers.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50], help="Notebook sizes in MB.")
+    parser.add_argument("--repeat", type=int, default=5, help="Reads per measurement.")
+    args = parser.parse_args()
+
+    print(f"{'size':>6}  {'reader':<9} {'latency':>10} {'peak RSS':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_mb in args.sizes:
+            nb_path = Path(tmp) / f"bench_{size_mb}mb.ipynb"
+            make_notebook(nb_path, size_mb)
+            actual_mb = nb_path.stat().st_size / (1024 * 1024)
+            for reader in ("nbformat", "fast"):
+                stats = run_reader(reader, nb_path, args.repeat)
+                print(
+                    f"{actual_mb:5.0f}M  {reader:<9} {stats['seconds'] * 1000:8.1f}ms {stats['rss_mb']:8.1f}MB"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python
+"""
+Benchmark suite for pipeline_graph scaling and data I/O throughput.
+
+Generates synthetic projects (notebooks plus a large ``data/`` tree) and
+times:
+
+* ``graph.*``  – ``build_graph`` (cold and cached), ``draw_graph_mermaid``,
+  ``FileIndex`` lookups behind ``resolve_file_node``, the SQLite lineage
+  store (full sync and a downstream query) and the ``CompactGraph`` backend
+  against ``nx.DiGraph`` (build time, retained memory, downstream query and
+  topological sort), per notebook count
+* ``import.*`` – ``import config`` in a fresh interpreter
+* ``io.*``     – CSV / Parquet / Excel read and write throughput per row count
+
+Results are written as JSON. With ``--compare`` the run is checked against
+a stored baseline and the script exits with status 1 when any metric is
+slower by more than ``--threshold``.
+
+Usage
+-----
+python benchmarks/bench_suite.py --out benchmarks/results.json
+python benchmarks/bench_suite.py --quick --compare benchmarks/baseline.json --threshold 0.25
+python benchmarks/bench_suite.py --only graph --notebooks 10 1000 10000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "utils"))
+
+FULL_NOTEBOOKS = [10, 1_000, 10_000]
+FULL_ROWS = [10_000, 100_000, 1_000_000]
+FULL_EXCEL_ROWS = [1_000, 10_000, 100_000]
+QUICK_NOTEBOOKS = [10, 200]
+QUICK_ROWS = [10_000, 100_000]
+QUICK_EXCEL_ROWS = [1_000, 5_000]
+RESULTS_VERSION = 1
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+def quiet():
+    """Silence the progress output printed by the code under test."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def measure(func: Callable[[], object], repeat: int) -> float:
+    """Return the median wall time of ``func`` over ``repeat`` runs."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with quiet():
+            func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def retained_mb(func: Callable[[], object]) -> float:
+    """Return the memory still allocated by ``func``'s result once it returns, in MB."""
+    tracemalloc.start()
+    try:
+        with quiet():
+            result = func()  # noqa: F841 - kept alive until the snapshot
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(retained / 1024**2, 2)
+
+
+def _notebook_json(source: str) -> str:
+    cell = {"cell_type": "code", "execution_count": None, "metadata": {}, "outputs": [], "source": source}
+    return json.dumps({"cells": [cell], "metadata": {}, "nbformat": 4, "nbformat_minor": 5})
+
+
+def make_project(root: Path, notebooks: int, data_files: int) -> None:
+    """
+    Write a synthetic project: a chain of stage notebooks plus a data tree.
+
+    Notebook ``k`` (spread over 100 per directory) reads one raw partition and
+    the previous stage's output, and writes its own stage output, so the graph
+    has ~3 edges per notebook and long dependency chains.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "pyproject.toml").write_text("[project]\nname = 'bench'\n")
+    for idx in range(data_files):
+        part = root / "data" / "raw" / f"day=2025-01-{1 + idx % 28:02d}" / f"part-{idx}.csv"
+        part.parent.mkdir(parents=True, exist_ok=True)
+        part.write_text("id,value\n")
+    for idx in range(notebooks):
+        nb_path = root / "notebooks" / f"group_{idx // 100:03d}" / f"stage_{idx:05d}.ipynb"
+        nb_path.parent.mkdir(parents=True, exist_ok=True)
+        day = 1 + idx % 28
+        lines = [
+            f"raw = pd.read_csv(DATA_DIR / 'raw/day=2025-01-{day:02d}/part-{idx % max(data_files, 1)}.csv')",
+            f"prev = pd.read_parquet(OUTPUT_DIR / 'stage_{idx - 1:05d}.parquet')" if idx else "prev = raw",
+            f"prev.to_parquet(OUTPUT_DIR / 'stage_{idx:05d}.parquet')",
+        ]
+        nb_path.write_text(_notebook_json("\n".join(lines)))
+
+
+def make_frame(rows: int):
+    """Return a synthetic frame of mixed ids, numbers, categories, text and dates."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "id": np.arange(rows),
+            "amount": rng.normal(100, 25, rows).round(2),
+            "quantity": rng.integers(1, 50, rows),
+            "region": rng.choice(["north", "south", "east", "west"], rows),
+            "customer": [f"customer-{i % 5000}" for i in range(rows)],
+            "day": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+        }
+    )
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+def bench_graph(sizes: List[int], data_files: int, repeat: int, workdir: Path) -> Dict[str, dict]:
+    import networkx as nx
+
+    import pipeline_graph
+    from compact_graph import CompactGraph
+    from lineage_store import LineageStore
+
+    results = {}
+    for notebooks in sizes:
+        root = workdir / f"project_{notebooks}"
+        make_project(root, notebooks, data_files)
+        cache_path = root / ".pipeline_graph" / "scan_cache.json"
+
+        results[f"graph.build_graph.cold[{notebooks}]"] = {
+            "seconds": measure(lambda: pipeline_graph.build_graph(root, jobs=1), repeat)
+        }
+        with quiet():
+            pipeline_graph.build_graph(root, cache=pipeline_graph.ScanCache(cache_path))
+            graph = pipeline_graph.build_graph(root, cache=pipeline_graph.ScanCache.load(cache_path))
+
+        def cached_build() -> object:
+            return pipeline_graph.build_graph(root, cache=pipeline_graph.ScanCache.load(cache_path))
+
+        def compact_build() -> object:
+            return CompactGraph.build(root, cache=pipeline_graph.ScanCache.load(cache_path))
+
+        results[f"graph.build_graph.cached[{notebooks}]"] = {
+            "seconds": measure(cached_build, repeat),
+            "memory_mb": retained_mb(cached_build),
+        }
+        results[f"graph.compact_build.cached[{notebooks}]"] = {
+            "seconds": measure(compact_build, repeat),
+            "memory_mb": retained_mb(compact_build),
+        }
+        compact = CompactGraph.from_networkx(graph)
+        source = "output/stage_00000.parquet"
+        results[f"graph.nx_downstream[{notebooks}]"] = {
+            "seconds": measure(lambda: nx.descendants(graph, source), repeat)
+        }
+        results[f"graph.compact_downstream[{notebooks}]"] = {
+            "seconds": measure(lambda: compact.downstream(source), repeat)
+        }
+        results[f"graph.nx_toposort[{notebooks}]"] = {
+            "seconds": measure(lambda: list(nx.topological_sort(graph)), repeat)
+        }
+        results[f"graph.compact_toposort[{notebooks}]"] = {"seconds": measure(compact.topological_sort, repeat)}
+        results[f"graph.draw_mermaid[{notebooks}]"] = {
+            "seconds": measure(lambda: pipeline_graph.draw_graph_mermaid(graph, root / "pipeline.mmd"), repeat)
+        }
+
+        names = [f"part-{idx}.csv" for idx in range(0, data_files, max(1, data_files // 1000))]
+
+        def resolve() -> None:
+            index = pipeline_graph.FileIndex(root)
+            for name in names:
+                pipeline_graph.resolve_file_node(name, root, index)
+
+        results[f"graph.resolve_file_node[{notebooks}]"] = {"seconds": measure(resolve, repeat)}
+
+        db_path = root / "lineage.sqlite"
+
+        def sync() -> None:
+            db_path.unlink(missing_ok=True)
+            with LineageStore(db_path) as store:
+                store.sync(graph)
+
+        results[f"graph.lineage_sync[{notebooks}]"] = {"seconds": measure(sync, repeat)}
+        with LineageStore(db_path) as store:
+            first = store.resolve("stage_00000.parquet")
+            results[f"graph.lineage_downstream[{notebooks}]"] = {
+                "seconds": measure(lambda: store.downstream(first), repeat)
+            }
+    return results
+
+
+def bench_import(repeat: int) -> Dict[str, dict]:
+    def run(code: str) -> float:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, check=True, capture_output=True)
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
+
+    run("import config")  # warm bytecode caches
+    baseline = run("pass")
+    return {"import.config": {"seconds": max(0.0, run("import config") - baseline)}}
+
+
+def bench_io(rows_sizes: List[int], excel_sizes: List[int], repeat: int, workdir: Path) -> Dict[str, dict]:
+    import pandas as pd
+
+    from src.excel import read_sheets, write_excel
+
+    formats = {
+        "csv": (lambda df, path: df.to_csv(path, index=False), pd.read_csv, ".csv"),
+        "parquet": (lambda df, path: df.to_parquet(path), pd.read_parquet, ".parquet"),
+        "excel": (write_excel, lambda path: read_sheets(path, [0]), ".xlsx"),
+    }
+    results = {}
+    for name, (write, read, suffix) in formats.items():
+        for rows in excel_sizes if name == "excel" else rows_sizes:
+            df = make_frame(rows)
+            path = workdir / f"frame_{rows}{suffix}"
+            write_seconds = measure(lambda: write(df, path), repeat)
+            megabytes = path.stat().st_size / 1024**2
+            read_seconds = measure(lambda: read(path), repeat)
+            for op, seconds in (("write", write_seconds), ("read", read_seconds)):
+                results[f"io.{name}.{op}[{rows}]"] = {
+                    "seconds": seconds,
+                    "mb": round(megabytes, 2),
+                    "mb_per_s": round(megabytes / seconds, 2) if seconds else None,
+                }
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Comparison
+# ---------------------------------------------------------------------------
+def compare(current: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """Print a comparison table and return the metrics slower than ``threshold``."""
+    regressions = []
+    print(f"{'metric':<44} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name in sorted(current):
+        now = current[name]["seconds"]
+        before = baseline.get(name, {}).get("seconds")
+        if before is None:
+            print(f"{name:<44} {'—':>10} {now:9.3f}s {'new':>8}")
+            continue
+        change = (now - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  ❌"
+        print(f"{name:<44} {before:9.3f}s {now:9.3f}s {change:+7.0%}{flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the pipeline_graph and data I/O benchmark suite.")
+    parser.add_argument("--only", choices=("graph", "import", "io"), action="append", help="Run only these groups.")
+    parser.add_argument("--quick", action="store_true", help="Use small sizes suitable for CI.")
+    parser.add_argument("--notebooks", type=int, nargs="+", default=None, help="Notebook counts for graph benchmarks.")
+    parser.add_argument("--data-files", type=int, default=None, help="Files in the synthetic data tree.")
+    parser.add_argument("--rows", type=int, nargs="+", default=None, help="Row counts for CSV/Parquet benchmarks.")
+    parser.add_argument("--excel-rows", type=int, nargs="+", default=None, help="Row counts for Excel benchmarks.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (median is reported).")
+    parser.add_argument("--out", type=Path, default=None, help="Write results JSON here.")
+    parser.add_argument("--compare", type=Path, default=None, help="Baseline results JSON to compare against.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown before a metric counts as a regression (0.25 = 25%%).",
+    )
+    args = parser.parse_args()
+
+    groups = set(args.only or ("graph", "import", "io"))
+    notebooks = args.notebooks or (QUICK_NOTEBOOKS if args.quick else FULL_NOTEBOOKS)
+    data_files = args.data_files if args.data_files is not None else (2_000 if args.quick else 50_000)
+    rows = args.rows or (QUICK_ROWS if args.quick else FULL_ROWS)
+    excel_rows = args.excel_rows or (QUICK_EXCEL_ROWS if args.quick else FULL_EXCEL_ROWS)
+
+    results: Dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        if "graph" in groups:
+            results.update(bench_graph(notebooks, data_files, args.repeat, workdir))
+        if "import" in groups:
+            results.update(bench_import(args.repeat))
+        if "io" in groups:
+            results.update(bench_io(rows, excel_rows, args.repeat, workdir))
+
+    payload = {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"✅ Results written to: {args.out}")
+
+    if args.compare is None:
+        for name, metric in sorted(results.items()):
+            rate = f"  {metric['mb_per_s']:.1f} MB/s" if metric.get("mb_per_s") else ""
+            memory = f"  {metric['memory_mb']:.1f} MB retained" if "memory_mb" in metric else ""
+            print(f"{name:<44} {metric['seconds']:9.3f}s{rate}{memory}")
+        return
+
+    baseline = json.loads(args.compare.read_text(encoding="utf-8"))["results"]
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"❌ {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print("✅ No regressions beyond the threshold.")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,12 @@
 #
 # Both approaches work because config.py now automatically handles
 # project root detection and sys.path setup.
+#
+# Only sys.path of the current process is changed. The root is deliberately
+# not exported as PROJECT_ROOT: environment variables are inherited by every
+# subprocess the notebook starts, which would pin them to this project even
+# when they run elsewhere. config.py finds the same root with its own
+# (memoized) walk.
 
 import sys
 from pathlib import Path
@@ -1,6 +1,11 @@
 # config.py (in project root)
+#
+# All paths below are computed lazily on first access (see ``__getattr__``),
+# so ``import config`` itself does no filesystem work and does not import
+# python-dotenv until a path is actually needed.
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 
@@ -9,16 +14,24 @@ def _find_project_root(marker: str = "pyproject.toml") -> Path:
     Locate the project root by walking upward from the current working directory.
     Returns the project root path.
     """
+    return _discover_root(marker, os.getenv("PROJECT_ROOT"), os.getcwd())
+
+
+@lru_cache(maxsize=None)
+def _discover_root(marker: str, env_root: str | None, cwd: str) -> Path:
+    """
+    Memoized root discovery, keyed on everything that can change the answer.
+    Failures are not cached, so a later call can still succeed.
+    """
     # First check if PROJECT_ROOT is set via environment variable
-    env_root = os.getenv("PROJECT_ROOT")
     if env_root:
         root_path = Path(env_root).resolve()
         if root_path.exists():
             return root_path
     
     # Otherwise, search for the marker file
-    cwd = Path.cwd().resolve()
-    for parent in [cwd] + list(cwd.parents):
+    cwd_path = Path(cwd).resolve()
+    for parent in [cwd_path] + list(cwd_path.parents):
         if (parent / marker).exists():
             return parent
     
@@ -40,19 +53,34 @@ def _ensure_project_root(marker: str = "pyproject.toml") -> Path:
     return root
 
 
-# ✅ Find and set up project root first (before anything else)
-PROJECT_ROOT = _ensure_project_root()
+def _load_env_file(root: Path) -> None:
+    """Load ``root/.env`` into the environment if python-dotenv is available."""
+    dotenv_path = root / ".env"
+    if not dotenv_path.exists():
+        return
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        # python-dotenv not installed, skip .env file loading
+        return
+    load_dotenv(dotenv_path)
+
 
-# Try to load .env file if python-dotenv is available
-try:
-    from dotenv import load_dotenv
-    # Look for .env file in project root
-    dotenv_path = PROJECT_ROOT / ".env"
-    if dotenv_path.exists():
-        load_dotenv(dotenv_path)
-except ImportError:
-    # python-dotenv not installed, skip .env file loading
-    pass
+# Values computed on first access; reset whenever the module is (re)loaded.
+_lazy_values: dict = {}
+
+
+def _project_root() -> Path:
+    """
+    Find and set up the project root on first use: add it to sys.path and
+    load its .env file before any directory is resolved.
+    """
+    root = _lazy_values.get("PROJECT_ROOT")
+    if root is None:
+        root = _ensure_project_root()
+        _load_env_file(root)
+        _lazy_values["PROJECT_ROOT"] = root
+    return root
 
 
 def _get_path_from_env(env_var: str, default_relative: str) -> Path:
@@ -71,16 +99,65 @@ def _get_path_from_env(env_var: str, default_relative: str) -> Path:
         path = Path(env_value)
         # If path is relative, make it relative to project root
         if not path.is_absolute():
-            return (PROJECT_ROOT / path).resolve()
+            return (_project_root() / path).resolve()
         return path.resolve()
     
     # Use default relative to project root
-    return PROJECT_ROOT / default_relative
+    return _project_root() / default_relative
 
 
 # Base folders - can be overridden by environment variables
-DATA_DIR = _get_path_from_env("DATA_DIR", "data")
-OUTPUT_DIR = _get_path_from_env("OUTPUT_DIR", "output")
-NOTEBOOKS_DIR = _get_path_from_env("NOTEBOOKS_DIR", "notebooks")
-SRC_DIR = _get_path_from_env("SRC_DIR", "src")
-TESTS_DIR = _get_path_from_env("TESTS_DIR", "tests")
+_DIR_DEFAULTS = {
+    "DATA_DIR": "data",
+    "OUTPUT_DIR": "output",
+    "NOTEBOOKS_DIR": "notebooks",
+    "SRC_DIR": "src",
+    "TESTS_DIR": "tests",
+    "CACHE_DIR": ".cache",
+}
+
+# Size limit for CACHE_DIR before least-recently-used entries are evicted
+_DEFAULT_CACHE_MAX_BYTES = 20 * 1024**3
+_SIZE_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3}
+
+
+def parse_size(value: str) -> int:
+    """Parse sizes such as ``64MB``, ``1GB`` or a plain byte count into bytes."""
+    import re
+
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*", value.upper())
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    number, unit = match.groups()
+    if unit in ("K", "M", "G"):
+        unit += "B"
+    return int(float(number) * _SIZE_UNITS[unit])
+
+
+def __getattr__(name: str):
+    """Compute PROJECT_ROOT, the base folders and cache settings on first access."""
+    if name == "PROJECT_ROOT":
+        return _project_root()
+    if name in _DIR_DEFAULTS:
+        value = _lazy_values.get(name)
+        if value is None:
+            _project_root()  # make sure .env is loaded before reading overrides
+            value = _get_path_from_env(name, _DIR_DEFAULTS[name])
+            _lazy_values[name] = value
+        return value
+    if name == "CACHE_MAX_BYTES":
+        _project_root()  # make sure .env is loaded before reading overrides
+        raw = os.getenv("CACHE_MAX_BYTES")
+        if not raw:
+            return _DEFAULT_CACHE_MAX_BYTES
+        try:
+            return parse_size(raw)
+        except ValueError:
+            raise ValueError(
+                f"CACHE_MAX_BYTES must be a byte count or a size such as 500MB or 20GB, got {raw!r}"
+            ) from None
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | {"PROJECT_ROOT", "CACHE_MAX_BYTES"} | set(_DIR_DEFAULTS))
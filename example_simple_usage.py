@@ -12,6 +12,8 @@ from config import DATA_DIR, OUTPUT_DIR, TESTS_DIR
 
 import pandas as pd
 
+from src.writers import write_parquet
+
 
 def main():
     """Demonstrate simple config usage."""
@@ -30,9 +32,9 @@ def main():
         print(f"   Columns: {list(df.columns)}")
         print()
         
-        # Example: Write to output
+        # Example: Write to output (atomically, safe with parallel jobs)
         output_file = OUTPUT_DIR / "example_output.parquet"
-        df.to_parquet(output_file)
+        write_parquet(df, output_file)
         print(f"✅ Written: {output_file}")
     else:
         print(f"⚠️  Test file not found: {test_csv}")
@@ -0,0 +1,3 @@
+"""
+Reusable data loading and writing helpers shared across notebooks.
+"""
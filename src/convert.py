@@ -0,0 +1,409 @@
+"""
+Out-of-core CSV → Parquet conversion.
+
+The CSV is read in fixed-size record batches with pyarrow's streaming reader
+and each batch is written as a Parquet row group, so peak memory is bounded
+by the batch size rather than the file size.
+
+Column types are inferred from the first batch. Before anything is written,
+a bounded pre-pass parses a few batch-sized samples spread over the file and
+compares their types with the first batch's, so a column that drifts later
+(e.g. an integer column that turns into decimals, or an all-empty first
+batch) is usually caught without converting the file twice. Drift is handled
+explicitly: with ``on_drift="widen"`` the column is widened (null → inferred,
+int64 → float64, otherwise → string) and pinned; with ``on_drift="error"`` a
+``SchemaDriftError`` names the column. Drift that no sample saw still
+restarts the conversion: the batch that failed is parsed again on its own
+and every column that drifts in it is pinned at once, so each restart
+settles a batch rather than a single column.
+
+Usage:
+    python -m src.convert data/extract.csv output/extract.parquet --batch-size 128MB
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+from config import parse_size  # shared with config's CACHE_MAX_BYTES; re-exported for callers
+from src.writers import atomic_path
+
+DEFAULT_BATCH_SIZE = 64 * 1024**2
+# Batch-sized samples the inference pre-pass parses: the first batch plus
+# evenly spaced ones up to the end of the file. Files smaller than this many
+# batches skip the pre-pass, since a restart costs less than the samples.
+DEFAULT_INFER_SAMPLES = 4
+# Only used when the failing batch cannot be located or re-parsed; the wording
+# of Arrow's conversion errors is not a stable interface.
+_DRIFT_ERROR = re.compile(r"In CSV column #(\d+): .*?conversion error to (\S+): invalid value '(.*)'", re.DOTALL)
+
+
+class SchemaDriftError(ValueError):
+    """A later CSV batch does not match the column types inferred earlier, or cannot be converted at all."""
+
+
+class ConversionReport:
+    """Summary of a conversion run: volume, throughput and peak memory."""
+
+    def __init__(self, source: Path, target: Path):
+        self.source = source
+        self.target = target
+        self.rows = 0
+        self.batches = 0
+        self.bytes_read = 0
+        self.seconds = 0.0
+        self.restarts = 0
+        self.widened: Dict[str, pa.DataType] = {}  # columns pinned to a wider type, by the pre-pass or a restart
+        self.peak_rss_bytes: Optional[int] = None  # peak of the whole process so far, not of this conversion alone
+        self.schema: Optional[pa.Schema] = None
+
+    @property
+    def throughput_mb_s(self) -> float:
+        return self.bytes_read / 1024**2 / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        rss = f"{self.peak_rss_bytes / 1024**2:.0f} MB" if self.peak_rss_bytes is not None else "n/a"
+        return (
+            f"{self.source.name} → {self.target.name}: {self.rows:,} rows in {self.batches} row groups, "
+            f"{self.bytes_read / 1024**2:.1f} MB in {self.seconds:.1f}s ({self.throughput_mb_s:.1f} MB/s), "
+            f"process peak RSS {rss}, {len(self.widened)} column(s) widened, {self.restarts} schema restart(s)"
+        )
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _widen(type_name: str, value: str) -> pa.DataType:
+    """Return the type a column should be pinned to after ``value`` failed to convert to ``type_name``."""
+    if type_name == "null":
+        for candidate, parse in ((pa.int64(), int), (pa.float64(), float)):
+            try:
+                parse(value)
+                return candidate
+            except ValueError:
+                continue
+        return pa.string()
+    if type_name.startswith(("int", "uint")):
+        try:
+            float(value)
+            return pa.float64()
+        except ValueError:
+            return pa.string()
+    return pa.string()
+
+
+def _unify(first: pa.DataType, later: pa.DataType) -> pa.DataType:
+    """Return the type that holds values inferred as ``first`` in one sample and ``later`` in another."""
+    if later == first or pa.types.is_null(later) or pa.types.is_string(first):
+        return first
+    if pa.types.is_null(first):
+        return later
+    if pa.types.is_floating(first) and pa.types.is_integer(later):
+        return first
+    if pa.types.is_integer(first) and pa.types.is_floating(later):
+        return pa.float64()
+    return pa.string()
+
+
+def _pin_drift(
+    exc: pa.ArrowInvalid,
+    names: List[str],
+    column_types: Dict[str, pa.DataType],
+    on_drift: str,
+    report: ConversionReport,
+) -> None:
+    """Pin the column a conversion error is about to a wider type, or raise ``SchemaDriftError``."""
+    match = _DRIFT_ERROR.search(str(exc))
+    if match is None:
+        raise SchemaDriftError(f"{report.source.name} does not fit its inferred CSV schema: {exc}") from exc
+    column_index, type_name, value = int(match.group(1)), match.group(2), match.group(3)
+    name = names[column_index]
+    if on_drift == "error":
+        raise SchemaDriftError(
+            f"Column {name!r} was inferred as {type_name} but later holds {value!r}; "
+            f"pass column_types={{{name!r}: ...}} or on_drift='widen'."
+        ) from exc
+    column_types[name] = report.widened[name] = _widen(type_name, value)
+
+
+def _pin_from_chunk(
+    chunk: bytes,
+    known: Dict[str, pa.DataType],
+    column_types: Dict[str, pa.DataType],
+    on_drift: str,
+    report: ConversionReport,
+    csv_options: Dict,
+) -> bool:
+    """Pin every column whose values in ``chunk`` do not fit its current type; return whether any did.
+
+    A column's current type is its pinned type, else its type in ``known``;
+    columns with neither are left to inference.
+    """
+    try:
+        inferred = pv.read_csv(
+            pa.py_buffer(chunk),
+            read_options=pv.ReadOptions(block_size=len(chunk) + 1),
+            parse_options=pv.ParseOptions(**csv_options),
+        ).schema
+    except pa.ArrowInvalid:
+        return False
+    pinned = False
+    for field in inferred:
+        current = column_types.get(field.name, known.get(field.name))
+        if current is None or _unify(current, field.type) == current:
+            continue
+        if on_drift == "error":
+            raise SchemaDriftError(
+                f"Column {field.name!r} was inferred as {current} but later holds {field.type} values; "
+                f"pass column_types={{{field.name!r}: ...}} or on_drift='widen'."
+            )
+        column_types[field.name] = report.widened[field.name] = _unify(current, field.type)
+        pinned = True
+    return pinned
+
+
+def _chunk_at_row(source: Path, row: int, size: int) -> bytes:
+    """Return up to ``size`` bytes of CSV (header included) from data row ``row``, cut at a row end.
+
+    Rows are counted by newlines, so blank lines (which the reader skips)
+    make the chunk start early rather than late.
+    """
+    with source.open("rb") as handle:
+        header = handle.readline()
+        while row:
+            block = handle.read(1 << 20)
+            if not block:
+                break
+            count = block.count(b"\n")
+            if count < row:
+                row -= count
+                continue
+            end = -1
+            for _ in range(row):
+                end = block.index(b"\n", end + 1)
+            handle.seek(end + 1 - len(block), os.SEEK_CUR)
+            row = 0
+        chunk = handle.read(size)
+    return header + chunk[: chunk.rfind(b"\n") + 1]
+
+
+def _header_names(source: Path, parse_options: pv.ParseOptions) -> List[str]:
+    """Column names from the CSV's first line, without opening a reader on the whole file."""
+    with source.open("rb") as handle:
+        header = handle.readline()
+    return pv.read_csv(pa.py_buffer(header), parse_options=parse_options).column_names
+
+
+def _samples(source: Path, batch_size: int, count: int) -> Iterator[bytes]:
+    """Yield ``count`` batch-sized CSV samples (header included) from the start to the end of ``source``."""
+    size = source.stat().st_size
+    with source.open("rb") as handle:
+        header = handle.readline()
+        span = size - batch_size
+        for idx in range(count):
+            offset = span * idx // (count - 1) if count > 1 else 0
+            handle.seek(offset)
+            chunk = handle.read(batch_size)
+            if offset:
+                chunk = header + chunk[chunk.find(b"\n") + 1 :]  # resume at the next full row
+            yield chunk[: chunk.rfind(b"\n") + 1]
+
+
+def _infer_column_types(
+    source: Path,
+    names: List[str],
+    batch_size: int,
+    samples: int,
+    column_types: Dict[str, pa.DataType],
+    on_drift: str,
+    report: ConversionReport,
+    csv_options: Dict,
+) -> None:
+    """Pin every column whose type drifts between samples of ``source`` (the bounded pre-pass)."""
+    first: Dict[str, pa.DataType] = {}
+    unified: Dict[str, pa.DataType] = {}
+    for chunk in _samples(source, batch_size, samples):
+        while True:
+            try:
+                # One block per sample, so types are inferred as for a batch of the real read.
+                schema = pv.read_csv(
+                    pa.py_buffer(chunk),
+                    read_options=pv.ReadOptions(block_size=len(chunk) + 1),
+                    parse_options=pv.ParseOptions(**csv_options),
+                    convert_options=pv.ConvertOptions(column_types=column_types),
+                ).schema
+                break
+            except pa.ArrowInvalid as exc:
+                if not _pin_from_chunk(chunk, {}, column_types, on_drift, report, csv_options):
+                    _pin_drift(exc, names, column_types, on_drift, report)
+        for field in schema:
+            first.setdefault(field.name, field.type)
+            unified[field.name] = _unify(unified.get(field.name, field.type), field.type)
+
+    for name, type_ in unified.items():
+        if type_ == first[name] or name in column_types:
+            continue
+        if on_drift == "error":
+            raise SchemaDriftError(
+                f"Column {name!r} is inferred as {first[name]} from the first batch but as {type_} further into "
+                f"the file; pass column_types={{{name!r}: ...}} or on_drift='widen'."
+            )
+        column_types[name] = report.widened[name] = type_
+
+
+def _convert_once(
+    source: Path,
+    tmp_target: Path,
+    batch_size: int,
+    column_types: Dict[str, pa.DataType],
+    report: ConversionReport,
+    compression: str,
+    csv_options: Dict,
+) -> None:
+    report.rows = report.batches = 0
+    report.schema = None
+    reader = pv.open_csv(
+        source,
+        read_options=pv.ReadOptions(block_size=batch_size),
+        parse_options=pv.ParseOptions(**csv_options),
+        convert_options=pv.ConvertOptions(column_types=column_types),
+    )
+    report.schema = reader.schema
+    writer = pq.ParquetWriter(tmp_target, reader.schema, compression=compression)
+    try:
+        for batch in reader:
+            writer.write_batch(batch)
+            report.rows += batch.num_rows
+            report.batches += 1
+    finally:
+        writer.close()
+
+
+def convert_csv_to_parquet(
+    source,
+    target,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    on_drift: str = "widen",
+    column_types: Optional[Dict[str, pa.DataType]] = None,
+    compression: str = "snappy",
+    infer_samples: int = DEFAULT_INFER_SAMPLES,
+    **csv_options,
+) -> ConversionReport:
+    """
+    Stream a CSV into a Parquet file without loading it into memory.
+
+    Args:
+        source: CSV file to convert
+        target: Parquet file to write (replaced atomically when done)
+        batch_size: Bytes of CSV per record batch / row group; bounds peak memory
+        on_drift: ``"widen"`` to widen drifting columns, ``"error"`` to raise ``SchemaDriftError``
+        column_types: Column name → Arrow type overrides that skip inference
+        compression: Parquet compression codec
+        infer_samples: Batch-sized samples the pre-pass compares before writing
+            (0 disables it; skipped for files with no more batches than samples)
+        **csv_options: Extra ``pyarrow.csv.ParseOptions`` (e.g. ``delimiter=";"``)
+
+    Returns:
+        ConversionReport with row counts, throughput, widened columns and process peak RSS
+    """
+    if on_drift not in ("widen", "error"):
+        raise ValueError("on_drift must be 'widen' or 'error'")
+
+    source, target = Path(source), Path(target)
+    report = ConversionReport(source, target)
+    column_types = dict(column_types or {})
+
+    started = time.perf_counter()
+    names = _header_names(source, pv.ParseOptions(**csv_options))
+    # Samples start mid-row, which cannot be found when values may contain newlines.
+    sample = infer_samples and not csv_options.get("newlines_in_values")
+    if sample and source.stat().st_size > infer_samples * batch_size:
+        _infer_column_types(source, names, batch_size, infer_samples, column_types, on_drift, report, csv_options)
+    with atomic_path(target) as tmp_target:
+        while True:
+            try:
+                _convert_once(source, tmp_target, batch_size, column_types, report, compression, csv_options)
+                break
+            except pa.ArrowInvalid as exc:
+                # The batch that failed starts after the rows written so far and is at most one
+                # batch long; the second batch of slack covers blank lines counted as rows.
+                # Rows cannot be counted by newlines when values may contain them.
+                known = {field.name: field.type for field in report.schema or ()}
+                chunk = None
+                if not csv_options.get("newlines_in_values"):
+                    chunk = _chunk_at_row(source, report.rows, 2 * batch_size)
+                if chunk is None or not _pin_from_chunk(chunk, known, column_types, on_drift, report, csv_options):
+                    _pin_drift(exc, names, column_types, on_drift, report)
+                report.restarts += 1
+
+    report.seconds = time.perf_counter() - started
+    report.bytes_read = source.stat().st_size
+    report.peak_rss_bytes = _peak_rss_bytes()
+    return report
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Stream a CSV file into Parquet with bounded memory.")
+    parser.add_argument("source", type=Path, help="CSV file to convert.")
+    parser.add_argument(
+        "target",
+        type=Path,
+        nargs="?",
+        default=None,
+        help="Parquet file to write (default: OUTPUT_DIR/<source stem>.parquet).",
+    )
+    parser.add_argument("--batch-size", type=parse_size, default=DEFAULT_BATCH_SIZE, help="Batch size, e.g. 64MB.")
+    parser.add_argument("--on-drift", choices=("widen", "error"), default="widen", help="Schema drift handling.")
+    parser.add_argument(
+        "--column-type",
+        action="append",
+        default=[],
+        metavar="NAME=TYPE",
+        help="Pin a column type, e.g. id=string or amount=float64 (repeatable).",
+    )
+    parser.add_argument("--delimiter", default=",", help="CSV field delimiter.")
+    parser.add_argument("--compression", default="snappy", help="Parquet compression codec.")
+    args = parser.parse_args(argv)
+
+    column_types = {}
+    for spec in args.column_type:
+        name, _, type_name = spec.partition("=")
+        column_types[name] = pa.type_for_alias(type_name)
+
+    target = args.target
+    if target is None:
+        from config import OUTPUT_DIR
+
+        target = OUTPUT_DIR / f"{args.source.stem}.parquet"
+
+    report = convert_csv_to_parquet(
+        args.source,
+        target,
+        batch_size=args.batch_size,
+        on_drift=args.on_drift,
+        column_types=column_types,
+        compression=args.compression,
+        delimiter=args.delimiter,
+    )
+    print(f"✅ {report.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Memory-optimised dtypes for loaded DataFrames.
+
+``pd.read_csv`` gives every integer column int64, every decimal float64 and
+every text column a full string per row. For ID-heavy data most of that is
+wasted: ``dtype_plan`` picks the smallest lossless numeric type for each
+column, turns low-cardinality text into ``category`` and keeps other text
+as pyarrow-backed strings. ``memory_report`` shows the effect per column.
+
+Example:
+    from src.dtypes import apply_dtypes, dtype_plan, memory_report
+
+    plan = dtype_plan(df)
+    small = apply_dtypes(df, plan)
+    print(memory_report(df, small))
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api import types as ptypes
+
+# Text columns with at most this share of distinct values become categories.
+CATEGORY_MAX_RATIO = 0.5
+INTEGER_CANDIDATES = ("int8", "int16", "int32", "uint8", "uint16", "uint32")
+STRING_DTYPE = "string[pyarrow]"
+
+
+def _integer_dtype(col: pd.Series) -> Optional[str]:
+    if col.isna().any() or col.empty:
+        return None
+    low, high = col.min(), col.max()
+    unsigned = low >= 0
+    for candidate in INTEGER_CANDIDATES:
+        info = np.iinfo(candidate)
+        if (candidate.startswith("u") == unsigned) and info.min <= low and high <= info.max:
+            return candidate
+    return None
+
+
+def _float_dtype(col: pd.Series) -> Optional[str]:
+    values = col.to_numpy(dtype="float64", na_value=np.nan)
+    # Only downcast when every value survives the round trip unchanged.
+    if np.array_equal(values.astype("float32").astype("float64"), values, equal_nan=True):
+        return "float32"
+    return None
+
+
+def _text_dtype(col: pd.Series, category_max_ratio: float) -> Optional[str]:
+    if ptypes.infer_dtype(col, skipna=True) not in ("string", "empty"):
+        return None  # mixed object column; leave it alone
+    distinct = col.nunique(dropna=True)
+    if len(col) and distinct / len(col) <= category_max_ratio:
+        return "category"
+    return STRING_DTYPE
+
+
+def dtype_plan(df: pd.DataFrame, category_max_ratio: float = CATEGORY_MAX_RATIO) -> Dict[str, str]:
+    """
+    Choose a compact dtype for every column of ``df``.
+
+    Args:
+        df: DataFrame to analyse
+        category_max_ratio: Maximum distinct/rows ratio for a text column to become ``category``
+
+    Returns:
+        Mapping of column name → dtype string, covering every column (columns
+        that cannot shrink keep their current dtype)
+    """
+    plan = {}
+    for name, col in df.items():
+        dtype = col.dtype
+        chosen = None
+        if isinstance(dtype, pd.CategoricalDtype) or ptypes.is_bool_dtype(dtype):
+            chosen = None
+        elif ptypes.is_integer_dtype(dtype):
+            chosen = _integer_dtype(col)
+        elif ptypes.is_float_dtype(dtype):
+            chosen = _float_dtype(col)
+        elif ptypes.is_string_dtype(dtype) or ptypes.is_object_dtype(dtype):
+            chosen = _text_dtype(col, category_max_ratio)
+        plan[str(name)] = chosen or str(dtype)
+    return plan
+
+
+def apply_dtypes(df: pd.DataFrame, plan: Dict[str, str]) -> pd.DataFrame:
+    """Return ``df`` with the dtypes from ``plan`` applied to the columns it covers."""
+    changes = {name: dtype for name, dtype in plan.items() if name in df.columns and str(df[name].dtype) != dtype}
+    return df.astype(changes) if changes else df
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compare per-column memory use of two versions of a DataFrame.
+
+    Args:
+        before: DataFrame with the original dtypes
+        after: The same data with optimised dtypes
+
+    Returns:
+        DataFrame indexed by column (plus a ``TOTAL`` row) with dtypes, bytes
+        before/after and the percentage saved
+    """
+    bytes_before = before.memory_usage(index=False, deep=True)
+    bytes_after = after.memory_usage(index=False, deep=True)
+    report = pd.DataFrame(
+        {
+            "dtype_before": before.dtypes.astype(str),
+            "dtype_after": after.dtypes.astype(str),
+            "bytes_before": bytes_before,
+            "bytes_after": bytes_after,
+        }
+    )
+    report.loc["TOTAL"] = ["", "", bytes_before.sum(), bytes_after.sum()]
+    report["bytes_before"] = report["bytes_before"].astype("int64")
+    report["bytes_after"] = report["bytes_after"].astype("int64")
+    saved = 1 - report["bytes_after"] / report["bytes_before"].where(report["bytes_before"] > 0)
+    report["saved_pct"] = (100 * saved).round(1).fillna(0.0)
+    return report
@@ -0,0 +1,210 @@
+"""
+Fast Excel reading and writing with per-sheet Parquet caching.
+
+``pd.read_excel`` builds a full openpyxl object model (styles, merged cells,
+one Python object per cell) before pandas sees any data, and ``to_excel``
+does the same in reverse. Here workbooks are streamed instead:
+
+* ``read_excel`` opens the workbook in openpyxl's read-only mode and pulls
+  plain row tuples. Each sheet is then cached as Parquet keyed on the
+  workbook's content hash, so later loads never touch the ``.xlsx``.
+* ``write_excel`` uses a write-only workbook that flushes rows as it goes,
+  so memory stays flat however many rows are exported.
+
+Example:
+    from config import DATA_DIR, OUTPUT_DIR
+    from src.excel import read_excel, write_excel
+
+    df = read_excel(DATA_DIR / "budget.xlsx", sheet_name="2025")
+    write_excel({"summary": summary, "detail": detail}, OUTPUT_DIR / "report.xlsx")
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+
+from src.loading import Filters, LoadCache, optimize_frame
+from src.writers import atomic_path
+
+EXCEL_SUFFIXES = {".xlsx", ".xlsm"}
+# Rows converted per chunk when writing; bounds the temporary object copies.
+WRITE_CHUNK_ROWS = 10_000
+
+SheetName = Union[int, str]
+
+
+def _sheet_frame(worksheet, header: Optional[int]) -> pd.DataFrame:
+    """Build a DataFrame from a read-only worksheet's row tuples."""
+    rows = worksheet.iter_rows(values_only=True)
+    columns = None
+    if header is not None:
+        for _ in range(header):
+            next(rows, None)
+        columns = [f"Unnamed: {idx}" if name is None else str(name) for idx, name in enumerate(next(rows, ()))]
+
+    # Blank rows are dropped, as pd.read_excel does by default.
+    data = [row for row in rows if any(value is not None for value in row)]
+    if columns is not None:
+        width = max([len(columns)] + [len(row) for row in data])
+        columns += [f"Unnamed: {idx}" for idx in range(len(columns), width)]
+    return pd.DataFrame(data, columns=columns).infer_objects()
+
+
+def frame_to_arrow(df: pd.DataFrame) -> pa.Table:
+    """
+    Convert a sheet's DataFrame to Arrow, turning mixed-type columns into strings.
+
+    Excel columns routinely mix numbers and text (``[101, "A7"]``), which
+    pandas keeps as ``object`` but Arrow cannot store in one typed column.
+    Such columns are cast to strings (missing cells stay null); every other
+    column converts unchanged.
+    """
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    df = df.copy()
+    for name in df.columns[df.dtypes == object]:
+        try:
+            pa.array(df[name], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            df[name] = df[name].map(str, na_action="ignore")
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _read_workbook(
+    path: Path, sheets: Optional[Sequence[SheetName]], header: Optional[int]
+) -> Tuple[List[str], Dict[str, pd.DataFrame]]:
+    """Return the sheet name each requested sheet resolves to, and each named sheet's frame."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        names = workbook.sheetnames
+        wanted = names if sheets is None else [names[s] if isinstance(s, int) else s for s in sheets]
+        missing = [name for name in wanted if name not in names]
+        if missing:
+            raise ValueError(f"Worksheet(s) {missing} not found in {path.name}; available: {names}")
+        return wanted, {name: _sheet_frame(workbook[name], header) for name in wanted}
+    finally:
+        workbook.close()
+
+
+def read_sheets(
+    path: Path, sheets: Optional[Sequence[SheetName]] = None, header: Optional[int] = 0
+) -> Dict[str, pd.DataFrame]:
+    """Stream the requested sheets (all when ``sheets`` is None) from a workbook, without caching."""
+    return _read_workbook(path, sheets, header)[1]
+
+
+def read_excel(
+    path,
+    sheet_name: Optional[Union[SheetName, List[SheetName]]] = 0,
+    header: Optional[int] = 0,
+    cache: Optional[LoadCache] = None,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[Filters] = None,
+    optimize: bool = False,
+) -> Union[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """
+    Read Excel sheets via a streaming parse, caching each sheet as Parquet.
+
+    Args:
+        path: ``.xlsx``/``.xlsm`` workbook to read
+        sheet_name: Sheet index or name, a list of them, or None for all sheets
+            (same meaning as in ``pd.read_excel``)
+        header: Row number holding the column names, or None for no header
+        cache: Cache to use (defaults to ``CACHE_DIR`` from config)
+        columns: Columns to read from the cached sheet(s)
+        filters: Row filters in pyarrow's DNF form (see ``src.loading.load``)
+        optimize: Convert columns to memory-optimised dtypes (see ``src.loading.load``)
+
+    Returns:
+        A DataFrame for a single sheet, or a dict of sheet name → DataFrame;
+        columns mixing numbers and text come back as strings (see ``frame_to_arrow``)
+    """
+    source = Path(path)
+    if source.suffix.lower() not in EXCEL_SUFFIXES:
+        raise ValueError(f"Unsupported file type for read_excel(): {source.suffix or source.name}")
+
+    cache = cache or LoadCache()
+    fingerprint = cache.fingerprint(source)
+    meta = {"source": str(source.resolve()), "fingerprint": fingerprint}
+
+    def read_cached(sheet: SheetName) -> Optional[pd.DataFrame]:
+        key = cache.key(fingerprint, {"excel_sheet": sheet, "header": header})
+        cached = cache.get(key)
+        if cached is None:
+            return None
+        df = pd.read_parquet(cached, columns=columns, filters=filters)
+        return optimize_frame(df, cache, key, persist=filters is None) if optimize else df
+
+    def store(sheet: SheetName, df: pd.DataFrame) -> None:
+        options = {"excel_sheet": sheet, "header": header}
+        table = frame_to_arrow(df)
+        cache.put(cache.key(fingerprint, options), table, dict(meta, read_options=options))
+
+    if sheet_name is None:
+        # The sheet list itself is cached so an all-sheets hit never opens the workbook.
+        names_key = cache.key(fingerprint, {"excel_sheet_names": True})
+        names_path = cache.get(names_key)
+        if names_path is not None:
+            names = pd.read_parquet(names_path)["sheet"].tolist()
+            frames = {name: read_cached(name) for name in names}
+            if all(df is not None for df in frames.values()):
+                return frames
+        sheets = read_sheets(source, None, header)
+        for name, df in sheets.items():
+            store(name, df)
+        cache.put(names_key, pa.table({"sheet": list(sheets)}), dict(meta, read_options={"excel_sheet_names": True}))
+        return {name: read_cached(name) for name in sheets}
+
+    requested = sheet_name if isinstance(sheet_name, list) else [sheet_name]
+    frames = {sheet: read_cached(sheet) for sheet in requested}
+    misses = [sheet for sheet, df in frames.items() if df is None]
+    if misses:
+        # An index and a name (or two indexes) may refer to the same sheet, which is read once.
+        resolved, sheets = _read_workbook(source, misses, header)
+        for sheet, name in zip(misses, resolved):
+            store(sheet, sheets[name])
+            frames[sheet] = read_cached(sheet)
+    if not isinstance(sheet_name, list):
+        return frames[sheet_name]
+    return frames
+
+
+def write_excel(data: Union[pd.DataFrame, Dict[str, pd.DataFrame]], path, index: bool = False) -> Path:
+    """
+    Write one or more DataFrames to ``.xlsx`` in constant memory.
+
+    Rows are streamed into a write-only openpyxl workbook (no styles or
+    column widths) and the file is moved into place once complete.
+
+    Args:
+        data: A DataFrame (written to ``Sheet1``) or a dict of sheet name → DataFrame
+        path: Target ``.xlsx`` file
+        index: Whether to write the DataFrame index as the first column(s)
+
+    Returns:
+        Path of the written workbook
+    """
+    from openpyxl import Workbook
+
+    frames = data if isinstance(data, dict) else {"Sheet1": data}
+    workbook = Workbook(write_only=True)
+    for name, df in frames.items():
+        worksheet = workbook.create_sheet(title=str(name))
+        if index:
+            df = df.reset_index()
+        worksheet.append([str(column) for column in df.columns])
+        for start in range(0, len(df), WRITE_CHUNK_ROWS):
+            chunk = df.iloc[start : start + WRITE_CHUNK_ROWS].astype(object)
+            chunk = chunk.where(chunk.notna(), None)
+            for row in chunk.itertuples(index=False, name=None):
+                worksheet.append(row)
+    path = Path(path)
+    with atomic_path(path) as tmp_path:
+        workbook.save(tmp_path)
+    return path
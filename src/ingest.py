@@ -0,0 +1,367 @@
+"""
+Parallel bulk ingestion of CSV/Excel drops into a partitioned Parquet dataset.
+
+A glob of input files under ``DATA_DIR`` is converted across a process pool
+into one hive-partitioned Parquet dataset (``region=north/part-….parquet``).
+Column sets and types are unified across all files, so the dataset reads
+back as a single table. A ``_manifest.json`` in the dataset records each
+source's fingerprint and the part files it produced; re-runs only convert
+new or changed files and drop the parts of files that disappeared.
+
+Usage:
+    python -m src.ingest "daily/*.csv" --dataset daily --partition-by region --jobs 16
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.excel import frame_to_arrow, read_sheets
+from src.loading import CSV_SUFFIXES
+from src.writers import atomic_path, file_digest, write_json
+
+EXCEL_SUFFIXES = {".xlsx", ".xlsm", ".xls"}
+MANIFEST_FILE = "_manifest.json"
+MANIFEST_VERSION = 1
+STAGING_DIR = "_staging"
+
+
+class IngestReport:
+    """Summary of an ingest run."""
+
+    def __init__(self, dataset_dir: Path):
+        self.dataset_dir = dataset_dir
+        self.converted: List[str] = []
+        self.unchanged: List[str] = []
+        self.removed: List[str] = []
+        self.rows = 0
+        self.seconds = 0.0
+        self.schema: Optional[pa.Schema] = None
+
+    def summary(self) -> str:
+        return (
+            f"{self.dataset_dir.name}: converted {len(self.converted)} file(s) ({self.rows:,} rows), "
+            f"{len(self.unchanged)} unchanged, {len(self.removed)} removed in {self.seconds:.1f}s"
+        )
+
+
+# ---------------------------------------------------------------------------
+# Workers (module-level so they can be pickled for the process pool)
+# ---------------------------------------------------------------------------
+def read_source(source: Path) -> pa.Table:
+    """Read one CSV or Excel file into an Arrow table."""
+    suffix = source.suffix.lower()
+    if suffix in CSV_SUFFIXES:
+        return pv.read_csv(source)
+    if suffix == ".xls":
+        # Legacy binary workbooks need pandas' xlrd engine.
+        import pandas as pd
+
+        return frame_to_arrow(pd.read_excel(source))
+    if suffix in EXCEL_SUFFIXES:
+        (df,) = read_sheets(source, [0]).values()
+        return frame_to_arrow(df)
+    raise ValueError(f"Unsupported file type for ingest: {source.suffix or source.name}")
+
+
+def _stage_worker(source: Path, staged: Path) -> pa.Schema:
+    table = read_source(source)
+    pq.write_table(table, staged)
+    return table.schema
+
+
+def conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    """Reorder, cast and null-fill ``table`` so it matches ``schema`` exactly."""
+    columns = []
+    for field in schema:
+        if field.name in table.column_names:
+            columns.append(table.column(field.name).cast(field.type))
+        else:
+            columns.append(pa.nulls(table.num_rows, field.type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def _write_worker(
+    staged: Path,
+    dataset_dir: Path,
+    schema: pa.Schema,
+    partition_by: Sequence[str],
+    part_id: str,
+) -> List[str]:
+    table = conform(pq.read_table(staged), schema)
+    written: List[str] = []
+    ds.write_dataset(
+        table,
+        dataset_dir,
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([schema.field(name) for name in partition_by]), flavor="hive")
+        if partition_by
+        else None,
+        basename_template=f"part-{part_id}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        file_visitor=lambda written_file: written.append(written_file.path),
+    )
+    staged.unlink()
+    return sorted(Path(path).relative_to(dataset_dir).as_posix() for path in written)
+
+
+def _recast_worker(part: Path, schema: pa.Schema) -> None:
+    table = conform(pq.read_table(part, partitioning=None), schema)
+    with atomic_path(part) as tmp_path:
+        pq.write_table(table, tmp_path)
+
+
+def _run_parallel(func: Callable, arg_lists: Sequence[tuple], jobs: int) -> list:
+    """Run ``func(*args)`` for each args tuple, in a spawned process pool when ``jobs > 1``."""
+    workers = min(jobs, len(arg_lists))
+    if workers <= 1:
+        return [func(*args) for args in arg_lists]
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(func, *zip(*arg_lists)))
+
+
+# ---------------------------------------------------------------------------
+# Schema unification and manifest
+# ---------------------------------------------------------------------------
+def unify_schemas(schemas: Sequence[pa.Schema]) -> pa.Schema:
+    """
+    Merge schemas field by field, keeping first-seen column order.
+
+    Compatible types are promoted (null → anything, int → wider int or
+    float); columns whose types cannot be reconciled become strings.
+    """
+    types: Dict[str, pa.DataType] = {}
+    for schema in schemas:
+        for field in schema:
+            if field.name not in types:
+                types[field.name] = field.type
+                continue
+            try:
+                merged = pa.unify_schemas(
+                    [pa.schema([(field.name, types[field.name])]), pa.schema([field])],
+                    promote_options="permissive",
+                )
+                types[field.name] = merged.field(field.name).type
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                types[field.name] = pa.string()
+    return pa.schema(list(types.items()))
+
+
+def _schema_to_json(schema: pa.Schema) -> str:
+    # Arrow IPC bytes round-trip every type, unlike str(type) (e.g. timestamp[s, tz=UTC], decimal128(10, 2)).
+    return base64.b64encode(schema.serialize().to_pybytes()).decode("ascii")
+
+
+def _schema_from_json(stored: str) -> pa.Schema:
+    return pa.ipc.read_schema(pa.py_buffer(base64.b64decode(stored)))
+
+
+def load_manifest(dataset_dir: Path) -> Dict:
+    """Return the dataset manifest, or an empty one if missing or outdated."""
+    try:
+        manifest = json.loads((dataset_dir / MANIFEST_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = None
+    if not manifest or manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "partition_by": [], "schema": None, "files": {}}
+    return manifest
+
+
+def _fingerprint(source: Path, previous: Optional[Dict]) -> Dict:
+    stat = source.stat()
+    if previous and previous["size"] == stat.st_size and previous["mtime_ns"] == stat.st_mtime_ns:
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": previous["sha256"]}
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_digest(source)}
+
+
+def _part_id(rel: str) -> str:
+    """Stable short id for a source path, used to name its part files."""
+    return hashlib.sha256(rel.encode("utf-8")).hexdigest()[:16]
+
+
+def _drop_parts(dataset_dir: Path, parts: Sequence[str]) -> None:
+    for part in parts:
+        path = dataset_dir / part
+        path.unlink(missing_ok=True)
+        # Remove partition directories that are now empty.
+        for parent in path.parents:
+            if parent == dataset_dir or any(parent.iterdir()):
+                break
+            parent.rmdir()
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+def ingest(
+    pattern: str,
+    dataset_dir,
+    source_dir=None,
+    partition_by: Sequence[str] = (),
+    jobs: Optional[int] = None,
+) -> IngestReport:
+    """
+    Convert every file matching ``pattern`` into a partitioned Parquet dataset.
+
+    Args:
+        pattern: Glob relative to ``source_dir`` (e.g. ``"daily/*.csv"``)
+        dataset_dir: Directory of the Parquet dataset to create or update
+        source_dir: Directory the glob is evaluated in (defaults to ``DATA_DIR``)
+        partition_by: Columns to hive-partition the dataset by
+        jobs: Worker processes (defaults to the CPU count)
+
+    Returns:
+        IngestReport listing converted, unchanged and removed sources
+    """
+    if source_dir is None:
+        from config import DATA_DIR
+
+        source_dir = DATA_DIR
+    source_dir, dataset_dir = Path(source_dir), Path(dataset_dir)
+    jobs = jobs or os.cpu_count() or 1
+    partition_by = list(partition_by)
+    started = time.perf_counter()
+
+    report = IngestReport(dataset_dir)
+    manifest = load_manifest(dataset_dir)
+    if manifest["files"] and manifest["partition_by"] != partition_by:
+        raise ValueError(
+            f"{dataset_dir} is partitioned by {manifest['partition_by']}; "
+            f"delete it to re-partition by {partition_by}."
+        )
+
+    sources = sorted(
+        path
+        for path in source_dir.glob(pattern)
+        if path.is_file() and path.suffix.lower() in CSV_SUFFIXES | EXCEL_SUFFIXES
+    )
+    files = manifest["files"]
+    current: Dict[str, Dict] = {}
+    changed: List[Path] = []
+    for source in sources:
+        rel = source.relative_to(source_dir).as_posix()
+        previous = files.get(rel)
+        fingerprint = _fingerprint(source, previous)
+        current[rel] = fingerprint
+        if previous and previous["sha256"] == fingerprint["sha256"]:
+            files[rel].update(fingerprint)
+            report.unchanged.append(rel)
+        else:
+            changed.append(source)
+
+    for rel in sorted(set(files) - set(current)):
+        _drop_parts(dataset_dir, files.pop(rel)["parts"])
+        report.removed.append(rel)
+
+    old_schema = _schema_from_json(manifest["schema"]) if manifest["schema"] else None
+    schema = old_schema
+    if changed:
+        staging = dataset_dir / STAGING_DIR
+        staging.mkdir(parents=True, exist_ok=True)
+        staged = [staging / f"{uuid.uuid4().hex}.parquet" for _ in changed]
+        try:
+            # Phase 1: parse every changed file in parallel to learn its schema.
+            schemas = _run_parallel(_stage_worker, list(zip(changed, staged)), jobs)
+            schema = unify_schemas(([old_schema] if old_schema else []) + schemas)
+            missing = [name for name in partition_by if name not in schema.names]
+            if missing:
+                raise ValueError(f"Partition column(s) not found in the data: {missing}")
+
+            # Phase 2: write every file's rows into the dataset with the unified schema.
+            for source in changed:
+                rel = source.relative_to(source_dir).as_posix()
+                if rel in files:
+                    _drop_parts(dataset_dir, files[rel]["parts"])
+            part_ids = [_part_id(source.relative_to(source_dir).as_posix()) for source in changed]
+            written = _run_parallel(
+                _write_worker,
+                [(path, dataset_dir, schema, partition_by, part_id) for path, part_id in zip(staged, part_ids)],
+                jobs,
+            )
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        for source, parts in zip(changed, written):
+            rel = source.relative_to(source_dir).as_posix()
+            files[rel] = dict(current[rel], parts=parts)
+            report.converted.append(rel)
+        report.rows = sum(
+            pq.ParquetFile(dataset_dir / part).metadata.num_rows for parts in written for part in parts
+        )
+
+    if old_schema is not None and schema != old_schema:
+        # New columns or wider types: bring existing parts in line so the
+        # dataset keeps a single schema.
+        file_schema = pa.schema([field for field in schema if field.name not in partition_by])
+        untouched = [dataset_dir / part for rel in report.unchanged for part in files[rel]["parts"]]
+        _run_parallel(_recast_worker, [(part, file_schema) for part in untouched], jobs)
+
+    manifest.update(partition_by=partition_by, schema=_schema_to_json(schema) if schema else None, files=files)
+    dataset_dir.mkdir(parents=True, exist_ok=True)
+    write_json(manifest, dataset_dir / MANIFEST_FILE)
+    if schema is not None:
+        file_schema = pa.schema([field for field in schema if field.name not in partition_by])
+        pq.write_metadata(file_schema, dataset_dir / "_common_metadata")
+
+    report.schema = schema
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Convert a glob of CSV/Excel drops into a partitioned Parquet dataset.")
+    parser.add_argument("pattern", help="Glob relative to --source-dir, e.g. 'daily/*.csv'.")
+    parser.add_argument(
+        "--dataset",
+        type=Path,
+        required=True,
+        help="Dataset directory; relative paths are created under OUTPUT_DIR.",
+    )
+    parser.add_argument("--source-dir", type=Path, default=None, help="Directory to glob in (default: DATA_DIR).")
+    parser.add_argument(
+        "--partition-by",
+        action="append",
+        default=[],
+        metavar="COLUMN",
+        help="Hive-partition the dataset by this column (repeatable).",
+    )
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes.")
+    args = parser.parse_args(argv)
+
+    dataset_dir = args.dataset
+    if not dataset_dir.is_absolute():
+        from config import OUTPUT_DIR
+
+        dataset_dir = OUTPUT_DIR / dataset_dir
+
+    report = ingest(
+        args.pattern,
+        dataset_dir,
+        source_dir=args.source_dir,
+        partition_by=args.partition_by,
+        jobs=args.jobs,
+    )
+    print(f"✅ {report.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Intermediates shared between notebooks: memory-mapped Arrow IPC or Parquet.
+
+Parquet is compact, but every reader decompresses it into its own copy. An
+uncompressed Arrow IPC (Feather v2) file can instead be memory-mapped: all
+kernels and worker processes reading it share the same pages through the OS
+page cache, and the DataFrame they get is backed by those pages without a
+copy. ``write_intermediate`` picks the format from the data size and the
+number of expected readers; ``read_intermediate`` reads whichever was written.
+
+Example:
+    from config import OUTPUT_DIR
+    from src.intermediates import read_intermediate, write_intermediate
+
+    write_intermediate(df, OUTPUT_DIR / "clean.parquet", readers=4)
+    df = read_intermediate(OUTPUT_DIR / "clean.parquet")
+"""
+
+import os
+import uuid
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.writers import ArtifactLock
+
+IPC_SUFFIXES = (".arrow", ".feather")
+PARQUET_SUFFIX = ".parquet"
+# Below this size decompressing Parquet is cheap enough that sharing pages
+# does not pay for the larger uncompressed file.
+MMAP_MIN_BYTES = 64 * 1024**2
+
+
+def choose_format(nbytes: int, readers: int = 1) -> str:
+    """
+    Return ``"ipc"`` or ``"parquet"`` for an intermediate.
+
+    Args:
+        nbytes: In-memory size of the data (``pa.Table.nbytes``)
+        readers: Number of notebooks or processes expected to read it concurrently
+
+    Returns:
+        ``"ipc"`` when several readers share a large file, otherwise ``"parquet"``
+    """
+    return "ipc" if readers > 1 and nbytes >= MMAP_MIN_BYTES else "parquet"
+
+
+def _candidates(path: Path):
+    stem = path.with_suffix("")
+    return [stem.with_suffix(suffix) for suffix in IPC_SUFFIXES + (PARQUET_SUFFIX,)]
+
+
+def write_intermediate(
+    data: Union[pd.DataFrame, pa.Table],
+    path,
+    readers: int = 1,
+    format: str = "auto",
+) -> Path:
+    """
+    Write an intermediate as mmap-able Arrow IPC or as Parquet.
+
+    The suffix of ``path`` is replaced by the chosen format's (``.arrow`` or
+    ``.parquet``) and any copy in the other format is removed, so
+    ``read_intermediate`` with the same ``path`` always finds the latest one.
+
+    Args:
+        data: DataFrame or Arrow table to write
+        path: Target path; only its directory and stem are significant
+        readers: Expected number of concurrent readers (see ``choose_format``)
+        format: ``"auto"``, ``"ipc"`` or ``"parquet"``
+
+    Returns:
+        Path of the written file
+    """
+    if format not in ("auto", "ipc", "parquet"):
+        raise ValueError("format must be 'auto', 'ipc' or 'parquet'")
+    table = data if isinstance(data, pa.Table) else pa.Table.from_pandas(data, preserve_index=False)
+    if format == "auto":
+        format = choose_format(table.nbytes, readers)
+
+    path = Path(path)
+    target = path.with_suffix(IPC_SUFFIXES[0] if format == "ipc" else PARQUET_SUFFIX)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(f"{target.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        if format == "ipc":
+            # Uncompressed so the mapped pages can be used in place.
+            with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        else:
+            pq.write_table(table, tmp_path)
+        # Locked on the stem, so a concurrent writer that chose the other
+        # format cannot have its fresh file removed as the stale copy.
+        with ArtifactLock(path.with_suffix("")):
+            # Readers that already mapped the old file keep their pages; new readers see the new file.
+            os.replace(tmp_path, target)
+            for other in _candidates(path):
+                if other != target:
+                    other.unlink(missing_ok=True)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return target
+
+
+def _resolve(path: Path) -> Path:
+    """Return the file written for ``path``, whichever format was chosen."""
+    if path.exists():
+        return path
+    for candidate in _candidates(path):
+        if candidate.exists():
+            return candidate
+    raise FileNotFoundError(f"No intermediate found for {path}")
+
+
+def _read_table(path: Path, columns: Optional[Sequence[str]], filters=None) -> pa.Table:
+    if path.suffix.lower() not in IPC_SUFFIXES:
+        return pq.read_table(path, columns=columns, filters=filters)
+
+    table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+    if filters is not None:
+        table = table.filter(pq.filters_to_expression(filters))
+    return table.select(list(columns)) if columns is not None else table
+
+
+def read_arrow(path, columns: Optional[Sequence[str]] = None, filters=None) -> pa.Table:
+    """Read an intermediate as an Arrow table, memory-mapping IPC files."""
+    return _read_table(_resolve(Path(path)), columns, filters)
+
+
+def read_intermediate(path, columns: Optional[Sequence[str]] = None, filters=None) -> pd.DataFrame:
+    """
+    Read an intermediate written by ``write_intermediate``.
+
+    IPC files are memory-mapped and converted with Arrow-backed dtypes, so
+    the DataFrame shares the mapped pages instead of copying them.
+
+    Args:
+        path: Path passed to ``write_intermediate`` (any suffix) or an existing file
+        columns: Optional subset of columns to read
+        filters: Optional row filters in pyarrow's DNF form (see ``src.loading.load``)
+
+    Returns:
+        DataFrame with the intermediate's contents
+    """
+    resolved = _resolve(Path(path))
+    table = _read_table(resolved, columns, filters)
+    if resolved.suffix.lower() in IPC_SUFFIXES:
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    return table.to_pandas()
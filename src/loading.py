@@ -0,0 +1,255 @@
+"""
+Data loading with a fingerprinted CSV → Parquet read-through cache.
+
+The first ``load("data/big.csv")`` parses the CSV with pyarrow and stores the
+result as Parquet under ``CACHE_DIR``; later calls with the same file and the
+same read options return the cached Parquet instead of re-parsing.
+
+Example:
+    from config import DATA_DIR
+    from src.loading import load
+
+    df = load(DATA_DIR / "customers.csv")
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import config
+from src.dtypes import apply_dtypes, dtype_plan, memory_report
+from src.intermediates import IPC_SUFFIXES, read_intermediate
+from src.writers import atomic_path, file_digest, write_json
+
+# Bump when the cache layout or conversion changes so old entries are ignored.
+CACHE_FORMAT_VERSION = 2
+CSV_SUFFIXES = {".csv", ".tsv", ".txt"}
+FINGERPRINTS_FILE = "fingerprints.json"
+# Rows per Parquet row group in the cache. Smaller groups give ``filters``
+# finer min/max statistics to skip on, at a small cost in file size.
+ROW_GROUP_SIZE = 128 * 1024
+
+# pyarrow DNF filters: [(col, op, value), ...] or [[(col, op, value), ...], ...]
+Filters = Union[List[Tuple[str, str, Any]], List[List[Tuple[str, str, Any]]]]
+
+
+class LoadCache:
+    """
+    Parquet cache directory with content fingerprints and LRU eviction.
+
+    Each entry is ``<key>.parquet`` plus ``<key>.json`` metadata holding the
+    source fingerprint and read options; the schema lives in the Parquet
+    file itself. The metadata file's mtime records the last use for LRU
+    eviction.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else config.CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else config.CACHE_MAX_BYTES
+
+    # ------------------------------------------------------------------
+    # Fingerprints
+    # ------------------------------------------------------------------
+    def fingerprint(self, source: Path) -> Dict[str, Any]:
+        """
+        Return size, mtime and content hash for a source file.
+
+        The content hash is only recomputed when size or mtime changed since
+        the last call, so unchanged multi-GB sources cost one ``stat``.
+        """
+        source = source.resolve()
+        stat = source.stat()
+        fingerprints_path = self.cache_dir / FINGERPRINTS_FILE
+        try:
+            known = json.loads(fingerprints_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            known = {}
+
+        entry = known.get(str(source))
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry
+
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_digest(source)}
+        known[str(source)] = entry
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        write_json(known, fingerprints_path)
+        return entry
+
+    def key(self, fingerprint: Dict[str, Any], read_options: Dict[str, Any]) -> str:
+        """Return the cache key for a source fingerprint and read options."""
+        payload = json.dumps(
+            {
+                "version": CACHE_FORMAT_VERSION,
+                "sha256": fingerprint["sha256"],
+                "size": fingerprint["size"],
+                "read_options": read_options,
+            },
+            sort_keys=True,
+            default=repr,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Entries
+    # ------------------------------------------------------------------
+    def paths(self, key: str):
+        return self.cache_dir / f"{key}.parquet", self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Return the cached Parquet path for ``key`` and mark it as recently used."""
+        data_path, meta_path = self.paths(key)
+        if not (data_path.exists() and meta_path.exists()):
+            return None
+        os.utime(meta_path)
+        return data_path
+
+    def put(self, key: str, table: pa.Table, meta: Dict[str, Any]) -> Path:
+        """Store an Arrow table under ``key`` and evict old entries if over budget."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        data_path, meta_path = self.paths(key)
+        with atomic_path(data_path) as tmp_path:
+            pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE)
+
+        write_json(dict(meta, created=time.time(), bytes=data_path.stat().st_size), meta_path)
+        self.evict(keep={key})
+        return data_path
+
+    def metadata(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored metadata for ``key``."""
+        _, meta_path = self.paths(key)
+        try:
+            return json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def update_metadata(self, key: str, **fields: Any) -> None:
+        """Merge ``fields`` into the stored metadata for ``key``."""
+        meta = self.metadata(key)
+        if meta is not None:
+            write_json(dict(meta, **fields), self.paths(key)[1])
+
+    def evict(self, keep=()) -> None:
+        """Delete least-recently-used entries until the cache fits in ``max_bytes``."""
+        entries = []
+        total = 0
+        for meta_path in self.cache_dir.glob("*.json"):
+            if meta_path.name == FINGERPRINTS_FILE:
+                continue
+            data_path = meta_path.with_suffix(".parquet")
+            try:
+                size = data_path.stat().st_size
+                last_used = meta_path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            total += size
+            entries.append((last_used, meta_path.stem, size))
+
+        for _, key, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key in keep:
+                continue
+            for path in self.paths(key):
+                path.unlink(missing_ok=True)
+            total -= size
+
+
+def optimize_frame(
+    df: pd.DataFrame,
+    cache: Optional[LoadCache] = None,
+    key: Optional[str] = None,
+    persist: bool = True,
+) -> pd.DataFrame:
+    """
+    Apply memory-optimised dtypes, reusing the plan stored for a cache entry.
+
+    Columns without a stored plan are analysed with ``src.dtypes.dtype_plan``.
+    The plan is only persisted when ``persist`` is true, i.e. when ``df`` holds
+    every row of the entry (a filtered subset could under-size integers).
+    The per-column before/after report is attached as
+    ``df.attrs["memory_report"]``.
+    """
+    stored = (cache.metadata(key) or {}).get("dtypes", {}) if cache is not None and key else {}
+    missing = [str(name) for name in df.columns if str(name) not in stored]
+    plan = dict(stored)
+    if missing:
+        plan.update(dtype_plan(df[missing]))
+        if persist and cache is not None and key:
+            cache.update_metadata(key, dtypes=plan)
+
+    optimized = apply_dtypes(df, plan)
+    report = memory_report(df, optimized)
+    optimized.attrs["memory_report"] = report
+    return optimized
+
+
+def load(
+    path,
+    cache: Optional[LoadCache] = None,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[Filters] = None,
+    optimize: bool = False,
+    **read_options,
+) -> pd.DataFrame:
+    """
+    Load a data file, converting CSVs to Parquet once and reusing the result.
+
+    ``columns`` and ``filters`` are pushed down into the Parquet reader: only
+    the requested columns are decoded, and row groups whose min/max
+    statistics cannot match ``filters`` are skipped without being read.
+
+    With ``optimize=True`` numerics are downcast, low-cardinality text
+    becomes ``category`` and other text uses pyarrow strings. For cached
+    sources the chosen dtypes are stored with the cache entry, so later loads
+    skip the analysis. A per-column before/after memory report is available
+    as ``df.attrs["memory_report"]``.
+
+    Args:
+        path: CSV, Parquet, Arrow IPC or Excel file to load
+        cache: Cache to use (defaults to ``CACHE_DIR`` from config)
+        columns: Columns to read (default: all)
+        filters: Row filters in pyarrow's DNF form, e.g.
+            ``[("month", "==", "2025-07"), ("amount", ">", 0)]``
+        optimize: Convert columns to memory-optimised dtypes
+        **read_options: Extra keyword arguments for ``pd.read_csv`` (or
+            ``sheet_name``/``header`` for ``src.excel.read_excel``); they are
+            part of the cache key, so different options get separate entries
+
+    Returns:
+        DataFrame with the file contents
+    """
+    source = Path(path)
+    if source.suffix.lower() in (".xlsx", ".xlsm"):
+        from src.excel import read_excel
+
+        return read_excel(source, cache=cache, columns=columns, filters=filters, optimize=optimize, **read_options)
+    if source.suffix.lower() == ".parquet" or source.suffix.lower() in IPC_SUFFIXES:
+        reader = pd.read_parquet if source.suffix.lower() == ".parquet" else read_intermediate
+        df = reader(source, columns=columns, filters=filters, **read_options)
+        return optimize_frame(df) if optimize else df
+    if source.suffix.lower() not in CSV_SUFFIXES:
+        raise ValueError(f"Unsupported file type for load(): {source.suffix or source.name}")
+
+    cache = cache or LoadCache()
+    fingerprint = cache.fingerprint(source)
+    # The whole CSV is cached once; projections and filters are applied on read.
+    key = cache.key(fingerprint, read_options)
+
+    cached = cache.get(key)
+    df = None
+    if cached is None:
+        df = pd.read_csv(source, engine="pyarrow", **read_options)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        cached = cache.put(
+            key, table, {"source": str(source.resolve()), "fingerprint": fingerprint, "read_options": read_options}
+        )
+    if df is None or columns is not None or filters is not None:
+        df = pd.read_parquet(cached, columns=columns, filters=filters)
+    return optimize_frame(df, cache, key, persist=filters is None) if optimize else df
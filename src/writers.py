@@ -0,0 +1,433 @@
+"""
+Concurrent-safe writers for artifacts in a shared ``OUTPUT_DIR``.
+
+Parallel notebooks and workers often write into the same ``OUTPUT_DIR``,
+which may be a network mount. Every writer here writes to a temporary file
+next to the target and moves it into place with an atomic rename, so readers
+only ever see a complete old or new file. Writers of the same artifact take
+a short-lived ``<name>.lock`` file, created with ``O_EXCL`` so it also works
+over NFS/SMB where ``flock`` is unreliable, only around the rename itself.
+
+Optimistic concurrency: ``read_version`` returns a token for the current
+file. Passing it as ``expected=`` makes the write fail with ``ConflictError``
+if someone else replaced the file since it was read, so jobs compute without
+holding any lock and retry only on a real conflict.
+
+Partitioned datasets take parallel appends: any number of processes call
+``stage_parts`` to write part files under ``_staging/`` (ignored by pyarrow
+and pandas), then ``commit_parts`` moves them into place and records them in
+``_commits.json`` in one locked step. ``read_parts`` reads committed parts only.
+
+Example:
+    from config import OUTPUT_DIR
+    from src.writers import append_parts, read_version, write_parquet
+
+    write_parquet(df, OUTPUT_DIR / "clean.parquet")
+
+    version = read_version(OUTPUT_DIR / "totals.parquet")
+    totals = update_totals(pd.read_parquet(OUTPUT_DIR / "totals.parquet"))
+    write_parquet(totals, OUTPUT_DIR / "totals.parquet", expected=version)  # ConflictError if it changed
+
+    append_parts(scores, OUTPUT_DIR / "scores", partition_by=["region"])
+"""
+
+import hashlib
+import json
+import os
+import socket
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+COMMIT_MANIFEST = "_commits.json"
+COMMIT_MANIFEST_VERSION = 1
+STAGING_DIR = "_staging"
+LOCK_SUFFIX = ".lock"
+LOCK_TIMEOUT = 60.0
+# A lock file older than this is assumed to belong to a crashed writer. Locks
+# are only held around renames, so a live holder never gets close to it.
+STALE_LOCK_SECONDS = 600.0
+_POLL_SECONDS = (0.01, 0.5)
+
+# (inode, mtime_ns, size) of a file, or None when it does not exist. Every
+# atomic replace creates a new inode, so two writes within one mtime tick
+# still get different versions.
+Version = Optional[Tuple[int, int, int]]
+# ``expected=ANY`` skips the optimistic check.
+ANY: Any = object()
+
+
+class LockTimeout(TimeoutError):
+    """The lock of an artifact could not be acquired in time."""
+
+
+class ConflictError(RuntimeError):
+    """The artifact changed since the version the writer expected."""
+
+
+# ---------------------------------------------------------------------------
+# Atomic files and locks
+# ---------------------------------------------------------------------------
+def _tmp_path(target: Path) -> Path:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    return target.with_name(f"{target.name}.{uuid.uuid4().hex}.tmp")
+
+
+@contextmanager
+def atomic_path(target) -> Iterator[Path]:
+    """
+    Yield a temporary path next to ``target`` and move it into place on success.
+
+    The temporary file is removed if the block raises, so a failed write
+    leaves the previous ``target`` untouched.
+    """
+    target = Path(target)
+    tmp_path = _tmp_path(target)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, target)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def file_digest(path, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_version(path) -> Version:
+    """Return the version token of ``path`` for ``expected=``, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class ArtifactLock:
+    """
+    Exclusive lock on one artifact, held as a ``<name>.lock`` file next to it.
+
+    The lock file is created with ``O_CREAT | O_EXCL``, which is atomic on
+    local disks and network mounts alike. It records the holder's host and
+    pid; a lock older than ``stale_after`` seconds is broken. Releasing only
+    removes the lock file if it is still the one this lock created.
+    """
+
+    def __init__(self, path, timeout: float = LOCK_TIMEOUT, stale_after: float = STALE_LOCK_SECONDS):
+        path = Path(path)
+        self.lock_path = path.with_name(path.name + LOCK_SUFFIX)
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self._fd: Optional[int] = None
+
+    def acquire(self) -> None:
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        deadline = time.monotonic() + self.timeout
+        delay = _POLL_SECONDS[0]
+        holder = json.dumps({"host": socket.gethostname(), "pid": os.getpid(), "created": time.time()})
+        while True:
+            try:
+                self._fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+                os.write(self._fd, holder.encode("utf-8"))
+                return
+            except FileExistsError:
+                pass
+            self._break_if_stale()
+            if time.monotonic() >= deadline:
+                raise LockTimeout(f"Timed out after {self.timeout:.0f}s waiting for {self.lock_path}")
+            time.sleep(delay)
+            delay = min(delay * 2, _POLL_SECONDS[1])
+
+    def _break_if_stale(self) -> None:
+        try:
+            seen = self.lock_path.stat()
+        except FileNotFoundError:
+            return
+        if time.time() - seen.st_mtime <= self.stale_after:
+            return
+        # Rename first so that of several waiters only one removes it.
+        broken = self.lock_path.with_name(f"{self.lock_path.name}.{uuid.uuid4().hex}.stale")
+        try:
+            os.replace(self.lock_path, broken)
+        except FileNotFoundError:
+            return
+        moved = broken.stat()
+        if (moved.st_ino, moved.st_mtime_ns) != (seen.st_ino, seen.st_mtime_ns):
+            # Another waiter broke the stale lock between our stat and rename,
+            # and what we moved is a live holder's lock: put it back.
+            try:
+                os.link(broken, self.lock_path)
+            except FileExistsError:
+                pass  # yet another writer holds the lock now; the displaced holder's release skips it
+            except OSError:
+                os.replace(broken, self.lock_path)  # no hard links on this file system
+        broken.unlink(missing_ok=True)
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        try:
+            owned = os.path.samestat(os.fstat(self._fd), os.stat(self.lock_path))
+        except FileNotFoundError:
+            owned = False
+        os.close(self._fd)
+        self._fd = None
+        if owned:
+            self.lock_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "ArtifactLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+def _check_version(path: Path, expected: Version) -> None:
+    if expected is ANY:
+        return
+    current = read_version(path)
+    if current != expected:
+        state = "was created" if expected is None else "was removed" if current is None else "was replaced"
+        raise ConflictError(f"{path} {state} by another writer since it was read; re-read it and retry.")
+
+
+def write_atomic(
+    path, write: Callable[[Path], None], expected: Version = ANY, timeout: float = LOCK_TIMEOUT
+) -> Version:
+    """
+    Write ``path`` through ``write(tmp_path)`` and commit it with an atomic rename.
+
+    ``write`` runs before the lock is taken, so slow serialisation does not
+    block other writers; the lock only covers the version check and rename.
+
+    Args:
+        path: Target file
+        write: Callable writing the complete file to the path it is given
+        expected: Version from ``read_version`` the target must still have
+            (None: it must not exist yet); the default skips the check
+        timeout: Seconds to wait for the artifact's lock
+
+    Returns:
+        Version of the written file
+
+    Raises:
+        ConflictError: The target no longer has the ``expected`` version
+        LockTimeout: The lock could not be acquired within ``timeout``
+    """
+    path = Path(path)
+    tmp_path = _tmp_path(path)
+    try:
+        write(tmp_path)
+        with ArtifactLock(path, timeout=timeout):
+            _check_version(path, expected)
+            os.replace(tmp_path, path)
+            return read_version(path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def write_parquet(df: Union[pd.DataFrame, pa.Table], path, expected: Version = ANY, **kwargs) -> Version:
+    """Atomically write a DataFrame or Arrow table as Parquet (see ``write_atomic``)."""
+    if isinstance(df, pa.Table):
+        return write_atomic(path, lambda tmp_path: pq.write_table(df, tmp_path, **kwargs), expected)
+    return write_atomic(path, lambda tmp_path: df.to_parquet(tmp_path, **kwargs), expected)
+
+
+def write_csv(df: pd.DataFrame, path, expected: Version = ANY, **kwargs) -> Version:
+    """Atomically write a DataFrame as CSV (see ``write_atomic``)."""
+    return write_atomic(path, lambda tmp_path: df.to_csv(tmp_path, **kwargs), expected)
+
+
+def write_json(payload: Any, path, expected: Version = ANY) -> Version:
+    """Atomically write ``payload`` as JSON (see ``write_atomic``)."""
+    text = json.dumps(payload, sort_keys=True)
+    return write_atomic(path, lambda tmp_path: tmp_path.write_text(text, encoding="utf-8"), expected)
+
+
+# ---------------------------------------------------------------------------
+# Partitioned datasets
+# ---------------------------------------------------------------------------
+def load_commits(dataset_dir) -> Dict:
+    """Return the commit manifest of a dataset, or an empty one if missing or outdated."""
+    try:
+        manifest = json.loads((Path(dataset_dir) / COMMIT_MANIFEST).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = None
+    if not manifest or manifest.get("version") != COMMIT_MANIFEST_VERSION:
+        return {"version": COMMIT_MANIFEST_VERSION, "partition_by": None, "commits": []}
+    return manifest
+
+
+def committed_parts(dataset_dir) -> List[str]:
+    """Return the committed part files of a dataset, relative to it, in commit order."""
+    return [part for commit in load_commits(dataset_dir)["commits"] for part in commit["parts"]]
+
+
+def stage_parts(
+    data: Union[pd.DataFrame, pa.Table], dataset_dir, partition_by: Sequence[str] = (), txn: Optional[str] = None
+) -> List[str]:
+    """
+    Write part files for ``data`` into the dataset's staging area.
+
+    Safe to call from any number of processes at once: every call writes
+    uniquely named files and takes no lock. The parts stay invisible to
+    readers until ``commit_parts``.
+
+    Args:
+        data: Rows to append
+        dataset_dir: Dataset directory
+        partition_by: Columns to hive-partition the parts by
+        txn: Staging group to write into (default: a new one per call)
+
+    Returns:
+        Staged part paths relative to ``dataset_dir``, to pass to ``commit_parts``
+    """
+    dataset_dir = Path(dataset_dir)
+    table = data if isinstance(data, pa.Table) else pa.Table.from_pandas(data, preserve_index=False)
+    missing = [name for name in partition_by if name not in table.schema.names]
+    if missing:
+        raise ValueError(f"Partition column(s) not found in the data: {missing}")
+    staging = dataset_dir / STAGING_DIR / (txn or uuid.uuid4().hex)
+    written: List[str] = []
+    ds.write_dataset(
+        table,
+        staging,
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([table.schema.field(name) for name in partition_by]), flavor="hive")
+        if partition_by
+        else None,
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        file_visitor=lambda written_file: written.append(written_file.path),
+    )
+    return sorted(Path(path).relative_to(dataset_dir).as_posix() for path in written)
+
+
+def _committed_path(staged_part: str) -> str:
+    """Map ``_staging/<txn>/region=north/part-….parquet`` to ``region=north/part-….parquet``."""
+    return Path(staged_part).relative_to(STAGING_DIR).as_posix().split("/", 1)[1]
+
+
+def _remove_empty_dirs(top: Path) -> None:
+    for directory, _, _ in sorted(os.walk(top), key=lambda entry: -len(entry[0])):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass
+
+
+def commit_parts(
+    dataset_dir,
+    staged: Sequence[str],
+    partition_by: Sequence[str] = (),
+    expected: Version = ANY,
+    timeout: float = LOCK_TIMEOUT,
+) -> Version:
+    """
+    Publish staged parts in one commit of the dataset's manifest.
+
+    Under the manifest's lock the parts are renamed into place and appended
+    to ``_commits.json`` as a single commit. Concurrent committers only wait
+    for each other's renames, never for each other's writes. If a rename or
+    the manifest write fails, the parts already moved go back to staging, so
+    the dataset is left exactly as it was and the commit can be retried.
+
+    Args:
+        dataset_dir: Dataset directory
+        staged: Paths returned by ``stage_parts`` (from any number of calls)
+        partition_by: Partition columns; must match earlier commits
+        expected: Manifest version from ``read_version`` to commit on top of
+        timeout: Seconds to wait for the manifest's lock
+
+    Returns:
+        Version of the updated manifest
+    """
+    dataset_dir = Path(dataset_dir)
+    manifest_path = dataset_dir / COMMIT_MANIFEST
+    partition_by = list(partition_by)
+    with ArtifactLock(manifest_path, timeout=timeout):
+        _check_version(manifest_path, expected)
+        manifest = load_commits(dataset_dir)
+        if manifest["partition_by"] not in (None, partition_by):
+            raise ValueError(f"{dataset_dir} is partitioned by {manifest['partition_by']}, not {partition_by}.")
+
+        parts = []
+        moved: List[Tuple[Path, Path]] = []
+        try:
+            for staged_part in staged:
+                part = _committed_path(staged_part)
+                source, target = dataset_dir / staged_part, dataset_dir / part
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(source, target)
+                moved.append((source, target))
+                parts.append(part)
+
+            manifest["partition_by"] = partition_by
+            manifest["commits"].append({"id": uuid.uuid4().hex, "time": time.time(), "parts": parts})
+            with atomic_path(manifest_path) as tmp_path:
+                tmp_path.write_text(json.dumps(manifest, sort_keys=True), encoding="utf-8")
+        except BaseException:
+            for source, target in reversed(moved):
+                os.replace(target, source)
+            raise
+        version = read_version(manifest_path)
+    _remove_empty_dirs(dataset_dir / STAGING_DIR)
+    return version
+
+
+def append_parts(
+    data: Union[pd.DataFrame, pa.Table], dataset_dir, partition_by: Sequence[str] = (), expected: Version = ANY
+) -> List[str]:
+    """
+    Stage and commit ``data`` as new parts of a partitioned dataset.
+
+    Returns:
+        The committed part paths, relative to ``dataset_dir``
+    """
+    staged = stage_parts(data, dataset_dir, partition_by)
+    try:
+        commit_parts(dataset_dir, staged, partition_by, expected)
+    finally:
+        for staged_part in staged:
+            (Path(dataset_dir) / staged_part).unlink(missing_ok=True)
+        _remove_empty_dirs(Path(dataset_dir) / STAGING_DIR)
+    return [_committed_path(staged_part) for staged_part in staged]
+
+
+def read_parts(dataset_dir, columns: Optional[Sequence[str]] = None, filters=None) -> pd.DataFrame:
+    """
+    Read the committed parts of a dataset written with ``commit_parts``.
+
+    Args:
+        dataset_dir: Dataset directory
+        columns: Optional subset of columns to read
+        filters: Optional row filters in pyarrow's DNF form (see ``src.loading.load``)
+
+    Returns:
+        DataFrame of every committed row, with partition columns restored
+    """
+    dataset_dir = Path(dataset_dir)
+    parts = committed_parts(dataset_dir)
+    if not parts:
+        return pd.DataFrame(columns=list(columns or []))
+    dataset = ds.dataset(
+        [str(dataset_dir / part) for part in parts],
+        format="parquet",
+        partitioning="hive",
+        partition_base_dir=str(dataset_dir),
+    )
+    expression = pq.filters_to_expression(filters) if filters is not None else None
+    return dataset.to_table(columns=list(columns) if columns is not None else None, filter=expression).to_pandas()
@@ -1,3 +1,4 @@
+import os
 import sys
 import runpy
 from pathlib import Path
@@ -30,3 +31,18 @@ def test_bootstrap_adds_project_root_to_syspath(tmp_path, monkeypatch):
     runpy.run_path(str(script_path))
 
     assert root_str in sys.path
+
+
+def test_bootstrap_does_not_export_project_root(tmp_path, monkeypatch):
+    # Subprocesses inherit os.environ, so bootstrap must only touch sys.path
+    project_root = tmp_path / "myproject"
+    (project_root / "notebooks").mkdir(parents=True)
+    (project_root / "pyproject.toml").write_text("[tool.poetry]\nname = 'test'")
+    monkeypatch.chdir(project_root / "notebooks")
+    monkeypatch.delenv("PROJECT_ROOT", raising=False)
+    monkeypatch.setattr(sys, "path", list(sys.path))
+
+    runpy.run_path(str(Path(__file__).resolve().parents[1] / "bootstrap.py"))
+
+    assert sys.path[0] == str(project_root)
+    assert "PROJECT_ROOT" not in os.environ
@@ -0,0 +1,96 @@
+# test_compact_graph.py
+# Tests for the array-backed graph in utils/compact_graph.py
+
+import sys
+from pathlib import Path
+
+import nbformat
+import networkx as nx
+import pytest
+
+ROOT_LEVELS_UP = 1  # Adjust this if the structure changes
+sys.path.append(str(Path(__file__).resolve().parents[ROOT_LEVELS_UP] / "utils"))
+from compact_graph import CompactGraph
+from lineage_store import LineageStore
+from pipeline_graph import ScanCache, build_graph
+
+
+def write_notebook(path: Path, *sources: str) -> Path:
+    """Write a notebook with one code cell per source string."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    nb = nbformat.v4.new_notebook()
+    nb.cells = [nbformat.v4.new_code_cell(src) for src in sources]
+    nbformat.write(nb, path)
+    return path
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """raw.csv + events/ -> clean -> clean.parquet -> report / features -> outputs."""
+    monkeypatch.delenv("DATA_DIR", raising=False)
+    monkeypatch.delenv("OUTPUT_DIR", raising=False)
+    (tmp_path / "data" / "events" / "day=1").mkdir(parents=True)
+    (tmp_path / "data" / "events" / "day=1" / "part-0.parquet").write_bytes(b"x" * 10)
+    (tmp_path / "data" / "raw.csv").write_text("id,amount\n1,2\n")
+    nbs = tmp_path / "notebooks"
+    write_notebook(
+        nbs / "clean.ipynb",
+        "raw = pd.read_csv(DATA_DIR / 'raw.csv', usecols=['id'])\nevents = pd.read_parquet(DATA_DIR / 'events')",
+        "raw.to_parquet(OUTPUT_DIR / 'clean.parquet')",
+    )
+    write_notebook(
+        nbs / "report.ipynb", "pd.read_parquet(OUTPUT_DIR / 'clean.parquet').to_csv(OUTPUT_DIR / 'report.csv')"
+    )
+    write_notebook(
+        nbs / "features" / "build.ipynb",
+        "pd.read_parquet(OUTPUT_DIR / 'clean.parquet').to_parquet(OUTPUT_DIR / 'features.parquet')",
+    )
+    return tmp_path
+
+
+def assert_same_graph(left: nx.DiGraph, right: nx.DiGraph) -> None:
+    assert list(left.nodes(data=True)) == list(right.nodes(data=True))
+    assert sorted(left.edges(data=True)) == sorted(right.edges(data=True))
+
+
+def test_build_matches_build_graph_and_round_trips(project):
+    graph = build_graph(project)
+    compact = CompactGraph.build(project, cache=ScanCache(project / "cache.json"))
+
+    assert_same_graph(compact.to_networkx(), graph)
+    assert_same_graph(CompactGraph.from_networkx(graph).to_networkx(), graph)
+    assert (len(compact), compact.number_of_edges) == (graph.number_of_nodes(), graph.number_of_edges())
+    assert compact.node_type("data/events") == "dataset"
+    assert compact.edge_columns[(compact.ids["data/raw.csv"], compact.ids["notebooks/clean.ipynb"])] == ("id",)
+
+    cached = CompactGraph.build(project, cache=ScanCache.load(project / "cache.json"))
+    assert_same_graph(cached.to_networkx(), graph)
+
+
+def test_queries_agree_with_lineage_store(project, tmp_path):
+    graph = build_graph(project)
+    compact = CompactGraph.from_networkx(graph)
+
+    with LineageStore(tmp_path / "lineage.sqlite") as store:
+        store.sync(graph)
+        for node in graph.nodes:
+            for depth in (None, 1, 2):
+                assert compact.downstream(node, depth) == store.downstream(node, depth)
+                assert compact.upstream(node, depth, "notebook") == store.upstream(node, depth, "notebook")
+
+    assert compact.successors("output/clean.parquet") == ["notebooks/features/build.ipynb", "notebooks/report.ipynb"]
+    assert compact.predecessors("notebooks/clean.ipynb") == ["data/events", "data/raw.csv"]
+    with pytest.raises(KeyError, match="missing.csv"):
+        compact.downstream("missing.csv")
+
+
+def test_topological_generations(project):
+    compact = CompactGraph.build(project)
+
+    order = compact.topological_sort()
+    assert all(order.index(src) < order.index(dst) for src, dst in build_graph(project).edges)
+    assert compact.topological_generations()[2] == ["output/clean.parquet"]
+
+    cyclic = nx.DiGraph([("a.csv", "nb.ipynb"), ("nb.ipynb", "a.csv")])
+    with pytest.raises(ValueError, match="cycle"):
+        CompactGraph.from_networkx(cyclic).topological_sort()
@@ -87,6 +87,23 @@ def test_project_root_env_variable(tmp_path, monkeypatch, reload_config):
     assert config.PROJECT_ROOT == project_root.resolve()
 
 
+def test_cache_max_bytes_accepts_sizes_and_names_bad_values(tmp_path, monkeypatch, reload_config):
+    """Test that CACHE_MAX_BYTES takes byte counts or sizes and rejects anything else clearly."""
+    project_root = tmp_path / "myproject"
+    project_root.mkdir()
+    (project_root / "pyproject.toml").write_text("[tool.poetry]\nname = 'test'")
+    monkeypatch.chdir(project_root)
+
+    config = reload_config(project_root)
+    for raw, expected in [("", 20 * 1024**3), ("1048576", 1024**2), ("2GB", 2 * 1024**3), ("1.5 mb", 1572864)]:
+        monkeypatch.setenv("CACHE_MAX_BYTES", raw)
+        assert config.CACHE_MAX_BYTES == expected
+
+    monkeypatch.setenv("CACHE_MAX_BYTES", "lots")
+    with pytest.raises(ValueError, match="CACHE_MAX_BYTES .* 'lots'"):
+        config.CACHE_MAX_BYTES
+
+
 def test_default_paths_without_env(tmp_path, monkeypatch, reload_config):
     """Test that default paths work when no environment variables are set."""
     # Create a fake project structure
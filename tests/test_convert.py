@@ -0,0 +1,104 @@
+# test_convert.py
+# Tests for the streaming CSV -> Parquet converter in src/convert.py
+
+import re
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+ROOT_LEVELS_UP = 1  # Adjust this if the structure changes
+sys.path.append(str(Path(__file__).resolve().parents[ROOT_LEVELS_UP]))
+from src import convert
+from src.convert import SchemaDriftError, convert_csv_to_parquet, main, parse_size
+
+
+def write_csv(path: Path, rows) -> Path:
+    path.write_text("id,label,amount\n" + "".join(f"{row}\n" for row in rows))
+    return path
+
+
+def test_convert_writes_one_row_group_per_batch(tmp_path):
+    source = write_csv(tmp_path / "big.csv", (f"{i},item{i},{i * 2}" for i in range(5000)))
+    target = tmp_path / "big.parquet"
+
+    report = convert_csv_to_parquet(source, target, batch_size=16 * 1024)
+
+    assert report.rows == 5000
+    assert report.batches > 1
+    assert pq.ParquetFile(target).num_row_groups == report.batches
+    pd.testing.assert_frame_equal(pd.read_parquet(target), pd.read_csv(source, engine="pyarrow"))
+    assert "rows" in report.summary()
+
+
+def test_convert_widens_drifting_columns(tmp_path):
+    rows = [f"{i},x,{i}" for i in range(2000)] + ["2000,x,2.5", "abc,x,3"]
+    source = write_csv(tmp_path / "drift.csv", rows)
+    target = tmp_path / "drift.parquet"
+
+    report = convert_csv_to_parquet(source, target, batch_size=4096, infer_samples=0)
+
+    schema = pq.read_schema(target)
+    assert schema.field("amount").type == pa.float64()
+    assert schema.field("id").type == pa.string()
+    assert report.restarts == 1  # both columns drift in the last batch and are pinned together
+    assert report.rows == 2002
+
+
+def test_convert_widens_without_parsing_arrow_error_messages(tmp_path, monkeypatch):
+    monkeypatch.setattr(convert, "_DRIFT_ERROR", re.compile(r"(?!)"))
+    rows = [f"{i},x,{i}" for i in range(2000)] + ["2000,x,2.5"] + [f"{i},x,{i}" for i in range(2001, 4000)]
+    source = write_csv(tmp_path / "drift.csv", ["", *rows])  # a blank line the reader skips
+    target = tmp_path / "drift.parquet"
+
+    report = convert_csv_to_parquet(source, target, batch_size=4096, infer_samples=0)
+
+    assert report.widened == {"amount": pa.float64()}
+    assert report.restarts == 1
+    assert pd.read_parquet(target)["amount"].iloc[2000] == 2.5
+
+
+def test_convert_pins_late_drift_found_by_the_inference_pre_pass(tmp_path):
+    rows = [f"{i},x,{i}" for i in range(2000)] + ["2000,x,2.5", "abc,x,3"]
+    source = write_csv(tmp_path / "drift.csv", [",,"] * 400 + rows)  # an all-empty first batch as well
+    target = tmp_path / "drift.parquet"
+
+    report = convert_csv_to_parquet(source, target, batch_size=1024)
+
+    assert report.restarts == 0
+    assert report.widened == {"id": pa.string(), "amount": pa.float64(), "label": pa.string()}
+    result = pd.read_parquet(target)
+    assert len(result) == 2402 and result["amount"].iloc[-1] == 3.0
+    assert "process peak RSS" in report.summary()
+
+
+def test_convert_raises_schema_drift_for_unrecognised_conversion_errors(tmp_path):
+    source = write_csv(tmp_path / "ragged.csv", ["1,a,1", "2,b,2,extra"])
+
+    with pytest.raises(SchemaDriftError, match="ragged.csv"):
+        convert_csv_to_parquet(source, tmp_path / "ragged.parquet")
+
+
+def test_convert_reports_drift_when_asked_to(tmp_path):
+    rows = [f"{i},x,{i}" for i in range(2000)] + ["2000,x,2.5"]
+    source = write_csv(tmp_path / "drift.csv", rows)
+    target = tmp_path / "drift.parquet"
+
+    with pytest.raises(SchemaDriftError, match="amount"):
+        convert_csv_to_parquet(source, target, batch_size=4096, on_drift="error")
+    assert not target.exists()
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_cli_pins_column_types(tmp_path, capsys):
+    source = write_csv(tmp_path / "ids.csv", ["001,a,1", "002,b,2"])
+    target = tmp_path / "ids.parquet"
+
+    main([str(source), str(target), "--batch-size", "1MB", "--column-type", "id=string"])
+
+    assert pd.read_parquet(target)["id"].tolist() == ["001", "002"]
+    assert "MB/s" in capsys.readouterr().out
+    assert parse_size("64MB") == 64 * 1024**2
@@ -0,0 +1,48 @@
+# test_dtypes.py
+# Tests for the dtype optimisation helpers in src/dtypes.py
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT_LEVELS_UP = 1  # Adjust this if the structure changes
+sys.path.append(str(Path(__file__).resolve().parents[ROOT_LEVELS_UP]))
+from src.dtypes import STRING_DTYPE, apply_dtypes, dtype_plan, memory_report
+
+
+def test_dtype_plan_picks_smallest_lossless_types():
+    df = pd.DataFrame(
+        {
+            "id": np.arange(1000),
+            "delta": np.arange(1000) - 500,
+            "half": np.arange(1000) * 0.5,
+            "noisy": np.linspace(0, 1, 1000) / 3,
+            "region": ["north", "south"] * 500,
+            "key": [f"k{i}" for i in range(1000)],
+            "mixed": [1, "a"] * 500,
+        }
+    )
+
+    assert dtype_plan(df) == {
+        "id": "uint16",
+        "delta": "int16",
+        "half": "float32",
+        "noisy": "float64",
+        "region": "category",
+        "key": STRING_DTYPE,
+        "mixed": "object",
+    }
+
+
+def test_memory_report_shows_savings_per_column():
+    df = pd.DataFrame({"id": np.arange(100, dtype="int64"), "flag": [True] * 100})
+    small = apply_dtypes(df, dtype_plan(df))
+
+    report = memory_report(df, small)
+
+    assert report.loc["id", "dtype_after"] == "uint8"
+    assert report.loc["id", "saved_pct"] == 87.5
+    assert report.loc["flag", "saved_pct"] == 0.0
+    assert report.loc["TOTAL", "bytes_after"] == 200
@@ -0,0 +1,94 @@
+# test_excel.py
+# Tests for the streaming Excel reader/writer in src/excel.py
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+ROOT_LEVELS_UP = 1  # Adjust this if the structure changes
+sys.path.append(str(Path(__file__).resolve().parents[ROOT_LEVELS_UP]))
+from src import excel
+from src.excel import read_excel, write_excel
+from src.loading import LoadCache, load
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LoadCache(tmp_path / "cache", max_bytes=10 * 1024**2)
+
+
+@pytest.fixture
+def frames():
+    sales = pd.DataFrame(
+        {
+            "id": [1, 2, 3],
+            "amount": [10.5, None, 7.25],
+            "region": ["north", "south", None],
+            "day": pd.to_datetime(["2025-07-01", "2025-07-02", "2025-07-03"]),
+        }
+    )
+    targets = pd.DataFrame({"region": ["north", "south"], "target": [100, 200]})
+    return {"sales": sales, "targets": targets}
+
+
+def test_write_excel_round_trips_through_pandas(tmp_path, frames):
+    path = write_excel(frames, tmp_path / "report.xlsx")
+
+    for name, expected in frames.items():
+        pd.testing.assert_frame_equal(pd.read_excel(path, sheet_name=name), expected, check_dtype=False)
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_read_excel_matches_pandas_and_caches_sheets(tmp_path, frames, cache, monkeypatch):
+    path = write_excel(frames, tmp_path / "report.xlsx")
+
+    first = read_excel(path, sheet_name="sales", cache=cache)
+    pd.testing.assert_frame_equal(first, pd.read_excel(path, sheet_name="sales"), check_dtype=False)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("workbook should not be parsed again")
+
+    monkeypatch.setattr(excel, "_read_workbook", fail)
+    pd.testing.assert_frame_equal(read_excel(path, sheet_name="sales", cache=cache), first)
+    assert read_excel(path, sheet_name="sales", cache=cache, columns=["id"], filters=[("id", ">", 1)])[
+        "id"
+    ].tolist() == [2, 3]
+
+
+def test_read_all_sheets_and_invalidate_on_change(tmp_path, frames, cache):
+    path = write_excel(frames, tmp_path / "report.xlsx")
+    assert list(read_excel(path, sheet_name=None, cache=cache)) == ["sales", "targets"]
+
+    write_excel({"targets": frames["targets"].head(1)}, path)
+    sheets = load(path, cache=cache, sheet_name=None)
+    assert list(sheets) == ["targets"]
+    assert len(sheets["targets"]) == 1
+
+
+def test_read_excel_resolves_indexes_and_names_of_the_same_sheet(tmp_path, frames, cache):
+    path = write_excel(frames, tmp_path / "report.xlsx")
+
+    sheets = read_excel(path, sheet_name=[0, "sales", 1, 0], cache=cache)
+    assert list(sheets) == [0, "sales", 1]
+    pd.testing.assert_frame_equal(sheets[0], sheets["sales"])
+    assert sheets[1]["target"].tolist() == [100, 200]
+
+
+def test_read_excel_reports_missing_sheets(tmp_path, frames, cache):
+    path = write_excel(frames, tmp_path / "report.xlsx")
+
+    with pytest.raises(ValueError, match="nope"):
+        read_excel(path, sheet_name="nope", cache=cache)
+
+
+def test_mixed_type_columns_are_cached_as_strings(tmp_path, cache):
+    path = write_excel(pd.DataFrame({"code": [101, "A7", None], "qty": [1, 2, 3]}), tmp_path / "codes.xlsx")
+    assert pd.read_excel(path)["code"].tolist()[:2] == [101, "A7"]  # plain pandas reads it fine
+
+    df = read_excel(path, cache=cache)
+
+    assert df["code"].tolist()[:2] == ["101", "A7"] and pd.isna(df["code"].iloc[2])
+    assert df["qty"].tolist() == [1, 2, 3]
+    pd.testing.assert_frame_equal(read_excel(path, cache=cache), df)
@@ -0,0 +1,135 @@
+# test_fingerprints.py
+# Tests for the content-fingerprint database and staleness report in utils/fingerprints.py
+
+import os
+import sys
+from pathlib import Path
+
+import nbformat
+import pytest
+
+ROOT_LEVELS_UP = 1  # Adjust this if the structure changes
+sys.path.append(str(Path(__file__).resolve().parents[ROOT_LEVELS_UP] / "utils"))
+from fingerprints import MISSING, FingerprintDB, stale_outputs
+from pipeline_graph import FileIndex, build_graph, draw_graph_mermaid
+
+
+def write_notebook(path: Path, *sources: str) -> Path:
+    """Write a notebook with one code cell per source string."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    nb = nbformat.v4.new_notebook()
+    nb.cells = [nbformat.v4.new_code_cell(src) for src in sources]
+    nbformat.write(nb, path)
+    return path
+
+
+def write_at(path: Path, text: str, mtime: int) -> None:
+    """Write ``text`` and pin the file's mtime, so tests do not depend on clock resolution."""
+    path.write_text(text)
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """raw.csv -> clean -> clean.parquet -> report -> report.csv, all up to date."""
+    monkeypatch.delenv("DATA_DIR", raising=False)
+    monkeypatch.delenv("OUTPUT_DIR", raising=False)
+    root = tmp_path / "project"
+    (root / "data").mkdir(parents=True)
+    (root / "output").mkdir()
+    nbs = root / "notebooks"
+    sources = {
+        "clean.ipynb": "pd.read_csv(DATA_DIR / 'raw.csv').to_parquet(OUTPUT_DIR / 'clean.parquet')",
+        "report.ipynb": "pd.read_parquet(OUTPUT_DIR / 'clean.parquet').to_csv(OUTPUT_DIR / 'report.csv')",
+    }
+    for name, source in sources.items():
+        os.utime(write_notebook(nbs / name, source), (100, 100))
+    write_at(root / "data" / "raw.csv", "a\n1\n", 200)
+    write_at(root / "output" / "clean.parquet", "clean-v1", 300)
+    write_at(root / "output" / "report.csv", "report-v1", 400)
+    return root
+
+
+def check(root: Path, db: FingerprintDB):
+    return stale_outputs(build_graph(root), FileIndex(root), db)
+
+
+def test_changed_input_makes_outputs_stale_transitively(project, tmp_path):
+    with FingerprintDB(tmp_path / "fp.sqlite") as db:
+        assert check(project, db) == {}
+
+        write_at(project / "data" / "raw.csv", "a\n2\n", 500)
+        assert check(project, db) == {
+            "output/clean.parquet": ["data/raw.csv"],
+            "output/report.csv": ["output/clean.parquet"],
+        }
+
+        # Re-running clean rewrites its output; report is still behind it.
+        write_at(project / "output" / "clean.parquet", "clean-v2", 600)
+        assert check(project, db) == {"output/report.csv": ["output/clean.parquet"]}
+
+        write_at(project / "output" / "report.csv", "report-v2", 700)
+        assert check(project, db) == {}
+
+
+def test_touched_input_with_same_content_is_not_stale(project, tmp_path):
+    with FingerprintDB(tmp_path / "fp.sqlite") as db:
+        check(project, db)
+        write_at(project / "data" / "raw.csv", "a\n2\n", 500)
+        write_at(project / "output" / "clean.parquet", "clean-v2", 600)
+        write_at(project / "output" / "report.csv", "report-v2", 700)
+        assert check(project, db) == {}
+
+        os.utime(project / "data" / "raw.csv", (800, 800))
+        db.hashed = 0
+        assert check(project, db) == {}
+        assert db.hashed == 1
+
+        # A rerun with nothing changed reads no file contents at all.
+        db.hashed = 0
+        assert check(project, db) == {}
+        assert db.hashed == 0
+
+
+def test_touch_right_after_first_check_is_not_stale(project, tmp_path):
+    with FingerprintDB(tmp_path / "fp.sqlite") as db:
+        assert check(project, db) == {}
+        os.utime(project / "data" / "raw.csv", (800, 800))
+        assert check(project, db) == {}
+
+
+def test_dataset_bookkeeping_files_do_not_change_fingerprints(project, tmp_path):
+    events = project / "data" / "events"
+    (events / "region=north").mkdir(parents=True)
+    write_at(events / "region=north" / "part-0.parquet", "rows", 200)
+    with FingerprintDB(tmp_path / "fp.sqlite") as db:
+        before = db.refresh("data/events/", events)
+        (events / "_staging").mkdir()
+        (events / "_staging" / "part-9.parquet").write_text("uncommitted")
+        (events / "_commits.json").write_text("{}")
+        (events / ".lock").write_text("")
+        after = db.refresh("data/events/", events)
+
+    assert (after.version, after.touched) == (before.version, False)
+
+
+def test_missing_and_first_seen_outputs(project, tmp_path):
+    os.utime(project / "data" / "raw.csv", (350, 350))  # newer than clean.parquet before the first check
+    (project / "output" / "report.csv").unlink()
+
+    with FingerprintDB(tmp_path / "fp.sqlite") as db:
+        report = check(project, db)
+
+    assert report == {"output/clean.parquet": ["data/raw.csv"], "output/report.csv": [MISSING]}
+
+
+def test_mermaid_colours_stale_nodes(project, tmp_path):
+    graph = build_graph(project)
+    graph.nodes["output/report.csv"]["stale"] = [MISSING]
+    out = tmp_path / "graph.mmd"
+
+    draw_graph_mermaid(graph, out)
+
+    text = out.read_text()
+    assert "classDef stale" in text
+    assert text.count(" stale;") == 1
@@ -0,0 +1,52 @@
+# test_import_time.py
+# Guard the import cost of config.py and utils/pipeline_graph.py using `python -X importtime`
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_LEVELS_UP = 1  # Adjust this if the structure changes
+PROJECT_ROOT = Path(__file__).resolve().parents[ROOT_LEVELS_UP]
+
+# Cumulative import time budgets in microseconds, measured with warm bytecode.
+# They are deliberately generous so slow CI runners pass; the heavy-module
+# checks below are what catch an accidental eager import.
+CONFIG_BUDGET_US = 50_000
+PIPELINE_GRAPH_BUDGET_US = 150_000
+HEAVY_MODULES = {"dotenv", "networkx", "nbformat", "pandas", "pyarrow"}
+
+
+def import_profile(module: str, cwd: Path) -> dict:
+    """Return {module name: cumulative import time in us} for `import module`."""
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env["PYTHONPATH"] = os.pathsep.join([str(PROJECT_ROOT), str(PROJECT_ROOT / "utils")])
+    command = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+
+    subprocess.run(command, cwd=cwd, env=env, check=True, capture_output=True)  # warm bytecode
+    result = subprocess.run(command, cwd=cwd, env=env, check=True, capture_output=True, text=True)
+
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        profile[name.strip()] = int(cumulative.strip())
+    return profile
+
+
+def test_config_import_is_lazy_and_within_budget():
+    profile = import_profile("config", PROJECT_ROOT)
+
+    assert not HEAVY_MODULES & set(profile)
+    assert profile["config"] < CONFIG_BUDGET_US, f"import config took {profile['config']}us"
+
+
+def test_pipeline_graph_defers_heavy_imports():
+    profile = import_profile("pipeline_graph", PROJECT_ROOT)
+
+    assert not HEAVY_MODULES & set(profile)
+    assert profile["pipeline_graph"] < PIPELINE_GRAPH_BUDGET_US, (
+        f"import pipeline_graph took {profile['pipeline_graph']}us"
+    )
@@ -0,0 +1,129 @@
+# test_ingest.py
+# Tests for the parallel bulk ingest in src/ingest.py
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+ROOT_LEVELS_UP = 1  # Adjust this if the structure changes
+sys.path.append(str(Path(__file__).resolve().parents[ROOT_LEVELS_UP]))
+from src import ingest as ingest_module
+from src.ingest import MANIFEST_FILE, ingest, unify_schemas
+
+
+@pytest.fixture
+def drops(tmp_path):
+    source_dir = tmp_path / "data"
+    (source_dir / "daily").mkdir(parents=True)
+    (source_dir / "daily" / "2025-07-01.csv").write_text("region,amount\nnorth,1\nsouth,2\n")
+    (source_dir / "daily" / "2025-07-02.csv").write_text("region,amount\nnorth,3\n")
+    return source_dir
+
+
+def read_dataset(dataset_dir: Path) -> pd.DataFrame:
+    df = pd.read_parquet(dataset_dir)
+    df["region"] = df["region"].astype(str)
+    return df.sort_values(["region", "amount"]).reset_index(drop=True)
+
+
+def test_ingest_writes_hive_partitions_and_manifest(drops, tmp_path):
+    dataset = tmp_path / "dataset"
+
+    report = ingest("daily/*.csv", dataset, source_dir=drops, partition_by=["region"], jobs=2)
+
+    assert sorted(report.converted) == ["daily/2025-07-01.csv", "daily/2025-07-02.csv"]
+    assert report.rows == 3
+    assert sorted(p.name for p in dataset.iterdir() if p.is_dir()) == ["region=north", "region=south"]
+    assert read_dataset(dataset)["amount"].tolist() == [1, 3, 2]
+
+    manifest = json.loads((dataset / MANIFEST_FILE).read_text())
+    assert manifest["partition_by"] == ["region"]
+    assert all(entry["parts"] for entry in manifest["files"].values())
+
+
+def test_ingest_only_reprocesses_new_changed_and_removed_files(drops, tmp_path, monkeypatch):
+    dataset = tmp_path / "dataset"
+    ingest("daily/*.csv", dataset, source_dir=drops, partition_by=["region"], jobs=1)
+
+    seen = []
+    real_read = ingest_module.read_source
+    monkeypatch.setattr(ingest_module, "read_source", lambda path: seen.append(path.name) or real_read(path))
+
+    report = ingest("daily/*.csv", dataset, source_dir=drops, partition_by=["region"], jobs=1)
+    assert seen == [] and len(report.unchanged) == 2
+
+    changed = drops / "daily" / "2025-07-02.csv"
+    changed.write_text("region,amount\neast,4\n")
+    os.utime(changed, ns=(1, 1))
+    (drops / "daily" / "2025-07-01.csv").unlink()
+    (drops / "daily" / "2025-07-03.csv").write_text("region,amount\nnorth,5\n")
+
+    report = ingest("daily/*.csv", dataset, source_dir=drops, partition_by=["region"], jobs=1)
+
+    assert sorted(seen) == ["2025-07-02.csv", "2025-07-03.csv"]
+    assert report.removed == ["daily/2025-07-01.csv"]
+    df = read_dataset(dataset)
+    assert list(zip(df["region"], df["amount"])) == [("east", 4), ("north", 5)]
+    assert not (dataset / "region=south").exists()
+
+
+def test_ingest_unifies_schemas_across_runs(drops, tmp_path):
+    dataset = tmp_path / "dataset"
+    ingest("daily/*.csv", dataset, source_dir=drops, jobs=1)
+
+    (drops / "daily" / "2025-07-03.csv").write_text("region,amount,note\nwest,2.5,late\n")
+    report = ingest("daily/*.csv", dataset, source_dir=drops, jobs=1)
+
+    assert report.schema.field("amount").type == pa.float64()
+    df = read_dataset(dataset)
+    assert df["amount"].tolist() == [1.0, 3.0, 2.0, 2.5]
+    assert df["note"].isna().sum() == 3
+
+
+def test_unify_schemas_falls_back_to_string():
+    merged = unify_schemas(
+        [pa.schema([("id", pa.int64()), ("x", pa.null())]), pa.schema([("id", pa.string()), ("x", pa.int32())])]
+    )
+    assert merged.field("id").type == pa.string()
+    assert merged.field("x").type == pa.int32()
+
+
+def test_ingest_reruns_with_timestamp_and_decimal_columns(tmp_path, monkeypatch):
+    source_dir = tmp_path / "data"
+    (source_dir / "daily").mkdir(parents=True)
+    (source_dir / "daily" / "a.csv").write_text("at,amount\n2024-01-01T00:00:00Z,1.25\n")
+    real_read = ingest_module.read_source
+
+    def read_with_decimals(path):
+        table = real_read(path)
+        return table.set_column(1, "amount", table.column("amount").cast(pa.decimal128(10, 2)))
+
+    monkeypatch.setattr(ingest_module, "read_source", read_with_decimals)
+    dataset = tmp_path / "dataset"
+    ingest("daily/*.csv", dataset, source_dir=source_dir, jobs=1)
+
+    (source_dir / "daily" / "b.csv").write_text("at,amount\n2024-01-02T00:00:00Z,2.50\n")
+    report = ingest("daily/*.csv", dataset, source_dir=source_dir, jobs=1)
+
+    assert report.converted == ["daily/b.csv"]
+    assert report.schema.field("at").type == pa.timestamp("s", tz="UTC")
+    assert report.schema.field("amount").type == pa.decimal128(10, 2)
+    assert len(pd.read_parquet(dataset)) == 2
+
+
+def test_ingest_accepts_excel_columns_mixing_numbers_and_text(tmp_path):
+    from src.excel import write_excel
+
+    source_dir = tmp_path / "data"
+    write_excel(pd.DataFrame({"code": [101, "A7"], "amount": [1, 2]}), source_dir / "drops" / "codes.xlsx")
+
+    report = ingest("drops/*.xlsx", tmp_path / "dataset", source_dir=source_dir, jobs=1)
+
+    code_type = report.schema.field("code").type
+    assert pa.types.is_string(code_type) or pa.types.is_large_string(code_type)
+    assert pd.read_parquet(tmp_path / "dataset")["code"].tolist() == ["101", "A7"]
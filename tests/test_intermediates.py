@@ -0,0 +1,53 @@
+# test_intermediates.py
+# Tests for the memory-mapped intermediates in src/intermediates.py
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+ROOT_LEVELS_UP = 1  # Adjust this if the structure changes
+sys.path.append(str(Path(__file__).resolve().parents[ROOT_LEVELS_UP]))
+from src.intermediates import MMAP_MIN_BYTES, choose_format, read_arrow, read_intermediate, write_intermediate
+from src.loading import load
+
+
+def sample_frame(rows: int = 1000) -> pd.DataFrame:
+    return pd.DataFrame({"id": range(rows), "amount": [i * 0.5 for i in range(rows)]})
+
+
+def test_choose_format_prefers_ipc_for_shared_large_data():
+    assert choose_format(MMAP_MIN_BYTES, readers=4) == "ipc"
+    assert choose_format(MMAP_MIN_BYTES, readers=1) == "parquet"
+    assert choose_format(1024, readers=4) == "parquet"
+
+
+def test_ipc_intermediate_is_memory_mapped(tmp_path):
+    df = sample_frame()
+    written = write_intermediate(df, tmp_path / "clean.parquet", format="ipc")
+    assert written.name == "clean.arrow"
+
+    before = pa.total_allocated_bytes()
+    table = read_arrow(tmp_path / "clean.parquet")
+    assert pa.total_allocated_bytes() == before  # buffers point into the mapping
+
+    assert table.num_rows == len(df)
+    result = read_intermediate(tmp_path / "clean.parquet", columns=["amount"])
+    assert isinstance(result["amount"].dtype, pd.ArrowDtype)
+    assert result["amount"].tolist() == df["amount"].tolist()
+
+
+def test_rewriting_in_another_format_replaces_the_old_file(tmp_path):
+    write_intermediate(sample_frame(), tmp_path / "clean.parquet", format="ipc")
+    written = write_intermediate(sample_frame(10), tmp_path / "clean.parquet")
+
+    assert written.name == "clean.parquet"
+    assert not (tmp_path / "clean.arrow").exists()
+    pd.testing.assert_frame_equal(read_intermediate(tmp_path / "clean.parquet"), sample_frame(10))
+
+
+def test_load_reads_ipc_files(tmp_path):
+    written = write_intermediate(sample_frame(), tmp_path / "clean.arrow", format="ipc")
+
+    assert load(written)["id"].tolist() == list(range(1000))
@@ -0,0 +1,93 @@
+# test_lineage_store.py
+# Tests for the SQLite lineage store and its queries in utils/lineage_store.py
+
+import sys
+from pathlib import Path
+
+import nbformat
+import pytest
+
+ROOT_LEVELS_UP = 1  # Adjust this if the structure changes
+sys.path.append(str(Path(__file__).resolve().parents[ROOT_LEVELS_UP] / "utils"))
+from lineage_store import LineageStore, main
+from pipeline_graph import build_graph
+
+
+def write_notebook(path: Path, *sources: str) -> Path:
+    """Write a notebook with one code cell per source string."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    nb = nbformat.v4.new_notebook()
+    nb.cells = [nbformat.v4.new_code_cell(src) for src in sources]
+    nbformat.write(nb, path)
+    return path
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """customers.csv -> clean -> {report, scores}; scores also reads weights.csv."""
+    monkeypatch.delenv("DATA_DIR", raising=False)
+    monkeypatch.delenv("OUTPUT_DIR", raising=False)
+    root = tmp_path / "project"
+    nbs = root / "notebooks"
+    write_notebook(
+        nbs / "clean.ipynb", "pd.read_csv(DATA_DIR / 'customers.csv').to_parquet(OUTPUT_DIR / 'clean.parquet')"
+    )
+    write_notebook(
+        nbs / "report.ipynb", "pd.read_parquet(OUTPUT_DIR / 'clean.parquet').to_csv(OUTPUT_DIR / 'report.csv')"
+    )
+    write_notebook(
+        nbs / "scores.ipynb",
+        "w = pd.read_csv(DATA_DIR / 'weights.csv')\n"
+        "pd.read_parquet(OUTPUT_DIR / 'clean.parquet', columns=['id']).to_csv(OUTPUT_DIR / 'scores.csv')",
+    )
+    return root
+
+
+def test_sync_is_incremental_and_drops_orphans(project, tmp_path):
+    store = LineageStore(tmp_path / "lineage.sqlite")
+    assert store.sync(build_graph(project)) == {"added": 3, "updated": 0, "removed": 0}
+    assert store.sync(build_graph(project)) == {"added": 0, "updated": 0, "removed": 0}
+    assert store.counts() == {"notebook": 3, "file": 5, "edges": 7}
+
+    (project / "notebooks" / "scores.ipynb").unlink()
+    write_notebook(project / "notebooks" / "report.ipynb", "pd.read_parquet(OUTPUT_DIR / 'clean.parquet')")
+
+    assert store.sync(build_graph(project)) == {"added": 0, "updated": 1, "removed": 1}
+    assert store.counts() == {"notebook": 2, "file": 2, "edges": 3}
+
+
+def test_queries_walk_the_stored_graph(project, tmp_path):
+    with LineageStore(tmp_path / "lineage.sqlite") as store:
+        store.sync(build_graph(project))
+
+        assert store.downstream("data/customers.csv", depth=1) == [("notebooks/clean.ipynb", "notebook", 1)]
+        assert [name for name, _, _ in store.downstream("data/customers.csv", node_type="notebook")] == [
+            "notebooks/clean.ipynb",
+            "notebooks/report.ipynb",
+            "notebooks/scores.ipynb",
+        ]
+        assert store.upstream("output/scores.csv", depth=2) == [
+            ("notebooks/scores.ipynb", "notebook", 1),
+            ("data/weights.csv", "file", 2),
+            ("output/clean.parquet", "file", 2),
+        ]
+        assert store.impact("output/clean.parquet") == {
+            "direct": ["notebooks/report.ipynb", "notebooks/scores.ipynb"],
+            "notebooks": ["notebooks/report.ipynb", "notebooks/scores.ipynb"],
+            "files": ["output/report.csv", "output/scores.csv"],
+        }
+        assert store.resolve("weights.csv") == "data/weights.csv"
+        with pytest.raises(KeyError):
+            store.resolve("missing.csv")
+
+
+def test_query_cli_prints_json(project, tmp_path, capsys):
+    db = tmp_path / "lineage.sqlite"
+    with LineageStore(db) as store:
+        store.sync(build_graph(project))
+
+    main(["--db", str(db), "downstream", "customers.csv", "--type", "notebook", "--depth", "1", "--json"])
+
+    out = capsys.readouterr().out
+    assert '"node": "data/customers.csv"' in out
+    assert '"node": "notebooks/clean.ipynb"' in out
@@ -0,0 +1,126 @@
+# test_loading.py
+# Tests for the cached data loading API in src/loading.py
+
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+ROOT_LEVELS_UP = 1  # Adjust this if the structure changes
+sys.path.append(str(Path(__file__).resolve().parents[ROOT_LEVELS_UP]))
+from config import TESTS_DIR
+from src import loading
+from src.loading import LoadCache, load
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LoadCache(tmp_path / "cache", max_bytes=10 * 1024**2)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "sales.csv"
+    path.write_text("id,region,amount\n1,north,10.5\n2,south,20.0\n3,north,7.25\n")
+    return path
+
+
+def test_load_matches_read_csv(cache):
+    csv_path = TESTS_DIR / "data" / "testdata.csv"
+
+    df = load(csv_path, cache=cache)
+
+    pd.testing.assert_frame_equal(df, pd.read_csv(csv_path, engine="pyarrow"))
+
+
+def test_load_serves_cached_parquet(cache, csv_path, monkeypatch):
+    first = load(csv_path, cache=cache)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("CSV should not be parsed again")
+
+    monkeypatch.setattr(loading.pd, "read_csv", fail)
+    second = load(csv_path, cache=cache)
+
+    pd.testing.assert_frame_equal(first, second)
+    key = cache.key(cache.fingerprint(csv_path), {})
+    assert pq.read_schema(cache.get(key)).field("amount").type == pa.float64()
+
+
+def test_load_invalidates_on_change_and_keys_on_options(cache, csv_path):
+    load(csv_path, cache=cache)
+    csv_path.write_text("id,region,amount\n9,east,1.0\n")
+    assert load(csv_path, cache=cache)["id"].tolist() == [9]
+
+    subset = load(csv_path, cache=cache, usecols=["region"])
+    assert list(subset.columns) == ["region"]
+    assert len(list(cache.cache_dir.glob("*.parquet"))) == 3
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = LoadCache(tmp_path / "cache", max_bytes=0)
+    paths = []
+    for idx in range(3):
+        path = tmp_path / f"part_{idx}.csv"
+        path.write_text(f"value\n{idx}\n")
+        paths.append(path)
+        load(path, cache=cache)
+
+    # Only the most recent entry survives a zero-byte budget.
+    remaining = list(cache.cache_dir.glob("*.parquet"))
+    assert len(remaining) == 1
+    assert cache.get(cache.key(cache.fingerprint(paths[-1]), {})) == remaining[0]
+
+
+def test_load_rejects_unsupported_files(cache, tmp_path):
+    with pytest.raises(ValueError):
+        load(tmp_path / "notes.docx", cache=cache)
+
+
+def test_load_pushes_down_columns_and_filters(cache, tmp_path, monkeypatch):
+    monkeypatch.setattr(loading, "ROW_GROUP_SIZE", 100)
+    csv_path = tmp_path / "months.csv"
+    csv_path.write_text("month,amount,note\n" + "".join(f"{1 + i // 100},{i},x\n" for i in range(1200)))
+
+    df = load(csv_path, cache=cache, columns=["amount"], filters=[("month", "==", 7)])
+
+    assert list(df.columns) == ["amount"]
+    assert df["amount"].tolist() == list(range(600, 700))
+
+    # Statistics on the cached file let the reader skip all but one row group.
+    import pyarrow.dataset as ds
+
+    cached = cache.get(cache.key(cache.fingerprint(csv_path), {}))
+    fragment = next(ds.dataset(cached).get_fragments())
+    assert len(fragment.split_by_row_group(ds.field("month") == 7)) == 1
+
+
+def test_load_filters_parquet_files(tmp_path):
+    path = tmp_path / "data.parquet"
+    pd.DataFrame({"k": [1, 2, 3], "v": ["a", "b", "c"]}).to_parquet(path)
+
+    assert load(path, columns=["v"], filters=[("k", ">", 1)])["v"].tolist() == ["b", "c"]
+
+
+def test_load_optimize_persists_chosen_dtypes(cache, tmp_path, monkeypatch):
+    csv_path = tmp_path / "ids.csv"
+    csv_path.write_text("id,region\n" + "".join(f"{i},{'north' if i % 2 else 'south'}\n" for i in range(500)))
+
+    df = load(csv_path, cache=cache, optimize=True)
+
+    assert str(df["id"].dtype) == "uint16"
+    assert isinstance(df["region"].dtype, pd.CategoricalDtype)
+    assert df.attrs["memory_report"].loc["TOTAL", "bytes_after"] < df.attrs["memory_report"].loc["TOTAL", "bytes_before"]
+    key = cache.key(cache.fingerprint(csv_path), {})
+    assert cache.metadata(key)["dtypes"] == {"id": "uint16", "region": "category"}
+
+    def fail(*args, **kwargs):
+        raise AssertionError("stored dtypes should be reused")
+
+    monkeypatch.setattr(loading, "dtype_plan", fail)
+    again = load(csv_path, cache=cache, optimize=True)
+    pd.testing.assert_frame_equal(again, df)
@@ -9,31 +9,33 @@ ROOT_LEVELS_UP = 1  # Adjust this if the structure changes
 sys.path.append(str(Path(__file__).resolve().parents[ROOT_LEVELS_UP]))
 
 # Import the configuration for directories
-from config import TESTS_DIR, OUTPUT_DIR
+from config import TESTS_DIR
 
 import pandas as pd
 
+from src.writers import write_parquet
 
-def parse_data():
-    """Load CSV test data, save and reload as Parquet."""
+
+def parse_data(output_dir: Path):
+    """Load CSV test data, save it to ``output_dir`` and reload it as Parquet."""
     csv_path = TESTS_DIR / "data" / "testdata.csv"
-    parquet_path = OUTPUT_DIR / "testdata.parquet"
+    parquet_path = output_dir / "testdata.parquet"
 
     # Load the CSV file into a DataFrame
     testdata = pd.read_csv(csv_path, engine="pyarrow")
 
-    # Store testdata as Parquet file
-    testdata.to_parquet(parquet_path, engine="pyarrow")
+    # Store testdata as Parquet file; readers never see a half-written file
+    write_parquet(testdata, parquet_path, engine="pyarrow")
 
     # Reload from Parquet and return
     return pd.read_parquet(parquet_path, engine="pyarrow")
 
 
-def test_parse_data():
-    df_parquet = parse_data()
+def test_parse_data(tmp_path):
+    df_parquet = parse_data(tmp_path)
 
     # Parquet file should exist
-    parquet_path = OUTPUT_DIR / "testdata.parquet"
+    parquet_path = tmp_path / "testdata.parquet"
     assert parquet_path.is_file()
 
     # Data loaded from Parquet should match the original CSV
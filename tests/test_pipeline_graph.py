@@ -0,0 +1,422 @@
+# test_pipeline_graph.py
+# Tests for the notebook scanner and graph builder in utils/pipeline_graph.py
+
+import json
+import sys
+from pathlib import Path
+
+import nbformat
+import pytest
+
+ROOT_LEVELS_UP = 1  # Adjust this if the structure changes
+sys.path.append(str(Path(__file__).resolve().parents[ROOT_LEVELS_UP] / "utils"))
+import pipeline_graph
+from pipeline_graph import ScanCache, build_graph
+
+
+def write_notebook(path: Path, *sources: str) -> Path:
+    """Write a notebook with one code cell per source string."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    nb = nbformat.v4.new_notebook()
+    nb.cells = [nbformat.v4.new_code_cell(src) for src in sources]
+    nbformat.write(nb, path)
+    return path
+
+
+@pytest.fixture
+def project(tmp_path):
+    """A small project with two notebooks chained through a Parquet file."""
+    root = tmp_path / "project"
+    (root / "data").mkdir(parents=True)
+    (root / "data" / "raw.csv").write_text("a\n1\n")
+    write_notebook(
+        root / "notebooks" / "clean.ipynb",
+        "import pandas as pd\ndf = pd.read_csv(DATA_DIR / 'raw.csv')",
+        "df.to_parquet(OUTPUT_DIR / 'clean.parquet')",
+    )
+    write_notebook(
+        root / "notebooks" / "report.ipynb",
+        "df = pd.read_parquet(OUTPUT_DIR / 'clean.parquet')\ndf.to_csv(OUTPUT_DIR / 'report.csv')",
+    )
+    return root
+
+
+def test_build_graph_links_notebooks_through_files(project):
+    graph = build_graph(project)
+
+    assert graph.has_edge("data/raw.csv", "notebooks/clean.ipynb")
+    assert graph.has_edge("notebooks/clean.ipynb", "output/clean.parquet")
+    assert graph.has_edge("output/clean.parquet", "notebooks/report.ipynb")
+    assert graph.has_edge("notebooks/report.ipynb", "output/report.csv")
+
+
+def test_analyze_notebook_returns_inputs_and_outputs(project):
+    nb_path = project / "notebooks" / "report.ipynb"
+
+    inputs, outputs = pipeline_graph.analyze_notebook(nb_path)
+    assert (inputs, outputs) == ({"output/clean.parquet"}, {"output/report.csv"})
+    assert pipeline_graph.analyze_notebook_usage(nb_path) == (inputs, outputs, {"output/clean.parquet": None})
+
+
+def test_scan_cache_skips_unchanged_notebooks(project, monkeypatch):
+    cache_path = project / ".pipeline_graph" / "scan_cache.json"
+    expected = build_graph(project, cache=ScanCache.load(cache_path))
+    assert cache_path.is_file()
+
+    def fail(nb_path):
+        raise AssertionError(f"{nb_path} should have been served from the cache")
+
+    monkeypatch.setattr(pipeline_graph, "analyze_notebook_usage", fail)
+    cache = ScanCache.load(cache_path)
+    graph = build_graph(project, cache=cache)
+
+    assert cache.hits == 2 and cache.misses == 0
+    assert sorted(graph.edges()) == sorted(expected.edges())
+
+
+def test_scan_cache_rescans_changed_and_prunes_deleted(project):
+    cache_path = project / ".pipeline_graph" / "scan_cache.json"
+    build_graph(project, cache=ScanCache.load(cache_path))
+
+    write_notebook(
+        project / "notebooks" / "clean.ipynb",
+        "df = pd.read_csv(DATA_DIR / 'raw.csv')\ndf.to_parquet(OUTPUT_DIR / 'other.parquet')",
+    )
+    (project / "notebooks" / "report.ipynb").unlink()
+
+    cache = ScanCache.load(cache_path)
+    graph = build_graph(project, cache=cache)
+
+    assert cache.misses == 1
+    assert graph.has_edge("notebooks/clean.ipynb", "output/other.parquet")
+    assert set(ScanCache.load(cache_path).entries) == {"notebooks/clean.ipynb"}
+
+
+def test_parallel_build_matches_serial_output(project, tmp_path):
+    for idx in range(6):
+        write_notebook(
+            project / "notebooks" / "batch" / f"step_{idx}.ipynb",
+            f"df = pd.read_parquet(OUTPUT_DIR / 'clean.parquet')\ndf.to_csv(OUTPUT_DIR / 'step_{idx}.csv')",
+        )
+
+    serial_out = tmp_path / "serial.mmd"
+    parallel_out = tmp_path / "parallel.mmd"
+    pipeline_graph.draw_graph_mermaid(build_graph(project, jobs=1), serial_out)
+    pipeline_graph.draw_graph_mermaid(build_graph(project, jobs=3), parallel_out)
+
+    assert serial_out.read_bytes() == parallel_out.read_bytes()
+
+
+def test_file_index_resolves_bare_names_deterministically(tmp_path, monkeypatch):
+    monkeypatch.delenv("DATA_DIR", raising=False)
+    monkeypatch.delenv("OUTPUT_DIR", raising=False)
+    root = tmp_path / "project"
+    for rel in ("output/x.csv", "tests/data/x.csv", "archive/2024/y.csv", "archive/y.csv", ".venv/lib/z.csv"):
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_text("a\n")
+
+    index = pipeline_graph.FileIndex(root)
+
+    assert pipeline_graph.resolve_file_node("x.csv", root, index) == "output/x.csv"
+    assert pipeline_graph.resolve_file_node("y.csv", root, index) == "archive/y.csv"
+    assert pipeline_graph.resolve_file_node("z.csv", root, index) == "z.csv"
+
+
+def test_file_index_honours_data_dir_override(tmp_path, monkeypatch):
+    root = tmp_path / "project"
+    root.mkdir()
+    shared = tmp_path / "shared"
+    (shared / "raw").mkdir(parents=True)
+    (shared / "raw" / "customers.csv").write_text("a\n")
+    monkeypatch.setenv("DATA_DIR", str(shared))
+
+    index = pipeline_graph.FileIndex(root)
+
+    assert pipeline_graph.resolve_file_node("customers.csv", root, index) == "data/raw/customers.csv"
+
+
+def test_iter_code_cells_skips_outputs_and_matches_nbformat(tmp_path):
+    nb = nbformat.v4.new_notebook()
+    cell = nbformat.v4.new_code_cell('df = pd.read_csv("a \\"quoted\\" [name].csv")\n')
+    cell.outputs = [
+        nbformat.v4.new_output("display_data", data={"image/png": "iVBOR" * 1000, "text/html": "<b>{x}</b>"}),
+    ]
+    nb.cells = [nbformat.v4.new_markdown_cell("# Title"), cell, nbformat.v4.new_code_cell("")]
+    nb_path = tmp_path / "outputs.ipynb"
+    nbformat.write(nb, nb_path)
+
+    expected = [c.source for c in nbformat.read(nb_path, as_version=4).cells if c.cell_type == "code"]
+    assert list(pipeline_graph.iter_code_cells(nb_path)) == expected
+
+
+def test_iter_code_cells_falls_back_for_nbformat_3(tmp_path):
+    nb_path = tmp_path / "legacy.ipynb"
+    cell = nbformat.v3.new_code_cell(input="df = pd.read_csv('legacy.csv')")
+    nb = nbformat.v3.new_notebook(worksheets=[nbformat.v3.new_worksheet(cells=[cell])])
+    nbformat.write(nb, nb_path, version=3)
+
+    assert list(pipeline_graph.iter_code_cells(nb_path)) == ["df = pd.read_csv('legacy.csv')"]
+
+
+def test_extractor_prefilters_parses_and_falls_back():
+    extractor = pipeline_graph.IOExtractor()
+    extractor.feed("print('hello world')")
+    extractor.feed("%matplotlib inline\ncsv_path = TESTS_DIR / 'data' / 'testdata.csv'")
+    extractor.feed("df = pd.read_csv(csv_path)\ndf.to_parquet(path=OUTPUT_DIR / 'testdata.parquet')")
+    extractor.feed("files = !ls\npd.read_json('broken.json')")
+
+    assert extractor.inputs == {"tests/data/testdata.csv", "broken.json"}
+    assert extractor.outputs == {"output/testdata.parquet"}
+    assert extractor.stats.as_dict() == {"cells_skipped": 1, "cells_parsed": 2, "regex_fallbacks": 1}
+
+
+def test_extractor_keeps_continuation_lines_starting_with_modulo():
+    extractor = pipeline_graph.IOExtractor()
+    extractor.feed("rows = [x for x in range(10)\n        % 3]\nout = 'output/a.csv'\ndf.to_csv(out)")
+
+    assert extractor.outputs == {"output/a.csv"}
+    assert extractor.stats.regex_fallbacks == 0
+
+
+def test_extractor_binds_only_paths_and_skips_unresolved_fstrings():
+    extractor = pipeline_graph.IOExtractor()
+    extractor.feed("mode = 'w'\nraw_dir = RAW_DIR / 'sales'\nreport = f'{OUTPUT_DIR}/report.csv'\npd.read_csv('a.csv')")
+    extractor.feed("pdf = make_pdf()\nmodel = fit()")  # contains "mode" but not as a word
+    extractor.feed("pd.read_csv(f'data/{name}.csv')\ndf.to_csv(report)")
+
+    assert set(extractor.var_sources) == {"raw_dir", "report"}
+    assert extractor.inputs == {"a.csv"}
+    assert extractor.outputs == {"output/report.csv"}
+    assert extractor.stats.cells_skipped == 1
+
+
+def test_extractor_picks_the_same_write_path_for_multiply_bound_variables():
+    cells = ["out = OUTPUT_DIR / 'b.csv'", "out = OUTPUT_DIR / 'a.csv'\ndf.to_csv(out)"]
+    for order in (cells, cells[::-1]):
+        extractor = pipeline_graph.IOExtractor()
+        for src in order:
+            extractor.feed(src)
+        assert extractor.outputs == {"output/a.csv"}
+
+
+def test_build_graph_accumulates_extraction_stats(project):
+    stats = pipeline_graph.ExtractionStats()
+    build_graph(project, jobs=2, stats=stats)
+
+    assert stats.cells_parsed == 3
+
+
+def test_watcher_updates_graph_incrementally(project, tmp_path):
+    out_path = tmp_path / "watch.mmd"
+    watcher = pipeline_graph.GraphWatcher(project, out_path, debounce=0)
+    assert watcher.poll() == set()
+
+    write_notebook(
+        project / "notebooks" / "clean.ipynb",
+        "df = pd.read_csv(DATA_DIR / 'raw.csv')\ndf.to_parquet(OUTPUT_DIR / 'clean_v2.parquet')",
+    )
+    write_notebook(project / "notebooks" / "extra.ipynb", "pd.read_parquet(OUTPUT_DIR / 'clean_v2.parquet')")
+    (project / "notebooks" / "report.ipynb").unlink()
+
+    touched = watcher.poll()
+
+    assert touched == {"notebooks/clean.ipynb", "notebooks/extra.ipynb", "notebooks/report.ipynb"}
+    assert "output/report.csv" not in watcher.graph
+    fresh_path = tmp_path / "fresh.mmd"
+    pipeline_graph.draw_graph_mermaid(build_graph(project), fresh_path)
+    assert out_path.read_bytes() == fresh_path.read_bytes()
+
+
+def test_focus_subgraph_limits_depth(project):
+    graph = build_graph(project)
+
+    near = pipeline_graph.focus_subgraph(graph, "output/clean.parquet", depth=1)
+    assert set(near) == {"output/clean.parquet", "notebooks/clean.ipynb", "notebooks/report.ipynb"}
+
+    full = pipeline_graph.focus_subgraph(graph, "output/report.csv")
+    assert "data/raw.csv" in full
+
+
+def test_collapse_file_nodes_by_partition(project):
+    for day in ("2024-01-01", "2024-01-02", "2024-01-03"):
+        write_notebook(
+            project / "notebooks" / f"load_{day}.ipynb",
+            f"pd.read_csv(DATA_DIR / 'raw.csv').to_parquet(OUTPUT_DIR / 'events' / 'day={day}' / 'part-0.parquet')",
+        )
+    graph = build_graph(project)
+
+    collapsed = pipeline_graph.collapse_file_nodes(graph, by="partition")
+
+    group = "output/events/day=*/part-*.parquet"
+    assert collapsed.nodes[group]["label"] == f"{group} (3 files)"
+    assert collapsed.in_degree(group) == 3
+    assert "output/clean.parquet" in collapsed
+
+    out_path = project / "collapsed.mmd"
+    pipeline_graph.draw_graph_mermaid(collapsed, out_path)
+    assert " group;" in out_path.read_text()
+
+
+def test_extractor_tracks_cached_loader_calls():
+    extractor = pipeline_graph.IOExtractor()
+    extractor.feed("from src.loading import load\ndf = load(DATA_DIR / 'customers.csv')")
+
+    assert extractor.inputs == {"data/customers.csv"}
+
+
+def test_extractor_matches_generic_readers_only_when_qualified():
+    extractor = pipeline_graph.IOExtractor()
+    extractor.feed("import numpy as np\nimport pyarrow.dataset as pads\nimport json, pickle")
+    extractor.feed(
+        "weights = np.load(DATA_DIR / 'weights.npy')\n"
+        "meta = json.load(open(DATA_DIR / 'meta.json'))\n"
+        "model = pickle.load(DATA_DIR / 'model.pkl')\n"
+        "tables = load(DATA_DIR / 'unknown.csv')\n"
+        "events = pads.dataset(DATA_DIR / 'events')\n"
+        "sales = loading.load(DATA_DIR / 'sales.csv')"
+    )
+
+    assert extractor.inputs == {"data/events/", "data/sales.csv"}
+
+
+def test_extractor_tracks_intermediates():
+    extractor = pipeline_graph.IOExtractor()
+    extractor.feed(
+        "write_intermediate(df, OUTPUT_DIR / 'clean.parquet', readers=4)\n"
+        "other = read_intermediate(OUTPUT_DIR / 'features.parquet')"
+    )
+
+    assert extractor.outputs == {"output/clean.parquet"}
+    assert extractor.inputs == {"output/features.parquet"}
+
+
+def test_extractor_records_consumed_columns():
+    extractor = pipeline_graph.IOExtractor()
+    extractor.feed(
+        "a = pd.read_csv(DATA_DIR / 'sales.csv', usecols=['id', 'amount'])\n"
+        "from src.loading import load\nb = load(DATA_DIR / 'sales.csv', columns=('region',))\n"
+        "c = pd.read_parquet(OUTPUT_DIR / 'clean.parquet', columns=cols)\n"
+        "d = pd.read_parquet(OUTPUT_DIR / 'other.parquet')"
+    )
+
+    assert extractor.columns == {
+        "data/sales.csv": {"id", "amount", "region"},
+        "output/clean.parquet": None,
+        "output/other.parquet": None,
+    }
+
+
+def test_extractor_marks_glob_and_partition_reads_as_datasets():
+    extractor = pipeline_graph.IOExtractor()
+    extractor.feed(
+        "frames = [pd.read_csv(f) for f in DATA_DIR.glob('sales/*.csv')]\n"
+        "logs = pd.concat(pd.read_json(p) for p in (DATA_DIR / 'logs').rglob('*.json'))\n"
+        "events = pd.read_parquet(DATA_DIR / 'events', columns=['id'])\n"
+        "events.to_parquet(OUTPUT_DIR / 'by_day', partition_cols=['day'])\n"
+        "events.to_parquet(OUTPUT_DIR / 'events.parquet')"
+    )
+
+    assert extractor.inputs == {"data/sales/*.csv", "data/logs/**/*.json", "data/events/"}
+    assert extractor.outputs == {"output/by_day/", "output/events.parquet"}
+    assert extractor.columns["data/events/"] == {"id"}
+
+
+def test_dataset_nodes_summarise_files_from_a_cached_scan(tmp_path, monkeypatch):
+    monkeypatch.delenv("DATA_DIR", raising=False)
+    events = tmp_path / "data" / "events"
+    for day in ("day=1", "day=2"):
+        (events / day).mkdir(parents=True)
+        (events / day / "part-0.parquet").write_bytes(b"x" * 100)
+    (tmp_path / "data" / "a.csv").write_text("id\n1\n")
+    (tmp_path / "data" / "b.csv").write_text("id\n2\n")
+    write_notebook(
+        tmp_path / "notebooks" / "load.ipynb",
+        "events = pd.read_parquet(DATA_DIR / 'events')\nparts = [pd.read_csv(f) for f in DATA_DIR.glob('*.csv')]",
+    )
+    cache_path = tmp_path / "cache.json"
+
+    graph = build_graph(tmp_path, cache=ScanCache.load(cache_path))
+
+    assert graph.nodes["data/events"]["node_type"] == "dataset"
+    assert (graph.nodes["data/events"]["files"], graph.nodes["data/events"]["bytes"]) == (2, 200)
+    assert graph.nodes["data/*.csv"]["files"] == 2
+    assert graph.nodes["data/events"]["mtime_ns"] == max(path.stat().st_mtime_ns for path in events.rglob("*.parquet"))
+
+    cache = ScanCache.load(cache_path)
+    graph = build_graph(tmp_path)
+    assert pipeline_graph.annotate_datasets(graph, pipeline_graph.FileIndex(tmp_path), cache) == 0
+    (events / "day=3").mkdir()
+    (events / "day=3" / "part-0.parquet").write_bytes(b"x" * 50)
+    assert pipeline_graph.annotate_datasets(graph, pipeline_graph.FileIndex(tmp_path), cache) == 1
+    assert (graph.nodes["data/events"]["files"], graph.nodes["data/events"]["bytes"]) == (3, 250)
+
+    out = tmp_path / "graph.mmd"
+    pipeline_graph.draw_graph_mermaid(graph, out)
+    assert '[("data/events<br/>3 files · 250 B")]' in out.read_text()
+
+
+def test_column_report_lists_unused_columns(tmp_path):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "raw.csv").write_text("id,region,amount,comment\n1,north,2.0,x\n")
+    nbs = tmp_path / "notebooks"
+    nbs.mkdir()
+    write_notebook(nbs / "a.ipynb", "pd.read_csv(DATA_DIR / 'raw.csv', usecols=['id', 'amount'])")
+    write_notebook(nbs / "b.ipynb", "from src import loading\nloading.load(DATA_DIR / 'raw.csv', columns=['region'])")
+
+    cache = pipeline_graph.ScanCache.load(tmp_path / "cache.json")
+    pipeline_graph.build_graph(tmp_path, cache=cache)
+    graph = pipeline_graph.build_graph(tmp_path, cache=pipeline_graph.ScanCache.load(tmp_path / "cache.json"))
+
+    assert graph.edges["data/raw.csv", "notebooks/a.ipynb"]["columns"] == ["amount", "id"]
+    report = pipeline_graph.column_report(graph, pipeline_graph.FileIndex(tmp_path))
+    assert report == {"data/raw.csv": {"used": ["amount", "id", "region"], "unused": ["comment"]}}
+
+
+def test_profiler_records_phases_and_cache_hits(project, tmp_path):
+    cache_path = tmp_path / "cache.json"
+    cold = pipeline_graph.ScanProfiler()
+    build_graph(project, cache=ScanCache.load(cache_path), profiler=cold)
+    warm = pipeline_graph.ScanProfiler()
+    build_graph(project, cache=ScanCache.load(cache_path), profiler=warm)
+
+    clean = cold.notebooks["notebooks/clean.ipynb"]
+    assert not clean.cached
+    assert clean.cells == 2 and clean.stats.cells_parsed == 2
+    assert clean.bytes_read == (project / "notebooks" / "clean.ipynb").stat().st_size
+    assert clean.peak_memory_bytes > 0 and clean.seconds["read"] > 0
+    assert {"analyze", "index", "graph"} <= set(cold.seconds)
+    assert all(profile.cached and profile.cells == 0 for profile in warm.notebooks.values())
+
+    out = tmp_path / "profile.csv"
+    cold.write(out)
+    header, *rows = out.read_text().splitlines()
+    assert header.startswith("notebook,cached,total_seconds,cells") and len(rows) == 2
+    assert [p.notebook for p in cold.slowest(5)] == [row["notebook"] for row in cold.report()["notebooks"]]
+
+
+def test_json_log_formatter_includes_extra_fields():
+    extra = {"event": "scan_stats", "cells_parsed": 3}
+    record = pipeline_graph.logger.makeRecord(
+        "pipeline_graph", 20, __file__, 1, "Cells: %d parsed", (3,), None, extra=extra
+    )
+    payload = json.loads(pipeline_graph.JsonLogFormatter().format(record))
+
+    assert payload["message"] == "Cells: 3 parsed"
+    assert payload["level"] == "INFO"
+    assert payload["event"] == "scan_stats" and payload["cells_parsed"] == 3
+    assert "lineno" not in payload
+
+
+def test_draw_mermaid_annotates_durations_and_highlights_path(project, tmp_path):
+    graph = build_graph(project)
+    pipeline_graph.apply_run_profile(
+        graph, {"notebooks/clean.ipynb": {"duration": 2.0}, "notebooks/report.ipynb": {"duration": 75.0}}
+    )
+    path, seconds = pipeline_graph.critical_path(graph)
+    out = tmp_path / "graph.mmd"
+    pipeline_graph.draw_graph_mermaid(graph, out, highlight=path)
+
+    text = out.read_text()
+    assert seconds == 77.0 and path[-1] == "output/report.csv"
+    assert '["notebooks/report.ipynb<br/>1m 15s"]' in text
+    assert "classDef critical" in text and "linkStyle 0,1,2,3 " in text
@@ -0,0 +1,156 @@
+# test_pipeline_run.py
+# Tests for the dependency-aware notebook executor in utils/pipeline_run.py
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import nbformat
+import pytest
+
+ROOT_LEVELS_UP = 1  # Adjust this if the structure changes
+sys.path.append(str(Path(__file__).resolve().parents[ROOT_LEVELS_UP] / "utils"))
+from pipeline_graph import apply_run_profile, build_graph, critical_path, load_run_profile, save_run_profile
+from pipeline_run import BLOCKED, FAILED, RAN, SKIPPED, run_pipeline
+
+
+def write_notebook(path: Path, *sources: str) -> Path:
+    """Write a notebook with one code cell per source string."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    nb = nbformat.v4.new_notebook()
+    nb.cells = [nbformat.v4.new_code_cell(src) for src in sources]
+    nbformat.write(nb, path)
+    return path
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """raw.csv -> clean -> {left, right} -> merge, plus an unrelated notebook."""
+    monkeypatch.delenv("DATA_DIR", raising=False)
+    monkeypatch.delenv("OUTPUT_DIR", raising=False)
+    root = tmp_path / "project"
+    (root / "data").mkdir(parents=True)
+    (root / "output").mkdir()
+    (root / "data" / "raw.csv").write_text("a\n1\n")
+    nbs = root / "notebooks"
+    write_notebook(nbs / "clean.ipynb", "pd.read_csv(DATA_DIR / 'raw.csv').to_parquet(OUTPUT_DIR / 'clean.parquet')")
+    write_notebook(nbs / "left.ipynb", "pd.read_parquet(OUTPUT_DIR / 'clean.parquet').to_csv(OUTPUT_DIR / 'left.csv')")
+    write_notebook(nbs / "right.ipynb", "pd.read_parquet(OUTPUT_DIR / 'clean.parquet').to_csv(OUTPUT_DIR / 'right.csv')")
+    write_notebook(
+        nbs / "merge.ipynb",
+        "a = pd.read_csv(OUTPUT_DIR / 'left.csv')\nb = pd.read_csv(OUTPUT_DIR / 'right.csv')\n"
+        "a.to_csv(OUTPUT_DIR / 'merged.csv')",
+    )
+    write_notebook(nbs / "other.ipynb", "pd.read_csv(DATA_DIR / 'raw.csv').to_csv(OUTPUT_DIR / 'other.csv')")
+    return root
+
+
+def fake_executor(graph, root, log, barrier=None):
+    """Pretend to run a notebook by touching its outputs."""
+
+    def execute(nb_path):
+        node = str(nb_path.relative_to(root))
+        if barrier is not None and node in ("notebooks/left.ipynb", "notebooks/right.ipynb"):
+            barrier.wait()  # only passes if both branches run at the same time
+        log.append(node)
+        for out in graph.successors(node):
+            (root / out).write_text("x\n")
+
+    return execute
+
+
+def test_run_pipeline_respects_order_and_runs_branches_concurrently(project):
+    graph = build_graph(project)
+    log = []
+    barrier = threading.Barrier(2, timeout=5)
+
+    states = run_pipeline(graph, project, jobs=2, execute=fake_executor(graph, project, log, barrier))
+
+    assert set(states.values()) == {RAN}
+    assert log.index("notebooks/clean.ipynb") < log.index("notebooks/left.ipynb") < log.index("notebooks/merge.ipynb")
+    assert log.index("notebooks/right.ipynb") < log.index("notebooks/merge.ipynb")
+
+
+def test_run_pipeline_skips_up_to_date_and_reruns_downstream(project):
+    graph = build_graph(project)
+    run_pipeline(graph, project, execute=fake_executor(graph, project, []))
+
+    log = []
+    states = run_pipeline(graph, project, execute=fake_executor(graph, project, log))
+    assert log == [] and set(states.values()) == {SKIPPED}
+
+    stamp = (project / "output" / "clean.parquet").stat().st_mtime + 10
+    os.utime(project / "data" / "raw.csv", (stamp, stamp))
+    log = []
+    states = run_pipeline(graph, project, execute=fake_executor(graph, project, log))
+    assert states["notebooks/merge.ipynb"] == RAN
+    assert states["notebooks/other.ipynb"] == RAN
+    assert len(log) == 5
+
+
+def test_run_pipeline_logs_each_notebook(project, caplog):
+    graph = build_graph(project)
+
+    with caplog.at_level("INFO", logger="pipeline_run"):
+        run_pipeline(graph, project, targets=["output/clean.parquet"], dry_run=True)
+
+    assert [(record.event, record.notebook) for record in caplog.records] == [
+        ("notebook_would_run", "notebooks/clean.ipynb")
+    ]
+
+
+def test_run_pipeline_target_selects_upstream_only(project):
+    graph = build_graph(project)
+    log = []
+
+    states = run_pipeline(graph, project, targets=["output/left.csv"], execute=fake_executor(graph, project, log))
+
+    assert log == ["notebooks/clean.ipynb", "notebooks/left.ipynb"]
+    assert set(states) == {"notebooks/clean.ipynb", "notebooks/left.ipynb"}
+
+
+def test_run_pipeline_blocks_downstream_of_failures(project):
+    graph = build_graph(project)
+    inner = fake_executor(graph, project, [])
+
+    def execute(nb_path):
+        if nb_path.name == "left.ipynb":
+            raise RuntimeError("boom")
+        inner(nb_path)
+
+    states = run_pipeline(graph, project, jobs=2, execute=execute)
+
+    assert states["notebooks/left.ipynb"] == FAILED
+    assert states["notebooks/merge.ipynb"] == BLOCKED
+    assert states["notebooks/right.ipynb"] == RAN
+
+
+def test_run_pipeline_records_runtime_and_critical_path(project, tmp_path):
+    graph = build_graph(project)
+    inner = fake_executor(graph, project, [])
+
+    def execute(nb_path):
+        inner(nb_path)
+        if nb_path.name == "right.ipynb":
+            time.sleep(0.05)
+        return {"peak_rss_bytes": 1024}
+
+    run_pipeline(graph, project, jobs=2, execute=execute)
+
+    clean = graph.nodes["notebooks/clean.ipynb"]
+    assert clean["duration"] > 0 and clean["peak_rss_bytes"] == 1024
+    assert clean["bytes_read"] == 4 and clean["bytes_written"] == 2
+    assert graph.nodes["output/clean.parquet"]["bytes"] == 2
+
+    path, seconds = critical_path(graph)
+    assert path[:4] == ["data/raw.csv", "notebooks/clean.ipynb", "output/clean.parquet", "notebooks/right.ipynb"]
+    assert path[-2:] == ["notebooks/merge.ipynb", "output/merged.csv"]
+    assert seconds >= 0.05
+
+    profile_path = tmp_path / "run_profile.json"
+    save_run_profile(graph, profile_path)
+    fresh = build_graph(project)
+    apply_run_profile(fresh, load_run_profile(profile_path))
+    assert fresh.nodes["notebooks/right.ipynb"]["duration"] == graph.nodes["notebooks/right.ipynb"]["duration"]
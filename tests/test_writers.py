@@ -0,0 +1,160 @@
+# test_writers.py
+# Tests for the concurrent-safe writers in src/writers.py
+
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+ROOT_LEVELS_UP = 1  # Adjust this if the structure changes
+sys.path.append(str(Path(__file__).resolve().parents[ROOT_LEVELS_UP]))
+sys.path.append(str(Path(__file__).resolve().parents[ROOT_LEVELS_UP] / "utils"))
+from pipeline_graph import scan_dataset
+from src.writers import (
+    STAGING_DIR,
+    ArtifactLock,
+    ConflictError,
+    LockTimeout,
+    append_parts,
+    commit_parts,
+    committed_parts,
+    read_parts,
+    read_version,
+    stage_parts,
+    write_atomic,
+    write_parquet,
+)
+
+
+def frame(region: str, start: int, rows: int = 3) -> pd.DataFrame:
+    return pd.DataFrame({"id": range(start, start + rows), "region": region})
+
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    target = tmp_path / "out" / "clean.parquet"
+    write_parquet(frame("north", 0), target)
+
+    def crash(tmp_path: Path) -> None:
+        tmp_path.write_bytes(b"PAR1 half-written")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError, match="disk full"):
+        write_atomic(target, crash)
+
+    assert pd.read_parquet(target)["id"].tolist() == [0, 1, 2]
+    assert sorted(path.name for path in target.parent.iterdir()) == ["clean.parquet"]  # no temp or lock files left
+
+
+def test_expected_version_detects_concurrent_writes(tmp_path):
+    target = tmp_path / "totals.parquet"
+    assert read_version(target) is None
+    version = write_parquet(frame("north", 0), target, expected=None)
+
+    # Another job rewrites the file after we read it ...
+    write_parquet(frame("south", 0), target)
+    with pytest.raises(ConflictError, match="was replaced"):
+        write_parquet(frame("north", 3), target, expected=version)
+    with pytest.raises(ConflictError, match="was created"):
+        write_parquet(frame("north", 3), target, expected=None)
+
+    # ... so we re-read and retry on top of its version.
+    assert write_parquet(frame("north", 3), target, expected=read_version(target)) == read_version(target)
+
+
+def test_lock_times_out_and_breaks_stale_locks(tmp_path):
+    target = tmp_path / "clean.parquet"
+    with ArtifactLock(target):
+        with pytest.raises(LockTimeout):
+            ArtifactLock(target, timeout=0.05).acquire()
+
+    lock_path = tmp_path / "clean.parquet.lock"
+    lock_path.write_text("{}")  # left behind by a crashed writer
+    old = time.time() - 3600
+    os.utime(lock_path, (old, old))
+    write_parquet(frame("north", 0), target)
+    assert not lock_path.exists()
+
+
+def test_breaking_a_stale_lock_keeps_a_new_holders_lock(tmp_path, monkeypatch):
+    target = tmp_path / "clean.parquet"
+    lock_path = tmp_path / "clean.parquet.lock"
+    lock_path.write_text("{}")
+    old = time.time() - 3600
+    os.utime(lock_path, (old, old))
+    waiter, holder = ArtifactLock(target), ArtifactLock(target)
+    real_replace = os.replace
+
+    def replace_after_another_waiter(src, dst):
+        if Path(src) == lock_path and holder._fd is None:
+            # Between our stat and rename, another waiter breaks the stale lock and a new holder takes it.
+            real_replace(lock_path, tmp_path / "other.stale")
+            holder.acquire()
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", replace_after_another_waiter)
+    waiter._break_if_stale()
+    monkeypatch.undo()
+
+    assert os.path.samestat(os.fstat(holder._fd), os.stat(lock_path))
+    with pytest.raises(LockTimeout):
+        ArtifactLock(target, timeout=0.05).acquire()
+    holder.release()
+    assert not lock_path.exists()
+
+
+def test_failed_commit_restores_staged_parts(tmp_path, monkeypatch):
+    dataset = tmp_path / "scores"
+    staged = stage_parts(frame("north", 0), dataset, ["region"]) + stage_parts(frame("south", 10), dataset, ["region"])
+    real_replace = os.replace
+
+    def fail_second_part(src, dst):
+        if "region=south" in str(dst) and STAGING_DIR not in Path(dst).parts:
+            raise OSError("network mount went away")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", fail_second_part)
+    with pytest.raises(OSError, match="network mount"):
+        commit_parts(dataset, staged, partition_by=["region"])
+    monkeypatch.undo()
+
+    assert committed_parts(dataset) == []
+    assert scan_dataset(dataset)["files"] == 0  # nothing half-published to directory readers
+    commit_parts(dataset, staged, partition_by=["region"])
+    assert sorted(read_parts(dataset)["id"]) == [0, 1, 2, 10, 11, 12]
+
+
+def test_parallel_staged_parts_commit_once(tmp_path):
+    dataset = tmp_path / "scores"
+    regions = ["north", "south", "north", "east"]
+    with ProcessPoolExecutor(max_workers=4, mp_context=multiprocessing.get_context("spawn")) as pool:
+        staged = list(
+            pool.map(
+                stage_parts,
+                [frame(region, idx * 10) for idx, region in enumerate(regions)],
+                [dataset] * 4,
+                [["region"]] * 4,
+            )
+        )
+
+    # Nothing is visible until the commit, to readers or to the pipeline graph.
+    assert read_parts(dataset).empty
+    assert scan_dataset(dataset)["files"] == 0
+
+    commit_parts(dataset, [part for parts in staged for part in parts], partition_by=["region"])
+    append_parts(frame("west", 100), dataset, partition_by=["region"])
+
+    assert len(committed_parts(dataset)) == 5
+    assert not (dataset / "_staging").exists()
+    result = read_parts(dataset).sort_values("id")
+    assert result["id"].tolist() == [0, 1, 2, 10, 11, 12, 20, 21, 22, 30, 31, 32, 100, 101, 102]
+    assert set(result["region"].astype(str)) == {"north", "south", "east", "west"}
+    assert len(pd.read_parquet(dataset)) == 15  # plain directory readers see the same rows
+    assert scan_dataset(dataset)["files"] == 5
+
+    with pytest.raises(ValueError, match="partitioned by"):
+        append_parts(frame("west", 200), dataset)
@@ -0,0 +1,396 @@
+#!/usr/bin/env python
+"""
+Compact, array-backed pipeline graph for large projects.
+
+Features
+--------
+* Interns node paths to integer ids once; edges, node types and numeric
+  attributes live in NumPy arrays instead of per-node dicts.
+* Stores adjacency twice in CSR form (successors and predecessors), so
+  upstream and downstream walks are frontier-at-a-time array operations.
+* Topological sort by levels (Kahn's algorithm over whole frontiers).
+* Builds straight from the scan cache without importing networkx, and
+  converts to and from the ``nx.DiGraph`` produced by ``build_graph``.
+
+Usage
+-----
+python compact_graph.py downstream data/customers.csv --type notebook --depth 1
+python compact_graph.py upstream output/report.csv
+python compact_graph.py order
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lineage_store import Reached, print_rows
+from pipeline_graph import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_EXCLUDE_DIRS,
+    RUNTIME_ATTRIBUTES,
+    ExtractionStats,
+    FileIndex,
+    ScanCache,
+    dataset_summary,
+    notebook_edges,
+    scan_notebooks,
+)
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+NODE_TYPES = ("notebook", "file", "dataset", "group")
+# Numeric node attributes kept as one column each: int64 when every value is
+# an integer (``MISSING`` where a node has none), float64 otherwise (NaN).
+NUMERIC_ATTRIBUTES = tuple(dict.fromkeys(("files", "bytes", "mtime_ns") + RUNTIME_ATTRIBUTES))
+DATASET_ATTRIBUTES = ("files", "bytes", "mtime_ns")
+MISSING = np.iinfo(np.int64).min
+
+# Frontiers smaller than this are expanded node by node: on long chains of
+# single-node levels the fixed cost of each array call would dominate.
+NARROW_FRONTIER = 32
+
+
+def _csr(sources: np.ndarray, targets: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (indptr, indices) of the rows ``sources`` -> ``targets``, indices sorted within each row."""
+    order = np.lexsort((targets, sources))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+    return indptr, targets[order].astype(np.int32)
+
+
+def _gather(indptr: np.ndarray, indices: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Concatenate the CSR rows ``rows`` without a Python loop."""
+    starts, ends = indptr[rows], indptr[rows + 1]
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if not total:
+        return indices[:0]
+    offsets = np.repeat(ends - np.cumsum(lengths), lengths) + np.arange(total)
+    return indices[offsets]
+
+
+class CompactGraph:
+    """Immutable notebook ⇄ file graph over integer node ids.
+
+    ``names[i]`` is the node path of id ``i`` and ``ids`` maps back. Edge
+    ``columns`` (the columns a notebook reads from an input) are kept only
+    for edges that name columns; every other input edge reads all of them.
+    """
+
+    def __init__(
+        self,
+        names: List[str],
+        node_types: np.ndarray,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        edge_columns: Optional[Dict[Tuple[int, int], Tuple[str, ...]]] = None,
+        attributes: Optional[Dict[str, np.ndarray]] = None,
+    ) -> None:
+        n = len(names)
+        self.names = names
+        self.ids: Dict[str, int] = {name: idx for idx, name in enumerate(names)}
+        self.node_types = node_types.astype(np.uint8)
+        # DiGraph semantics: a repeated edge is stored once.
+        codes = np.unique(sources.astype(np.int64) * n + targets)
+        sources, targets = codes // max(n, 1), codes % max(n, 1)
+        self.out_indptr, self.out_indices = _csr(sources, targets, n)
+        self.in_indptr, self.in_indices = _csr(targets, sources, n)
+        self.edge_columns = edge_columns or {}
+        self.attributes = attributes or {}
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_networkx(cls, graph: nx.DiGraph) -> "CompactGraph":
+        """Convert a graph from ``build_graph`` (or ``collapse_file_nodes``)."""
+        names = list(graph.nodes)
+        ids = {name: idx for idx, name in enumerate(names)}
+        type_ids = {node_type: idx for idx, node_type in enumerate(NODE_TYPES)}
+        node_types = np.fromiter(
+            (type_ids[data.get("node_type", "file")] for _, data in graph.nodes(data=True)), np.uint8, len(names)
+        )
+        sources = np.fromiter((ids[src] for src, _ in graph.edges), np.int64, graph.number_of_edges())
+        targets = np.fromiter((ids[dst] for _, dst in graph.edges), np.int64, graph.number_of_edges())
+        edge_columns = {
+            (ids[src], ids[dst]): tuple(cols) for src, dst, cols in graph.edges(data="columns") if cols is not None
+        }
+        attributes = {}
+        for attr in NUMERIC_ATTRIBUTES:
+            values = dict(graph.nodes(data=attr))
+            present = [value for value in values.values() if value is not None]
+            if not present:
+                continue
+            if all(isinstance(value, int) for value in present):
+                missing, dtype = MISSING, np.int64
+            else:
+                missing, dtype = np.nan, np.float64
+            attributes[attr] = np.array([missing if values[name] is None else values[name] for name in names], dtype)
+        return cls(names, node_types, sources, targets, edge_columns, attributes)
+
+    @classmethod
+    def build(
+        cls,
+        project_root: Path,
+        cache: Optional[ScanCache] = None,
+        jobs: int = 1,
+        exclude_dirs: Iterable[str] = DEFAULT_EXCLUDE_DIRS,
+        stats: Optional[ExtractionStats] = None,
+    ) -> "CompactGraph":
+        """Build the same graph as ``build_graph`` without creating any networkx objects."""
+        results = scan_notebooks(project_root, cache, jobs, stats)
+        index = FileIndex(project_root, exclude_dirs)
+
+        names: List[str] = []
+        ids: Dict[str, int] = {}
+        types: List[int] = []
+        sources: List[int] = []
+        targets: List[int] = []
+        edge_columns: Dict[Tuple[int, int], Tuple[str, ...]] = {}
+
+        def intern(name: str, node_type: int) -> int:
+            idx = ids.get(name)
+            if idx is None:
+                idx = ids[name] = len(names)
+                names.append(name)
+                types.append(node_type)
+            elif node_type == dataset:
+                types[idx] = dataset  # a node any notebook uses as a dataset stays one
+            return idx
+
+        notebook, file, dataset = (NODE_TYPES.index(name) for name in ("notebook", "file", "dataset"))
+        for nb_node, (inputs, outputs, columns) in results.items():
+            edges, datasets = notebook_edges(nb_node, inputs, outputs, project_root, index, columns)
+            intern(nb_node, notebook)
+            for src, dst, used in edges:
+                src_id = intern(src, dataset if src in datasets else file)
+                dst_id = intern(dst, dataset if dst in datasets else file)
+                sources.append(src_id)
+                targets.append(dst_id)
+                if used is not None:
+                    edge_columns[(src_id, dst_id)] = tuple(used)
+
+        attributes = {}
+        dataset_ids = [idx for idx, node_type in enumerate(types) if node_type == dataset]
+        if dataset_ids:
+            for attr in DATASET_ATTRIBUTES:
+                attributes[attr] = np.full(len(names), MISSING, dtype=np.int64)
+            for idx in dataset_ids:
+                summary, _ = dataset_summary(names[idx], index, cache)
+                for attr in DATASET_ATTRIBUTES:
+                    if summary[attr] is not None:
+                        attributes[attr][idx] = summary[attr]
+
+        if cache is not None:
+            cache.prune(set(results))
+            cache.prune_datasets({names[idx] for idx in dataset_ids})
+            cache.save()
+
+        return cls(
+            names,
+            np.array(types, dtype=np.uint8),
+            np.array(sources, dtype=np.int64),
+            np.array(targets, dtype=np.int64),
+            edge_columns,
+            attributes,
+        )
+
+    def to_networkx(self) -> nx.DiGraph:
+        """Return an ``nx.DiGraph`` with the node and edge attributes ``build_graph`` sets."""
+        import networkx as nx
+
+        graph = nx.DiGraph()
+        notebook = NODE_TYPES.index("notebook")
+        for idx, name in enumerate(self.names):
+            data = {"node_type": NODE_TYPES[self.node_types[idx]], "label": name}
+            for attr, values in self.attributes.items():
+                value = values[idx].item()
+                if value != MISSING and value == value:  # NaN is the float columns' MISSING
+                    data[attr] = value
+            graph.add_node(name, **data)
+        for src in range(len(self.names)):
+            for dst in self.out_indices[self.out_indptr[src] : self.out_indptr[src + 1]].tolist():
+                if self.node_types[dst] == notebook:
+                    cols = self.edge_columns.get((src, dst))
+                    graph.add_edge(self.names[src], self.names[dst], columns=None if cols is None else list(cols))
+                else:
+                    graph.add_edge(self.names[src], self.names[dst])
+        return graph
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, node: object) -> bool:
+        return node in self.ids
+
+    @property
+    def number_of_edges(self) -> int:
+        return len(self.out_indices)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the adjacency, node type and attribute arrays."""
+        arrays = [self.node_types, self.out_indptr, self.out_indices, self.in_indptr, self.in_indices]
+        return sum(array.nbytes for array in arrays + list(self.attributes.values()))
+
+    def node_type(self, node: str) -> str:
+        return NODE_TYPES[self.node_types[self._id(node)]]
+
+    def _id(self, node: str) -> int:
+        try:
+            return self.ids[node]
+        except KeyError:
+            raise KeyError(f"Node {node!r} is not in the graph.") from None
+
+    def successors(self, node: str) -> List[str]:
+        idx = self._id(node)
+        return [self.names[i] for i in self.out_indices[self.out_indptr[idx] : self.out_indptr[idx + 1]].tolist()]
+
+    def predecessors(self, node: str) -> List[str]:
+        idx = self._id(node)
+        return [self.names[i] for i in self.in_indices[self.in_indptr[idx] : self.in_indptr[idx + 1]].tolist()]
+
+    def _reach(self, indptr: np.ndarray, indices: np.ndarray, start: int, depth: Optional[int]) -> np.ndarray:
+        """Return the hop count of every node reachable from ``start`` (-1 for the rest)."""
+        hops = np.full(len(self.names), -1, dtype=np.int32)
+        hops[start] = 0
+        frontier: Sequence[int] = [start]
+        level = 0
+        while len(frontier) and (depth is None or level < depth):
+            level += 1
+            if len(frontier) < NARROW_FRONTIER:
+                narrow = []
+                for node in frontier:
+                    for reached in indices[indptr[node] : indptr[node + 1]].tolist():
+                        if hops[reached] < 0:
+                            hops[reached] = level
+                            narrow.append(reached)
+                frontier = narrow
+            else:
+                reached = _gather(indptr, indices, np.asarray(frontier))
+                frontier = np.unique(reached[hops[reached] < 0])
+                hops[frontier] = level
+        hops[start] = -1
+        return hops
+
+    def _walk(
+        self, indptr: np.ndarray, indices: np.ndarray, node: str, depth: Optional[int], node_type: Optional[str]
+    ) -> List[Reached]:
+        hops = self._reach(indptr, indices, self._id(node), depth)
+        mask = hops >= 0
+        if node_type is not None:
+            mask &= self.node_types == NODE_TYPES.index(node_type)
+        found = np.flatnonzero(mask)
+        rows = [
+            (self.names[idx], NODE_TYPES[kind], hop if depth is not None else 0)
+            for idx, kind, hop in zip(found.tolist(), self.node_types[found].tolist(), hops[found].tolist())
+        ]
+        return sorted(rows, key=lambda row: (row[2], row[0]))
+
+    def upstream(self, node: str, depth: Optional[int] = None, node_type: Optional[str] = None) -> List[Reached]:
+        """Return (node, node_type, depth) for everything ``node`` depends on.
+
+        Same contract as ``LineageStore.upstream``: ``depth`` is the hop count
+        when a limit is given and 0 otherwise.
+        """
+        return self._walk(self.in_indptr, self.in_indices, node, depth, node_type)
+
+    def downstream(self, node: str, depth: Optional[int] = None, node_type: Optional[str] = None) -> List[Reached]:
+        """Return (node, node_type, depth) for everything derived from ``node``."""
+        return self._walk(self.out_indptr, self.out_indices, node, depth, node_type)
+
+    def topological_generations(self) -> List[List[str]]:
+        """Return nodes grouped so that every edge points to a later group.
+
+        Raises ValueError if the graph has a cycle.
+        """
+        indptr, indices = self.out_indptr, self.out_indices
+        in_degree = np.diff(self.in_indptr)
+        frontier: Sequence[int] = np.flatnonzero(in_degree == 0).tolist()
+        generations = []
+        placed = 0
+        while len(frontier):
+            generations.append(frontier)
+            placed += len(frontier)
+            if len(frontier) < NARROW_FRONTIER:
+                ready = []
+                for node in frontier:
+                    for reached in indices[indptr[node] : indptr[node + 1]].tolist():
+                        in_degree[reached] -= 1
+                        if not in_degree[reached]:
+                            ready.append(reached)
+                frontier = sorted(ready)
+            else:
+                reached, counts = np.unique(_gather(indptr, indices, np.asarray(frontier)), return_counts=True)
+                in_degree[reached] -= counts
+                frontier = reached[in_degree[reached] == 0].tolist()
+        if placed != len(self.names):
+            raise ValueError("Graph contains a cycle; no topological order exists.")
+        return [[self.names[idx] for idx in generation] for generation in generations]
+
+    def topological_sort(self) -> List[str]:
+        return [node for generation in self.topological_generations() for node in generation]
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Query the pipeline graph through the compact array backend.")
+    parser.add_argument("--root", type=Path, default=Path("."), help="Project root containing notebooks/.")
+    parser.add_argument("--no-cache", action="store_true", help="Scan every notebook without the scan cache.")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes for notebooks that need scanning.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command, help_text in (
+        ("upstream", "Everything the node depends on."),
+        ("downstream", "Everything derived from the node."),
+    ):
+        sub = commands.add_parser(command, help=help_text)
+        sub.add_argument("node", help="File or notebook node.")
+        sub.add_argument("--depth", type=int, default=None, help="Maximum hops (default: unlimited).")
+        sub.add_argument("--type", dest="node_type", choices=NODE_TYPES, default=None, help="Only list this type.")
+    commands.add_parser("order", help="Notebooks in an order that respects every dependency.")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    cache = None if args.no_cache else ScanCache.load(args.root / DEFAULT_CACHE_PATH)
+    graph = CompactGraph.build(args.root, cache=cache, jobs=args.jobs)
+    print(
+        f"📦 {len(graph)} nodes, {graph.number_of_edges} edges in {graph.nbytes / 1024:.1f} KiB of arrays "
+        f"({(time.perf_counter() - started) * 1000:.1f} ms)"
+    )
+
+    started = time.perf_counter()
+    if args.command == "order":
+        try:
+            order = graph.topological_sort()
+        except ValueError as exc:
+            print(f"❌ {exc}")
+            sys.exit(1)
+        notebooks = [node for node in order if graph.node_type(node) == "notebook"]
+        print(f"🔢 Run order: {len(notebooks)} notebook(s)")
+        for position, node in enumerate(notebooks, 1):
+            print(f"{position:>5}  {node}")
+    else:
+        try:
+            rows = getattr(graph, args.command)(args.node, depth=args.depth, node_type=args.node_type)
+        except KeyError as exc:
+            print(f"❌ {exc.args[0]}")
+            sys.exit(1)
+        arrow = "⬆️ " if args.command == "upstream" else "⬇️ "
+        print_rows(f"{arrow} {args.command} of {args.node}", rows, show_depth=args.depth is not None)
+    print(f"({(time.perf_counter() - started) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
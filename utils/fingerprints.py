@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+"""
+Content fingerprints for pipeline graph nodes and output staleness.
+
+Features
+--------
+* Keeps a fingerprint (mtime, size, SHA-256, version) per file and notebook
+  node in ``.pipeline_graph/fingerprints.sqlite``.
+* A node is hashed when first seen and afterwards only when its ``stat``
+  data changed, so large data trees cost one ``stat`` per node on an
+  unchanged run; a touched file whose hash matches keeps its version.
+* Glob patterns and directories (partitioned datasets) are fingerprinted from
+  the names, sizes and mtimes of their files, without reading contents;
+  directories skip the same ``_``/``.`` entries as ``scan_dataset``.
+* ``stale_outputs`` lists every output whose notebook or inputs changed since
+  the output was last written, propagating through intermediate outputs.
+
+Used by ``pipeline_graph.py --stale``.
+"""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import os
+import sqlite3
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from pipeline_graph import DATASET_IGNORE_PREFIXES, FileIndex, file_digest
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+DEFAULT_FINGERPRINT_PATH = Path(".pipeline_graph") / "fingerprints.sqlite"
+# src.intermediates.write_intermediate may store "x.parquet" as "x.arrow".
+INTERMEDIATE_SUFFIXES = (".parquet", ".arrow", ".feather")
+# Recorded instead of an input's version when it was already newer than the
+# output the first time that output was seen.
+CHANGED_BEFORE_FIRST_SEEN = -1
+# Reason reported for an output that does not exist.
+MISSING = "missing"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    node TEXT PRIMARY KEY,
+    mtime_ns INTEGER,
+    size INTEGER,
+    sha256 TEXT,
+    version INTEGER NOT NULL
+);
+-- Input versions each output was built from, recorded whenever the output
+-- is first seen or rewritten.
+CREATE TABLE IF NOT EXISTS builds (
+    output TEXT NOT NULL,
+    input TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (output, input)
+) WITHOUT ROWID;
+"""
+
+
+def node_files(path: Path) -> List[Path]:
+    """Return the existing files behind a node: glob matches, a directory's files, or the file itself.
+
+    A directory skips entries named with one of ``DATASET_IGNORE_PREFIXES``
+    (manifests, commit records, locks, staged parts), as ``scan_dataset``
+    does. A missing ``.parquet``/``.arrow``/``.feather`` file falls back to
+    its sibling with one of the other suffixes.
+    """
+    if glob.has_magic(str(path)):
+        return sorted(Path(match) for match in glob.glob(str(path), recursive=True) if os.path.isfile(match))
+    if path.is_dir():
+        files = []
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = [name for name in dirnames if not name.startswith(DATASET_IGNORE_PREFIXES)]
+            files.extend(Path(dirpath) / name for name in filenames if not name.startswith(DATASET_IGNORE_PREFIXES))
+        return sorted(files)
+    candidates = [path]
+    if path.suffix in INTERMEDIATE_SUFFIXES:
+        candidates += [path.with_suffix(suffix) for suffix in INTERMEDIATE_SUFFIXES if suffix != path.suffix]
+    for candidate in candidates:
+        if candidate.is_file():
+            return [candidate]
+    return []
+
+
+class Fingerprint:
+    """Current state of a node after ``FingerprintDB.refresh``."""
+
+    __slots__ = ("version", "mtime_ns", "touched", "changed")
+
+    def __init__(self, version: int, mtime_ns: Optional[int], touched: bool, changed: bool) -> None:
+        self.version = version
+        self.mtime_ns = mtime_ns  # newest mtime of the node's files; None when missing
+        self.touched = touched  # stat data differs from the previous refresh (or first refresh)
+        self.changed = changed  # content changed since the previous refresh
+
+
+class FingerprintDB:
+    """SQLite table of node fingerprints plus the input versions behind each output."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.hashed = 0
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self) -> "FingerprintDB":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def refresh(self, node: str, path: Path) -> Fingerprint:
+        """Update and return the fingerprint of ``node`` stored at ``path``.
+
+        The stored version only moves when the content changed: a single file
+        is re-hashed (in chunks) when its mtime or size differs, and a file set
+        is compared by its listing of names, sizes and mtimes.
+        """
+        files = node_files(path)
+        stats = [(file, file.stat()) for file in files]
+        mtime_ns = max((stat.st_mtime_ns for _, stat in stats), default=None)
+        size = sum(stat.st_size for _, stat in stats) if stats else None
+
+        row = self.conn.execute(
+            "SELECT mtime_ns, size, sha256, version FROM fingerprints WHERE node = ?", (node,)
+        ).fetchone()
+        if row is not None and (row[0], row[1]) == (mtime_ns, size):
+            return Fingerprint(row[3], mtime_ns, touched=False, changed=False)
+
+        if not stats:
+            sha256 = None
+        elif len(stats) == 1 and not path.is_dir() and not glob.has_magic(str(path)):
+            # Read on first sighting, so a later touch can be told from an edit,
+            # and afterwards only when the file's stat data changed.
+            sha256 = file_digest(files[0])
+            self.hashed += 1
+        else:
+            listing = "\n".join(f"{file}\t{stat.st_size}\t{stat.st_mtime_ns}" for file, stat in stats)
+            sha256 = hashlib.sha256(listing.encode("utf-8")).hexdigest()
+
+        if row is None:
+            version, changed = 1, False
+        elif sha256 is not None and sha256 == row[2]:
+            version, changed = row[3], False  # touched, content unchanged
+        else:
+            version, changed = row[3] + 1, True
+        self.conn.execute(
+            "INSERT OR REPLACE INTO fingerprints (node, mtime_ns, size, sha256, version) VALUES (?, ?, ?, ?, ?)",
+            (node, mtime_ns, size, sha256, version),
+        )
+        return Fingerprint(version, mtime_ns, touched=True, changed=changed)
+
+    def build_inputs(self, output: str) -> Dict[str, int]:
+        """Return the recorded {input: version} for ``output`` (empty if never recorded)."""
+        return dict(self.conn.execute("SELECT input, version FROM builds WHERE output = ?", (output,)))
+
+    def record_build(self, output: str, versions: Dict[str, int]) -> None:
+        self.conn.execute("DELETE FROM builds WHERE output = ?", (output,))
+        self.conn.executemany(
+            "INSERT INTO builds (output, input, version) VALUES (?, ?, ?)",
+            [(output, node, version) for node, version in sorted(versions.items())],
+        )
+
+    def prune(self, live_nodes: List[str]) -> None:
+        """Drop fingerprints and build records of nodes no longer in the graph."""
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS live (node TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM live")
+        self.conn.executemany("INSERT OR IGNORE INTO live (node) VALUES (?)", [(node,) for node in live_nodes])
+        self.conn.execute("DELETE FROM fingerprints WHERE node NOT IN (SELECT node FROM live)")
+        self.conn.execute("DELETE FROM builds WHERE output NOT IN (SELECT node FROM live)")
+
+
+def _producers_inputs(graph: nx.DiGraph, output: str) -> List[str]:
+    """Return the notebooks writing ``output`` and the files those notebooks read."""
+    inputs = set()
+    for notebook in graph.predecessors(output):
+        inputs.add(notebook)
+        inputs.update(node for node in graph.predecessors(notebook) if node != output)
+    return sorted(inputs)
+
+
+def stale_outputs(graph: nx.DiGraph, index: FileIndex, db: FingerprintDB) -> Dict[str, List[str]]:
+    """Return {output: reasons} for every output that is out of date, without running anything.
+
+    An output is stale when it is missing, when its producing notebook or one
+    of that notebook's inputs changed since the output was last written, or
+    when one of those inputs is itself a stale output. When an output is
+    first seen, or has been rewritten, its inputs are compared make-style:
+    any input already newer than the output counts as changed. Raises
+    ValueError if the graph has a cycle.
+    """
+    import networkx as nx
+
+    try:
+        order = list(nx.topological_sort(graph))
+    except nx.NetworkXUnfeasible as exc:
+        raise ValueError("The pipeline graph contains a cycle; staleness is undefined.") from exc
+
+    state = {node: db.refresh(node, index.path_for(node)) for node in order}
+    stale: Dict[str, List[str]] = {}
+    for node in order:
+        if graph.nodes[node]["node_type"] == "notebook" or graph.in_degree(node) == 0:
+            continue
+        current = state[node]
+        if current.mtime_ns is None:
+            stale[node] = [MISSING]
+            continue
+
+        inputs = _producers_inputs(graph, node)
+        recorded = db.build_inputs(node)
+        if current.touched or not recorded:
+            # First sighting or rewritten since the last check: this is the new
+            # baseline, even when the rewrite produced identical content.
+            recorded = {}
+            for name in inputs:
+                newer = state[name].mtime_ns is not None and state[name].mtime_ns > current.mtime_ns
+                recorded[name] = CHANGED_BEFORE_FIRST_SEEN if newer else state[name].version
+            db.record_build(node, recorded)
+
+        reasons = [name for name in inputs if recorded.get(name) != state[name].version or name in stale]
+        if reasons:
+            stale[node] = reasons
+    db.prune(order)
+    db.conn.commit()
+    return stale
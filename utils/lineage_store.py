@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+"""
+Persistent lineage store for the pipeline graph.
+
+Features
+--------
+* Keeps the notebook ⇄ file graph from `pipeline_graph.build_graph` in an
+  indexed SQLite database (``.pipeline_graph/lineage.sqlite``).
+* Syncs incrementally: only notebooks whose edges changed are rewritten.
+* Answers upstream, downstream and impact questions with recursive SQL
+  queries, without rebuilding the graph or importing networkx.
+
+Usage
+-----
+python lineage_store.py downstream data/customers.csv --type notebook --depth 1
+python lineage_store.py upstream output/report.csv
+python lineage_store.py impact output/clean.parquet --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+DEFAULT_LINEAGE_PATH = Path(".pipeline_graph") / "lineage.sqlite"
+# Bump whenever the schema changes; older stores are rebuilt from scratch.
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    node_type TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS edges (
+    src INTEGER NOT NULL,
+    dst INTEGER NOT NULL,
+    columns TEXT,
+    PRIMARY KEY (src, dst)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS edges_by_dst ON edges (dst, src);
+-- One row per notebook: a digest of its edges, so unchanged notebooks are skipped on sync.
+CREATE TABLE IF NOT EXISTS notebooks (
+    node_id INTEGER PRIMARY KEY,
+    signature TEXT NOT NULL
+);
+"""
+
+# {direction: (column joined from, column reached)}; depth is tracked only
+# when a limit is given, otherwise each node is visited once.
+_DIRECTIONS = {"downstream": ("src", "dst"), "upstream": ("dst", "src")}
+
+# (node, node_type, depth)
+Reached = Tuple[str, str, int]
+
+
+Edge = Tuple[str, str, Optional[str]]
+
+
+def _notebook_edges(graph: nx.DiGraph, nb_node: str) -> List[Edge]:
+    edges = []
+    for src, data in graph.pred[nb_node].items():
+        cols = data.get("columns")
+        edges.append((src, nb_node, None if cols is None else json.dumps(cols)))
+    edges.sort()
+    edges.extend((nb_node, dst, None) for dst in sorted(graph.succ[nb_node]))
+    return edges
+
+
+def _signature(edges: List[Edge], node_types: Dict[str, str]) -> str:
+    payload = "\n".join(
+        f"{src}\t{node_types[src]}\t{dst}\t{node_types[dst]}\t{cols}" for src, dst, cols in edges
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class LineageStore:
+    """SQLite-backed copy of the pipeline graph, queried with recursive CTEs.
+
+    Every edge joins a notebook and a file, so edges are owned by their
+    notebook: ``sync`` compares a per-notebook digest and only rewrites the
+    edges of notebooks that were added, changed or removed.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        version = self._schema_version()
+        if version is not None and version != SCHEMA_VERSION:
+            self.conn.executescript(
+                "DROP TABLE IF EXISTS edges; DROP TABLE IF EXISTS notebooks; "
+                "DROP TABLE IF EXISTS nodes; DROP TABLE IF EXISTS meta;"
+            )
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),)
+        )
+        self.conn.commit()
+
+    def _schema_version(self) -> Optional[int]:
+        try:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return int(row[0]) if row else None
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "LineageStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+    def sync(self, graph: nx.DiGraph) -> Dict[str, int]:
+        """Bring the store in line with ``graph``; return counts of notebooks added/updated/removed."""
+        node_types: Dict[str, str] = dict(graph.nodes(data="node_type"))
+        current: Dict[str, Tuple[str, List[Edge]]] = {}
+        for node, node_type in node_types.items():
+            if node_type == "notebook":
+                edges = _notebook_edges(graph, node)
+                current[node] = (_signature(edges, node_types), edges)
+
+        stored = dict(
+            self.conn.execute("SELECT n.name, s.signature FROM notebooks s JOIN nodes n ON n.id = s.node_id")
+        )
+        changed = [node for node, (signature, _) in current.items() if stored.get(node) != signature]
+        removed = [node for node in stored if node not in current]
+        counts = {
+            "added": sum(node not in stored for node in changed),
+            "updated": sum(node in stored for node in changed),
+            "removed": len(removed),
+        }
+        if not changed and not removed:
+            return counts
+
+        with self.conn:
+            ids = dict(self.conn.execute("SELECT name, id FROM nodes"))
+            stale = [(ids[node],) for node in changed + removed if node in ids]
+            # Files that may be left without edges once these notebooks are rewritten.
+            candidates = {row for (node_id,) in stale for row in self._neighbours(node_id)}
+            candidates.update(node_id for (node_id,) in stale)
+            self.conn.executemany("DELETE FROM edges WHERE src = ?", stale)
+            self.conn.executemany("DELETE FROM edges WHERE dst = ?", stale)
+            self.conn.executemany("DELETE FROM notebooks WHERE node_id = ?", stale)
+
+            names = set(changed)
+            for node in changed:
+                for src, dst, _ in current[node][1]:
+                    names.update((src, dst))
+            self.conn.executemany(
+                "INSERT INTO nodes (name, node_type) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET node_type = excluded.node_type",
+                [(name, node_types[name]) for name in sorted(names)],
+            )
+            ids = dict(self.conn.execute("SELECT name, id FROM nodes"))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO edges (src, dst, columns) VALUES (?, ?, ?)",
+                [(ids[src], ids[dst], cols) for node in changed for src, dst, cols in current[node][1]],
+            )
+            self.conn.executemany(
+                "INSERT INTO notebooks (node_id, signature) VALUES (?, ?)",
+                [(ids[node], current[node][0]) for node in changed],
+            )
+            # Removed notebooks and files no longer linked to anything.
+            self.conn.executemany(
+                "DELETE FROM nodes WHERE id = :id AND NOT EXISTS (SELECT 1 FROM notebooks WHERE node_id = :id) "
+                "AND NOT EXISTS (SELECT 1 FROM edges WHERE src = :id) "
+                "AND NOT EXISTS (SELECT 1 FROM edges WHERE dst = :id)",
+                [{"id": node_id} for node_id in sorted(candidates)],
+            )
+        return counts
+
+    def _neighbours(self, node_id: int) -> List[int]:
+        rows = self.conn.execute(
+            "SELECT dst FROM edges WHERE src = ? UNION SELECT src FROM edges WHERE dst = ?", (node_id, node_id)
+        )
+        return [row[0] for row in rows]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def resolve(self, name: str) -> str:
+        """Return the stored node for ``name``: an exact match, or the single node ending in ``/name``.
+
+        Raises KeyError when nothing or more than one node matches.
+        """
+        row = self.conn.execute("SELECT name FROM nodes WHERE name = ?", (name,)).fetchone()
+        if row:
+            return row[0]
+        escaped = name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        matches = [
+            row[0]
+            for row in self.conn.execute(
+                "SELECT name FROM nodes WHERE name LIKE ? ESCAPE '\\' ORDER BY name", (f"%/{escaped}",)
+            )
+        ]
+        if len(matches) == 1:
+            return matches[0]
+        if matches:
+            raise KeyError(f"{name!r} is ambiguous: {', '.join(matches)}")
+        raise KeyError(f"Node {name!r} is not in the lineage store.")
+
+    def _walk(
+        self, direction: str, node: str, depth: Optional[int] = None, node_type: Optional[str] = None
+    ) -> List[Reached]:
+        joined, reached = _DIRECTIONS[direction]
+        start = self.conn.execute("SELECT id FROM nodes WHERE name = ?", (node,)).fetchone()
+        if start is None:
+            raise KeyError(f"Node {node!r} is not in the lineage store.")
+        if depth is None:
+            # UNION de-duplicates on id alone, so every node is expanded once.
+            sql = f"""
+                WITH RECURSIVE reach(id) AS (
+                    SELECT {reached} FROM edges WHERE {joined} = :start
+                    UNION
+                    SELECT e.{reached} FROM edges e JOIN reach r ON e.{joined} = r.id
+                )
+                SELECT n.name, n.node_type, 0 FROM reach r JOIN nodes n ON n.id = r.id
+                WHERE r.id != :start
+            """
+        else:
+            sql = f"""
+                WITH RECURSIVE reach(id, depth) AS (
+                    SELECT {reached}, 1 FROM edges WHERE {joined} = :start
+                    UNION
+                    SELECT e.{reached}, r.depth + 1 FROM edges e JOIN reach r ON e.{joined} = r.id
+                    WHERE r.depth < :depth
+                )
+                SELECT n.name, n.node_type, MIN(r.depth) FROM reach r JOIN nodes n ON n.id = r.id
+                WHERE r.id != :start GROUP BY r.id
+            """
+        rows = self.conn.execute(sql, {"start": start[0], "depth": depth}).fetchall()
+        if node_type is not None:
+            rows = [row for row in rows if row[1] == node_type]
+        return sorted(rows, key=lambda row: (row[2], row[0]))
+
+    def upstream(self, node: str, depth: Optional[int] = None, node_type: Optional[str] = None) -> List[Reached]:
+        """Return (node, node_type, depth) for everything ``node`` depends on.
+
+        ``depth`` is the hop count when a limit is given and 0 otherwise.
+        """
+        return self._walk("upstream", node, depth, node_type)
+
+    def downstream(self, node: str, depth: Optional[int] = None, node_type: Optional[str] = None) -> List[Reached]:
+        """Return (node, node_type, depth) for everything derived from ``node``."""
+        return self._walk("downstream", node, depth, node_type)
+
+    def impact(self, node: str) -> Dict[str, List[str]]:
+        """Summarise what a change to ``node`` affects.
+
+        ``direct`` lists the nodes one hop downstream (the notebooks reading a
+        file, or the files a notebook writes), ``notebooks`` every notebook that
+        would need to re-run (including ``node`` itself) and ``files`` every
+        file they rewrite.
+        """
+        reached = self.downstream(node)
+        notebooks = [name for name, kind, _ in reached if kind == "notebook"]
+        row = self.conn.execute("SELECT node_type FROM nodes WHERE name = ?", (node,)).fetchone()
+        if row is not None and row[0] == "notebook":
+            notebooks.insert(0, node)
+        direct = [name for name, _, _ in self.downstream(node, depth=1)]
+        return {
+            "direct": direct,
+            "notebooks": notebooks,
+            "files": [name for name, kind, _ in reached if kind != "notebook"],
+        }
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of stored nodes per type and of edges."""
+        counts = dict(self.conn.execute("SELECT node_type, COUNT(*) FROM nodes GROUP BY node_type"))
+        counts["edges"] = self.conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+        return counts
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def print_rows(title: str, rows: Iterable[Reached], show_depth: bool) -> None:
+    """Print query results as ``node_type name`` lines, with depths when ``show_depth``."""
+    rows = list(rows)
+    print(f"{title}: {len(rows)} node(s)")
+    for name, node_type, depth in rows:
+        prefix = f"{depth:>3}  " if show_depth else "  "
+        print(f"{prefix}{node_type:<9} {name}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Query the persisted pipeline lineage.")
+    parser.add_argument(
+        "--root",
+        type=Path,
+        default=Path("."),
+        help="Project root containing the .pipeline_graph/ folder.",
+    )
+    parser.add_argument(
+        "--db",
+        type=Path,
+        default=None,
+        help=f"Lineage database (default: <root>/{DEFAULT_LINEAGE_PATH.as_posix()}).",
+    )
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--json", action="store_true", help="Print the result as JSON.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command, help_text in (
+        ("upstream", "Everything the node depends on."),
+        ("downstream", "Everything derived from the node."),
+        ("impact", "Notebooks to re-run and files rewritten if the node changes."),
+    ):
+        sub = commands.add_parser(command, help=help_text, parents=[output])
+        sub.add_argument("node", help="File or notebook node, or a unique trailing part such as a filename.")
+        if command != "impact":
+            sub.add_argument("--depth", type=int, default=None, help="Maximum hops (default: unlimited).")
+            sub.add_argument(
+                "--type",
+                dest="node_type",
+                choices=("notebook", "file", "dataset"),
+                default=None,
+                help="Only list this type.",
+            )
+    args = parser.parse_args(argv)
+
+    db_path = args.db or args.root / DEFAULT_LINEAGE_PATH
+    if not db_path.exists():
+        parser.error(f"{db_path} does not exist; run utils/pipeline_graph.py first to build it.")
+
+    started = time.perf_counter()
+    with LineageStore(db_path) as store:
+        try:
+            node = store.resolve(args.node)
+        except KeyError as exc:
+            print(f"❌ {exc.args[0]}")
+            sys.exit(1)
+        if args.command == "impact":
+            result = store.impact(node)
+        else:
+            result = getattr(store, args.command)(node, depth=args.depth, node_type=args.node_type)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if args.json:
+        if args.command != "impact":
+            result = [{"node": name, "node_type": kind, "depth": depth} for name, kind, depth in result]
+        print(json.dumps({"node": node, args.command: result}, indent=2))
+        return
+
+    if args.command == "impact":
+        print(f"💥 Changing {node} affects:")
+        for key, label in (("direct", "directly"), ("notebooks", "notebooks to re-run"), ("files", "files rewritten")):
+            print(f"  {label} ({len(result[key])}): {', '.join(result[key]) or '—'}")
+    else:
+        arrow = "⬆️ " if args.command == "upstream" else "⬇️ "
+        print_rows(f"{arrow} {args.command} of {node}", result, show_depth=args.depth is not None)
+    print(f"({elapsed_ms:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
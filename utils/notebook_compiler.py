@@ -0,0 +1,424 @@
+#!/usr/bin/env python
+"""
+Compile notebooks to cached Python bytecode and run them without a kernel.
+
+Features
+--------
+* Reads code cells with `pipeline_graph.iter_code_cells`, the same iteration
+  the graph scanner uses.
+* Translates IPython syntax: ``%time``/``%timeit``/``%prun`` run their
+  statement once, ``%env`` and ``%cd`` become ``os`` calls, ``%run x.py``
+  runs the script with ``runpy`` and merges its globals, ``!cmd`` and
+  ``%%bash`` run through ``subprocess``, ``%%writefile`` writes its file and
+  display-only magics are dropped. Anything else is rejected with a
+  ``NotebookCompileError`` instead of being silently skipped.
+* Caches the compiled bytecode in ``.pipeline_graph/compiled/``, keyed on the
+  notebook's SHA-256 and the interpreter, and keeps loaded notebooks in
+  memory, so a warm worker compiles each notebook once.
+* ``CompiledNotebook.run(**params)`` executes the cells in a fresh namespace.
+  A parameter replaces the notebook's first top-level assignment to that
+  name (usually a defaults cell at the top), papermill-style.
+* ``--sweep`` runs one notebook over many parameter sets in warm worker
+  processes.
+
+Usage
+-----
+python notebook_compiler.py notebooks/model.ipynb -p alpha=0.1 -p label=test
+python notebook_compiler.py notebooks/model.ipynb --sweep output/params.jsonl --jobs 8
+python notebook_compiler.py notebooks/model.ipynb --show   # print the translated source
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import marshal
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from types import CodeType
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from pipeline_graph import PYTHON_CELL_MAGICS, file_digest, iter_code_cells
+
+DEFAULT_COMPILED_DIR = Path(".pipeline_graph") / "compiled"
+# Bump whenever the translation or the assigned-name analysis changes so cached
+# cells are recompiled.
+COMPILER_VERSION = 3
+
+# Line magics that only affect display or the interactive session.
+IGNORED_LINE_MAGICS = {
+    "matplotlib", "config", "load_ext", "reload_ext", "unload_ext", "autoreload", "aimport",
+    "precision", "pprint", "who", "whos", "who_ls", "pinfo", "pinfo2", "pwd", "history", "lsmagic",
+}
+# Line magics that run the rest of the line as a Python statement.
+STATEMENT_LINE_MAGICS = {"time", "timeit", "prun"}
+# Cell magics whose output is only displayed.
+IGNORED_CELL_MAGICS = {"html", "javascript", "js", "markdown", "latex", "svg"}
+SHELL_CELL_MAGICS = {"bash": "bash", "sh": "sh"}
+
+# ``%timeit`` options, of which -n/-r/-p take a value.
+_TIMEIT_OPTIONS = re.compile(r"^(?:-[nrp]\s*\d+\s+|-[tcqo]\s+)*")
+_ENV_ASSIGNMENT = re.compile(r"^(\w+)\s*[= ]\s*(.*)$")
+_SHELL_ASSIGNMENT = re.compile(r"^([A-Za-z_]\w*)\s*=\s*!(.*)$")
+# ``%run [-i] script.py``; arguments, other options and notebooks are not supported.
+_RUN_SCRIPT = re.compile(r"^(?:-i\s+)?(\S+\.py)$")
+
+
+class NotebookCompileError(ValueError):
+    """A notebook uses syntax that cannot run outside an IPython kernel."""
+
+
+# ---------------------------------------------------------------------------
+# Magic translation
+# ---------------------------------------------------------------------------
+def _shell_command(command: str) -> str:
+    # IPython expands {expr} in shell commands; an f-string does the same.
+    literal = repr(command.strip())
+    return f"f{literal}" if "{" in command else literal
+
+
+def _translate_line_magic(line: str) -> str:
+    name, _, rest = line[1:].partition(" ")
+    rest = rest.strip()
+    if name in STATEMENT_LINE_MAGICS:
+        return (_TIMEIT_OPTIONS.sub("", rest) if name == "timeit" else rest) or "pass"
+    if name == "env":
+        match = _ENV_ASSIGNMENT.match(rest)
+        if match is None:
+            return "pass"  # %env without an assignment only prints
+        return f"__import__('os').environ[{match.group(1)!r}] = {match.group(2).strip()!r}"
+    if name == "cd":
+        return f"__import__('os').chdir({rest!r})"
+    if name == "run":
+        match = _RUN_SCRIPT.match(rest)
+        if match is None:
+            raise NotebookCompileError(f"%run {rest} is not supported outside a kernel; only %run <script>.py is")
+        # The script sees the notebook's names and its globals are merged back, as in a kernel.
+        run = f"__import__('runpy').run_path({match.group(1)!r}, init_globals=globals(), run_name='__main__')"
+        return f"globals().update({{_k: _v for _k, _v in {run}.items() if not _k.startswith('__')}})"
+    if name in IGNORED_LINE_MAGICS:
+        return "pass"
+    raise NotebookCompileError(f"%{name} is not supported outside a kernel")
+
+
+def translate_cell(src: str) -> str:
+    """Return ``src`` as plain Python, with IPython magics and shell escapes translated.
+
+    Raises NotebookCompileError for magics whose effect cannot be reproduced.
+    """
+    lines = src.splitlines()
+    first = lines[0].strip() if lines else ""
+    if first.startswith("%%"):
+        magic, _, args = first[2:].partition(" ")
+        body = "\n".join(lines[1:])
+        if magic in PYTHON_CELL_MAGICS:
+            lines = lines[1:]
+        elif magic in SHELL_CELL_MAGICS:
+            return (
+                f"__import__('subprocess').run([{SHELL_CELL_MAGICS[magic]!r}, '-c', {body!r}], check=True)\n"
+            )
+        elif magic == "writefile":
+            append = args.split()[:1] == ["-a"]
+            target = args.split(maxsplit=1)[-1] if append else args.strip()
+            mode = "a" if append else "w"
+            return (
+                f"with open({target!r}, {mode!r}, encoding='utf-8') as _nb_file:\n"
+                f"    _nb_file.write({body + chr(10)!r})\n"
+            )
+        elif magic in IGNORED_CELL_MAGICS:
+            return ""
+        else:
+            raise NotebookCompileError(f"%%{magic} cells are not supported outside a kernel")
+
+    translated = []
+    for line in lines:
+        stripped = line.lstrip()
+        indent = line[: len(line) - len(stripped)]
+        shell_assignment = _SHELL_ASSIGNMENT.match(stripped)
+        if stripped.startswith("!"):
+            stripped = f"__import__('subprocess').run({_shell_command(stripped[1:])}, shell=True, check=True)"
+        elif shell_assignment is not None:
+            command = _shell_command(shell_assignment.group(2))
+            stripped = (
+                f"{shell_assignment.group(1)} = __import__('subprocess').run({command}, shell=True, check=True, "
+                "capture_output=True, text=True).stdout.splitlines()"
+            )
+        elif stripped.startswith("%"):
+            stripped = _translate_line_magic(stripped)
+        translated.append(indent + stripped)
+    return "\n".join(translated)
+
+
+def _bound_names(target: ast.expr) -> Iterator[str]:
+    """Names an assignment target binds, through tuple/list/starred unpacking.
+
+    ``summary[key] = ...`` and ``obj.attr = ...`` bind nothing: their bases
+    and indexes are only read.
+    """
+    if isinstance(target, ast.Name):
+        yield target.id
+    elif isinstance(target, (ast.Tuple, ast.List)):
+        for element in target.elts:
+            yield from _bound_names(element)
+    elif isinstance(target, ast.Starred):
+        yield from _bound_names(target.value)
+
+
+def _assigned_names(tree: ast.Module) -> FrozenSet[str]:
+    """Names bound by top-level assignments in a cell."""
+    names = set()
+    for statement in tree.body:
+        if isinstance(statement, ast.Assign):
+            targets = statement.targets
+        elif isinstance(statement, (ast.AnnAssign, ast.AugAssign)):
+            targets = [statement.target]
+        else:
+            continue
+        for target in targets:
+            names.update(_bound_names(target))
+    return frozenset(names)
+
+
+# ---------------------------------------------------------------------------
+# Compilation and caching
+# ---------------------------------------------------------------------------
+# (code object, names assigned at top level) per code cell.
+CompiledCell = Tuple[CodeType, FrozenSet[str]]
+
+
+class CompiledNotebook:
+    """A notebook's code cells as bytecode, runnable many times in one process."""
+
+    def __init__(self, path: Path, cells: List[CompiledCell], from_cache: bool = False) -> None:
+        self.path = path
+        self.cells = cells
+        self.from_cache = from_cache  # loaded from the bytecode cache rather than compiled
+
+    def run(self, **params: Any) -> Dict[str, Any]:
+        """Execute the notebook and return its final namespace.
+
+        Each parameter is injected right after the first cell that assigns
+        it at top level, or before the first cell if no cell does. Cells run
+        in the notebook's directory, like a kernel started by ``pipeline_run``;
+        the working directory is process-wide, so runs in one process must not
+        overlap.
+        """
+        namespace: Dict[str, Any] = {"__name__": "__main__", "__file__": str(self.path), "display": print}
+        assigned = set().union(*(names for _, names in self.cells))
+        pending = {name: value for name, value in params.items() if name in assigned}
+        namespace.update({name: value for name, value in params.items() if name not in assigned})
+
+        previous_cwd = os.getcwd()
+        directory = str(self.path.parent)
+        os.chdir(directory)
+        sys.path.insert(0, directory)
+        try:
+            for code, names in self.cells:
+                exec(code, namespace)
+                for name in names & pending.keys():
+                    namespace[name] = pending.pop(name)
+        finally:
+            os.chdir(previous_cwd)
+            if directory in sys.path:
+                sys.path.remove(directory)
+        return namespace
+
+
+def compile_cells(nb_path: Path) -> List[CompiledCell]:
+    """Translate and compile every code cell of a notebook.
+
+    Raises NotebookCompileError when a cell uses unsupported IPython syntax
+    and SyntaxError when the translated source is not valid Python.
+    """
+    cells = []
+    for number, src in enumerate(iter_code_cells(nb_path), start=1):
+        try:
+            source = translate_cell(src)
+        except NotebookCompileError as exc:
+            raise NotebookCompileError(f"{nb_path} cell {number}: {exc}") from None
+        filename = f"{nb_path}#cell{number}"
+        tree = ast.parse(source, filename)
+        cells.append((compile(tree, filename, "exec", dont_inherit=True), _assigned_names(tree)))
+    return cells
+
+
+def _cache_file(cache_dir: Path, nb_path: Path, digest: str) -> Path:
+    tag = sys.implementation.cache_tag
+    return cache_dir / f"{nb_path.stem}-{digest[:24]}.v{COMPILER_VERSION}.{tag}.marshal"
+
+
+# Notebooks loaded in this process: {resolved path: ((mtime_ns, size), notebook)}.
+_LOADED: Dict[Path, Tuple[Tuple[int, int], CompiledNotebook]] = {}
+
+
+def load_notebook(nb_path: Path, cache_dir: Optional[Path] = None) -> CompiledNotebook:
+    """Return a notebook compiled to bytecode, reusing earlier compilations.
+
+    A notebook already loaded in this process is returned as is while its
+    mtime and size are unchanged. Otherwise the bytecode is read from
+    ``cache_dir`` when an entry for the notebook's content hash exists, or
+    compiled and written there atomically.
+    """
+    nb_path = nb_path.resolve()
+    stat = nb_path.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+    loaded = _LOADED.get(nb_path)
+    if loaded is not None and loaded[0] == key:
+        return loaded[1]
+
+    notebook = None
+    cache_file = _cache_file(cache_dir, nb_path, file_digest(nb_path)) if cache_dir is not None else None
+    if cache_file is not None and cache_file.exists():
+        try:
+            notebook = CompiledNotebook(nb_path, marshal.loads(cache_file.read_bytes()), from_cache=True)
+        except (EOFError, ValueError, TypeError):
+            notebook = None  # truncated or foreign entry: recompile below
+    if notebook is None:
+        notebook = CompiledNotebook(nb_path, compile_cells(nb_path))
+        if cache_file is not None:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(marshal.dumps(notebook.cells))
+            os.replace(tmp_path, cache_file)
+
+    _LOADED[nb_path] = (key, notebook)
+    return notebook
+
+
+def run_notebook(nb_path: Path, cache_dir: Optional[Path] = None, **params: Any) -> Dict[str, int]:
+    """Run a notebook in this process (see ``load_notebook`` and ``CompiledNotebook.run``).
+
+    Returns the same metrics dict as ``pipeline_run.execute_notebook``; it
+    is empty because a shared worker's peak RSS is not per notebook.
+    """
+    load_notebook(nb_path, cache_dir).run(**params)
+    return {}
+
+
+# ---------------------------------------------------------------------------
+# Parameter sweeps
+# ---------------------------------------------------------------------------
+def _sweep_run(nb_path: Path, cache_dir: Optional[Path], params: Dict[str, Any]) -> float:
+    started = time.perf_counter()
+    run_notebook(nb_path, cache_dir, **params)
+    return time.perf_counter() - started
+
+
+def sweep(
+    nb_path: Path, param_sets: List[Dict[str, Any]], cache_dir: Optional[Path] = None, jobs: int = 1
+) -> List[Tuple[Dict[str, Any], Optional[float], Optional[BaseException]]]:
+    """Run a notebook once per parameter set and return (params, seconds, error) per run.
+
+    The notebook is compiled once up front; with ``jobs`` > 1 the runs are
+    spread over that many worker processes, each of which keeps the
+    bytecode and any modules the notebook imported loaded between runs.
+    """
+    load_notebook(nb_path, cache_dir)
+    results: List[Tuple[Dict[str, Any], Optional[float], Optional[BaseException]]] = []
+    if jobs <= 1:
+        for params in param_sets:
+            try:
+                results.append((params, _sweep_run(nb_path, cache_dir, params), None))
+            except Exception as exc:  # noqa: BLE001 - one bad parameter set must not stop the sweep
+                results.append((params, None, exc))
+        return results
+
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {pool.submit(_sweep_run, nb_path, cache_dir, params): idx for idx, params in enumerate(param_sets)}
+        by_index: Dict[int, Tuple[Dict[str, Any], Optional[float], Optional[BaseException]]] = {}
+        for future in as_completed(futures):
+            idx = futures[future]
+            error = future.exception()
+            by_index[idx] = (param_sets[idx], None if error else future.result(), error)
+    return [by_index[idx] for idx in range(len(param_sets))]
+
+
+def _parse_param(text: str) -> Tuple[str, Any]:
+    name, sep, value = text.partition("=")
+    if not sep or not name.isidentifier():
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {text!r}")
+    try:
+        return name, ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return name, value  # bare strings need no quotes
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a notebook without a kernel from cached bytecode.")
+    parser.add_argument("notebook", type=Path, help="Notebook to compile and run.")
+    parser.add_argument(
+        "--root",
+        type=Path,
+        default=Path("."),
+        help="Project root holding the .pipeline_graph/ folder.",
+    )
+    parser.add_argument(
+        "-p",
+        "--param",
+        dest="params",
+        action="append",
+        type=_parse_param,
+        default=[],
+        metavar="NAME=VALUE",
+        help="Parameter for a single run; VALUE is a Python literal or a bare string (repeatable).",
+    )
+    parser.add_argument(
+        "--sweep",
+        type=Path,
+        default=None,
+        metavar="JSONL",
+        help="Run once per line of this file, each a JSON object of parameters.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for --sweep (default: 1, run in this process).",
+    )
+    parser.add_argument("--show", action="store_true", help="Print the translated source and exit.")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write cached bytecode.")
+    args = parser.parse_args(argv)
+    if args.sweep is not None and args.params:
+        parser.error("--param cannot be combined with --sweep")
+
+    if args.show:
+        for number, src in enumerate(iter_code_cells(args.notebook), start=1):
+            print(f"# --- cell {number} ---\n{translate_cell(src)}")
+        return
+
+    cache_dir = None if args.no_cache else args.root / DEFAULT_COMPILED_DIR
+    if args.sweep is None:
+        param_sets = [dict(args.params)]
+    else:
+        lines = args.sweep.read_text(encoding="utf-8").splitlines()
+        param_sets = [json.loads(line) for line in lines if line.strip()]
+
+    started = time.perf_counter()
+    try:
+        results = sweep(args.notebook, param_sets, cache_dir, jobs=args.jobs)
+    except (NotebookCompileError, SyntaxError) as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+    failed = 0
+    for number, (params, seconds, error) in enumerate(results, start=1):
+        if error is None:
+            print(f"✅ run {number} {params} ({seconds:.2f}s)")
+        else:
+            failed += 1
+            print(f"❌ run {number} {params}: {error}")
+    print(f"{len(results) - failed} succeeded, {failed} failed in {time.perf_counter() - started:.2f}s")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,27 +7,81 @@ Features
 * Scans all notebooks under `notebooks/` for common file I/O patterns.
 * Builds a directed NetworkX graph: files ⇄ notebooks.
 * Emits the graph as Mermaid text which can be rendered in docs or previews.
+* Caches per-notebook scan results so unchanged notebooks are not re-parsed.
+* Analyses changed notebooks in parallel worker processes (``--jobs``).
+* Optionally watches `notebooks/` and updates the graph incrementally (``--watch``).
+* Records ``columns=``/``usecols=`` on reads to report unused columns (``--columns``).
+* Turns glob and partition-directory reads into ``dataset`` nodes carrying the
+  file count, total bytes and newest mtime of one cached directory scan.
+* Profiles each notebook's scan phases, cells, bytes and peak memory (``--profile``).
+* Logs through the ``pipeline_graph`` logger; ``--log-format json`` emits one object per line.
+* Annotates nodes with recorded run times and highlights the critical path (``--critical-path``).
+* Persists the graph to a SQLite lineage store queried by ``lineage_store.py``.
+* Reports outputs whose inputs changed since they were written and colours them (``--stale``).
 
 Usage
 -----
 python pipeline_graph.py --root /path/to/project --out pipeline.mmd
+python pipeline_graph.py --no-cache   # scan every notebook, leave the cache alone
+python pipeline_graph.py --rebuild    # discard the cache and scan everything
+python pipeline_graph.py --jobs 1     # analyse notebooks serially
+python pipeline_graph.py --watch      # keep the graph updated while editing
+python pipeline_graph.py --focus output/report.csv --depth 2 --collapse partition
+python pipeline_graph.py --columns    # which columns of each input are actually read
+python pipeline_graph.py --profile output/scan_profile.csv --profile-top 5
+python pipeline_graph.py -v --log-format json   # per-notebook I/O as JSON log lines
+python pipeline_graph.py --critical-path   # after utils/pipeline_run.py has recorded run times
+python pipeline_graph.py --stale      # which outputs need re-running, from content fingerprints
 """
 
+from __future__ import annotations
+
 import argparse
 import ast
+import contextlib
+import glob
+import hashlib
+import json
+import logging
+import mmap
+import os
 import re
+import time
 from collections import defaultdict
 from pathlib import Path
-from typing import Dict, Optional, Sequence, Set, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+# nbformat and networkx are imported where they are used, so `--help` and
+# callers that only need the scanner stay fast to import.
+if TYPE_CHECKING:
+    import networkx as nx
 
-import nbformat
-import networkx as nx
+    from lineage_store import LineageStore
 
 MERMAID_HEADER = """%% Autogenerated by pipeline_graph.py
 graph LR
     classDef notebook fill:#87CEFA,stroke:#1f4f88,stroke-width:1px,color:#000;
     classDef file fill:#D3D3D3,stroke:#555,stroke-width:1px,color:#000;
+    classDef group fill:#D3D3D3,stroke:#555,stroke-width:2px,stroke-dasharray:4 2,color:#000;
+    classDef dataset fill:#C7E9C0,stroke:#2c7a2c,stroke-width:1px,color:#000;
+"""
+MERMAID_CRITICAL_STYLE = """    classDef critical stroke:#d62728,stroke-width:3px;
 """
+MERMAID_CRITICAL_LINK = "stroke:#d62728,stroke-width:3px"
+# Dataset nodes are drawn as cylinders.
+MERMAID_DATASET_SHAPE = ('[("', '")]')
+MERMAID_STALE_STYLE = """    classDef stale fill:#FFB347,stroke:#b35900,stroke-width:1px,color:#000;
+"""
+
+# Node ids per "class" statement, so no single Mermaid line grows unbounded.
+MERMAID_CLASS_BATCH = 500
+
+# Path rewrites used by ``collapse_file_nodes(by="partition")``: hive-style
+# ``key=value`` segments and runs of digits (dates, part numbers) become ``*``.
+PARTITION_REWRITES = [
+    (re.compile(r"(^|/)([^/=]+)=[^/]+"), r"\1\2=*"),
+    (re.compile(r"\d+"), "*"),
+]
 
 BASE_DIR_ALIASES = {
     "DATA_DIR": "data",
@@ -37,9 +91,96 @@ BASE_DIR_ALIASES = {
     "SRC_DIR": "src",
 }
 
-READ_METHODS = {"read_csv", "read_parquet", "read_json", "read_excel"}
-WRITE_METHODS = {"to_csv", "to_parquet", "to_json", "to_excel"}
-WRITE_PATH_KEYWORDS = ("path", "path_or_buf")
+# read_/write_intermediate come from src.intermediates, write_excel from src.excel.
+READ_METHODS = {
+    "read_csv", "read_parquet", "read_json", "read_excel", "read_feather", "read_intermediate",
+}
+# Readers whose names are too generic to match on their own (np.load, json.load,
+# pickle.load): the call must be spelled, or imported, as one of these
+# qualified names. "load" is src.loading.load, the cached loader shared by
+# notebooks; "dataset" is pyarrow.dataset.dataset.
+QUALIFIED_READ_METHODS = {
+    "load": {"src.loading.load", "loading.load"},
+    "dataset": {"pyarrow.dataset.dataset", "ds.dataset"},
+}
+WRITE_METHODS = {
+    "to_csv", "to_parquet", "to_json", "to_excel", "to_feather", "write_intermediate", "write_excel",
+    "write_to_dataset",
+}
+READ_PATH_KEYWORDS = ("filepath_or_buffer", "path", "io", "path_or_buf", "source")
+# Read keywords that restrict which columns are consumed.
+READ_COLUMN_KEYWORDS = ("columns", "usecols")
+WRITE_PATH_KEYWORDS = ("path", "path_or_buf", "excel_writer", "root_path")
+# Reads that accept a directory of part files (hive-partitioned datasets).
+DIRECTORY_READ_METHODS = {"read_parquet", "dataset"}
+# Writes that always produce a directory of part files, and the keyword that
+# turns ``to_parquet`` into one.
+DIRECTORY_WRITE_METHODS = {"write_to_dataset"}
+PARTITION_KEYWORD = "partition_cols"
+# Appended by ``DependencyVisitor`` to paths read or written as a directory,
+# so ``add_notebook`` can tell them from files without touching the disk.
+DATASET_DIR_MARKER = "/"
+_GLOB_MAGIC = re.compile(r"[*?\[]")
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+# Names treated as directory bases even when not in BASE_DIR_ALIASES (e.g. RAW_DIR).
+_DIR_NAME_SUFFIX = "_DIR"
+# Entries a directory dataset skips, as pyarrow's dataset discovery does:
+# manifests, _common_metadata, staged parts, lock and temp files.
+DATASET_IGNORE_PREFIXES = ("_", ".")
+
+# A cell mentioning none of these (nor a variable already bound to a path)
+# cannot contribute I/O, so it is skipped without parsing.
+PREFILTER_TOKENS = (
+    "read_",
+    "load(",
+    "to_",
+    "_intermediate(",
+    "write_excel(",
+    "glob",
+    "joinpath",
+    "dataset(",
+    "_DIR",
+    ".csv",
+    ".parquet",
+    ".json",
+    ".xls",
+    ".arrow",
+    ".feather",
+    "import",  # imports decide whether a later load() / dataset() is a reader (QUALIFIED_READ_METHODS)
+)
+# Cell magics whose body is still Python and can be parsed once the magic line is dropped.
+PYTHON_CELL_MAGICS = {"time", "timeit", "capture", "prun"}
+
+# Bump whenever the extraction logic changes so stale cache entries are dropped.
+CACHE_VERSION = 12
+DEFAULT_CACHE_PATH = Path(".pipeline_graph") / "scan_cache.json"
+DEFAULT_PROFILE_PATH = Path(".pipeline_graph") / "profile.json"
+# Written by pipeline_run.py: last measured duration, memory and bytes per node.
+DEFAULT_RUN_PROFILE_PATH = Path(".pipeline_graph") / "run_profile.json"
+RUN_PROFILE_VERSION = 1
+RUNTIME_ATTRIBUTES = ("duration", "peak_rss_bytes", "bytes_read", "bytes_written", "bytes")
+
+# Per-notebook phases recorded by ``--profile``, in pipeline order.
+PROFILE_PHASES = ("cache", "read", "prefilter", "parse", "visit", "regex", "resolve")
+
+logger = logging.getLogger("pipeline_graph")
+
+# Directories searched (in order) for bare filenames such as "testdata.csv".
+SEARCH_SUBDIRS = ("data", "output", "tests/data", "notebooks", "src", "tests")
+# Search directories that config.py lets users relocate via environment variables.
+OVERRIDABLE_SUBDIRS = {"data": "DATA_DIR", "output": "OUTPUT_DIR"}
+DEFAULT_EXCLUDE_DIRS = frozenset(
+    {
+        ".git",
+        ".venv",
+        "venv",
+        "__pycache__",
+        ".ipynb_checkpoints",
+        ".pytest_cache",
+        ".pipeline_graph",
+        "node_modules",
+    }
+)
 
 # ---------------------------------------------------------------------------
 # Regex patterns for I/O – extend as needed
@@ -56,59 +197,680 @@ WRITE_PATH_KEYWORDS = ("path", "path_or_buf")
 #    r"to_excel\(\s*['\"]([^'\"]+)['\"]",
 # ]
 
+_DATA_FILE_LITERAL = r"['\"]([^'\"]+\.(?:csv|parquet|json|xlsx?|xlsm|arrow|feather))['\"]"
+
 READ_PATTERNS = [
-    r"read_(?:csv|parquet|json|excel)\([^)]*?['\"]([^'\"]+\.(?:csv|parquet|json|xlsx?|xlsm))['\"][^)]*\)",
+    r"read_(?:csv|parquet|json|excel|feather|intermediate)\([^)]*?" + _DATA_FILE_LITERAL + r"[^)]*\)",
 ]
 
 WRITE_PATTERNS = [
-    r"to_(?:csv|parquet|json|excel)\([^)]*?['\"]([^'\"]+\.(?:csv|parquet|json|xlsx?|xlsm))['\"][^)]*\)",
+    r"(?:to_(?:csv|parquet|json|excel|feather)|write_(?:intermediate|excel))\([^)]*?" + _DATA_FILE_LITERAL + r"[^)]*\)",
 ]
 
+PATTERN_FLAGS = re.IGNORECASE | re.DOTALL
+READ_REGEXES = [re.compile(pat, PATTERN_FLAGS) for pat in READ_PATTERNS]
+WRITE_REGEXES = [re.compile(pat, PATTERN_FLAGS) for pat in WRITE_PATTERNS]
+
+
+# ---------------------------------------------------------------------------
+# Notebook reading
+# ---------------------------------------------------------------------------
+# Notebooks are scanned straight from a memory map. Only ``cell_type`` and
+# ``source`` are decoded; everything else (outputs, attachments, metadata)
+# is skipped by bracket matching, so embedded plots never become Python
+# objects and the document is not schema-validated.
+_JSON_WS = re.compile(rb"[ \t\r\n]*+")
+_JSON_STRING = re.compile(rb'"[^"\\]*+(?:\\.[^"\\]*+)*+"', re.DOTALL)
+_JSON_SCALAR = re.compile(rb"[^\s,\]}]++")
+_JSON_STRUCTURE = re.compile(rb'[^"\[\]{}]*+')
+_BACKSLASH = ord("\\")
+
+
+class _NotebookScanner:
+    """Minimal forward-only JSON scanner over a notebook buffer."""
+
+    def __init__(self, buf) -> None:
+        self.buf = buf
+        self.pos = 0
+
+    def _ws(self) -> None:
+        self.pos = _JSON_WS.match(self.buf, self.pos).end()
+
+    def _char(self) -> bytes:
+        self._ws()
+        return self.buf[self.pos:self.pos + 1]
+
+    def _expect(self, char: bytes) -> None:
+        if self._char() != char:
+            raise ValueError(f"expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def _skip_string(self) -> None:
+        # memchr-backed find() is far faster than a regex over large base64 payloads.
+        buf = self.buf
+        pos = self.pos + 1
+        while True:
+            end = buf.find(b'"', pos)
+            if end < 0:
+                raise ValueError("unterminated JSON string")
+            escapes = 0
+            while buf[end - 1 - escapes] == _BACKSLASH:
+                escapes += 1
+            pos = end + 1
+            if escapes % 2 == 0:
+                self.pos = pos
+                return
+
+    def skip_value(self) -> None:
+        char = self._char()
+        if char == b'"':
+            self._skip_string()
+        elif char in (b"{", b"["):
+            depth = 0
+            while True:
+                char = self.buf[self.pos:self.pos + 1]
+                if char == b'"':
+                    self._skip_string()
+                else:
+                    if char in (b"{", b"["):
+                        depth += 1
+                    elif char in (b"}", b"]"):
+                        depth -= 1
+                    else:
+                        raise ValueError("unterminated JSON container")
+                    self.pos += 1
+                    if depth == 0:
+                        return
+                self.pos = _JSON_STRUCTURE.match(self.buf, self.pos).end()
+        else:
+            match = _JSON_SCALAR.match(self.buf, self.pos)
+            if match is None:
+                raise ValueError(f"unexpected JSON at offset {self.pos}")
+            self.pos = match.end()
+
+    def decode_value(self):
+        self._ws()
+        start = self.pos
+        self.skip_value()
+        return json.loads(self.buf[start:self.pos])
+
+    def object_keys(self) -> Iterator[str]:
+        """Yield the keys of an object; the caller must consume each value."""
+        self._expect(b"{")
+        if self._char() == b"}":
+            self.pos += 1
+            return
+        while True:
+            if self._char() != b'"':
+                raise ValueError(f"expected object key at offset {self.pos}")
+            key = self.decode_value()
+            self._expect(b":")
+            yield key
+            char = self._char()
+            self.pos += 1
+            if char == b"}":
+                return
+            if char != b",":
+                raise ValueError(f"expected ',' or '}}' at offset {self.pos - 1}")
+
+    def array_items(self) -> Iterator[None]:
+        """Yield once per array element; the caller must consume each value."""
+        self._expect(b"[")
+        if self._char() == b"]":
+            self.pos += 1
+            return
+        while True:
+            yield None
+            char = self._char()
+            self.pos += 1
+            if char == b"]":
+                return
+            if char != b",":
+                raise ValueError(f"expected ',' or ']' at offset {self.pos - 1}")
+
+
+def _scan_code_sources(buf) -> Tuple[Optional[int], List[str]]:
+    """Return (nbformat major version, code cell sources) from raw notebook JSON."""
+    scanner = _NotebookScanner(buf)
+    version: Optional[int] = None
+    sources: List[str] = []
+
+    for key in scanner.object_keys():
+        if key == "nbformat":
+            version = scanner.decode_value()
+        elif key == "cells":
+            for _ in scanner.array_items():
+                cell_type, source = None, None
+                for cell_key in scanner.object_keys():
+                    if cell_key == "cell_type":
+                        cell_type = scanner.decode_value()
+                    elif cell_key == "source":
+                        source = scanner.decode_value()
+                    else:
+                        scanner.skip_value()
+                if cell_type == "code" and source is not None:
+                    sources.append(source if isinstance(source, str) else "".join(source))
+        else:
+            scanner.skip_value()
+
+    return version, sources
+
+
+def iter_code_cells(nb_path: Path) -> Iterator[str]:
+    """Yield the source of every code cell in a notebook.
+
+    Uses the lightweight scanner for nbformat 4+ and falls back to
+    ``nbformat.read`` for older formats or documents it cannot scan.
+    """
+    sources: Optional[List[str]] = None
+    with nb_path.open("rb") as handle:
+        try:
+            buf = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            buf = None
+        if buf is not None:
+            with buf:
+                try:
+                    version, scanned = _scan_code_sources(buf)
+                except (ValueError, AttributeError):
+                    version, scanned = None, []
+                if version is not None and version >= 4:
+                    sources = scanned
+
+    if sources is None:
+        import nbformat
+
+        nb = nbformat.read(nb_path, as_version=4)
+        sources = [cell.source for cell in nb.cells if cell.cell_type == "code"]
+
+    yield from sources
+
 
 # ---------------------------------------------------------------------------
 # Helper functions
 # ---------------------------------------------------------------------------
 def extract_paths(cell_source: str, patterns) -> Set[str]:
-    """Return a set of file paths matching the supplied regex patterns."""
+    """Return a set of file paths matching the supplied regex patterns.
+
+    ``patterns`` may hold pattern strings or precompiled ``re.Pattern`` objects.
+    """
     paths: Set[str] = set()
     for pat in patterns:
-        for match in re.findall(pat, cell_source, flags=re.IGNORECASE | re.DOTALL):
-            paths.add(match)
+        if not isinstance(pat, re.Pattern):
+            pat = re.compile(pat, PATTERN_FLAGS)
+        paths.update(pat.findall(cell_source))
     return paths
 
 
-def analyze_notebook(nb_path: Path) -> Tuple[Set[str], Set[str]]:
-    """Return (inputs, outputs) discovered in a notebook."""
-    nb = nbformat.read(nb_path, as_version=4)
-    inputs, outputs = set(), set()
-    var_sources: Dict[str, Set[str]] = defaultdict(set)
+def _strip_magics(src: str) -> Optional[str]:
+    """Blank out IPython magics and shell escapes so the cell can be parsed.
 
-    for cell in nb.cells:
-        if cell.cell_type != "code":
-            continue
-        src = cell.source
-        inputs.update(extract_paths(src, READ_PATTERNS))
-        outputs.update(extract_paths(src, WRITE_PATTERNS))
+    Returns None for cells whose body is not Python (e.g. ``%%bash``).
+    """
+    lines = src.splitlines()
+    first = lines[0].lstrip() if lines else ""
+    if first.startswith("%%"):
+        magic = first[2:].split(maxsplit=1)[0] if first[2:].strip() else ""
+        if magic not in PYTHON_CELL_MAGICS:
+            return None
+        lines[0] = ""
 
-        try:
-            tree = ast.parse(src)
-        except SyntaxError:
-            continue
+    for idx, line in enumerate(lines):
+        stripped = line.lstrip()
+        if stripped.startswith(("%", "!")):
+            lines[idx] = line[: len(line) - len(stripped)] + "pass"
+    return "\n".join(lines)
+
+
+class ExtractionStats:
+    """Counters describing how the extraction engine handled code cells."""
+
+    def __init__(self, cells_skipped: int = 0, cells_parsed: int = 0, regex_fallbacks: int = 0) -> None:
+        self.cells_skipped = cells_skipped
+        self.cells_parsed = cells_parsed
+        self.regex_fallbacks = regex_fallbacks
 
-        visitor = DependencyVisitor(var_sources, inputs, outputs)
-        visitor.visit(tree)
+    def update(self, other: "ExtractionStats") -> None:
+        self.cells_skipped += other.cells_skipped
+        self.cells_parsed += other.cells_parsed
+        self.regex_fallbacks += other.regex_fallbacks
 
-    # print all inputs and outputs for debugging
-    if inputs:
-        print(f"Inputs in {nb_path.name}: {', '.join(inputs)}")
-    if outputs:
-        print(f"Outputs in {nb_path.name}: {', '.join(outputs)}")
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "cells_skipped": self.cells_skipped,
+            "cells_parsed": self.cells_parsed,
+            "regex_fallbacks": self.regex_fallbacks,
+        }
 
+
+# ---------------------------------------------------------------------------
+# Profiling
+# ---------------------------------------------------------------------------
+class _PhaseTimer:
+    """Context manager adding its wall time to ``seconds[phase]``."""
+
+    __slots__ = ("seconds", "phase", "started")
+
+    def __init__(self, seconds: Dict[str, float], phase: str) -> None:
+        self.seconds = seconds
+        self.phase = phase
+        self.started = 0.0
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self.seconds[self.phase] = self.seconds.get(self.phase, 0.0) + time.perf_counter() - self.started
+
+
+_NOT_PROFILED = contextlib.nullcontext()
+
+
+def _phase(profile: Optional[NotebookProfile | ScanProfiler], name: str):
+    """Time ``name`` on a profile or profiler, or do nothing when not profiling."""
+    return profile.phase(name) if profile is not None else _NOT_PROFILED
+
+
+class NotebookProfile:
+    """Wall time per phase, cell counts, bytes read and peak memory for one notebook.
+
+    ``peak_memory_bytes`` is the ``tracemalloc`` high-water mark above the
+    memory in use when analysis started. ``cached`` notebooks were served
+    from the scan cache and only carry ``cache`` and ``resolve`` timings.
+    """
+
+    def __init__(self, notebook: str) -> None:
+        self.notebook = notebook
+        self.cached = False
+        self.bytes_read = 0
+        self.cells = 0
+        self.peak_memory_bytes = 0
+        self.stats = ExtractionStats()
+        self.seconds: Dict[str, float] = dict.fromkeys(PROFILE_PHASES, 0.0)
+
+    def phase(self, name: str) -> _PhaseTimer:
+        return _PhaseTimer(self.seconds, name)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.seconds.values())
+
+    def update(self, other: "NotebookProfile") -> None:
+        """Accumulate the measurements of ``other`` (e.g. returned by a worker)."""
+        self.cached = self.cached and other.cached
+        self.bytes_read += other.bytes_read
+        self.cells += other.cells
+        self.peak_memory_bytes = max(self.peak_memory_bytes, other.peak_memory_bytes)
+        self.stats.update(other.stats)
+        for name, seconds in other.seconds.items():
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def as_dict(self) -> Dict[str, object]:
+        row: Dict[str, object] = {
+            "notebook": self.notebook,
+            "cached": self.cached,
+            "total_seconds": round(self.total_seconds, 6),
+            "cells": self.cells,
+            **self.stats.as_dict(),
+            "bytes_read": self.bytes_read,
+            "peak_memory_bytes": self.peak_memory_bytes,
+        }
+        for name, seconds in self.seconds.items():
+            row[f"{name}_seconds"] = round(seconds, 6)
+        return row
+
+
+class ScanProfiler:
+    """Collects a ``NotebookProfile`` per notebook plus project-wide phases.
+
+    Project-wide phases (``index``, ``analyze``, ``graph``, ``render``) are
+    wall times for a whole build; with ``jobs > 1`` the per-notebook phases
+    run concurrently and add up to more than ``analyze``.
+    """
+
+    def __init__(self) -> None:
+        self.notebooks: Dict[str, NotebookProfile] = {}
+        self.seconds: Dict[str, float] = {}
+
+    def notebook(self, name: str) -> NotebookProfile:
+        """Return the profile for ``name``, creating it on first use."""
+        profile = self.notebooks.get(name)
+        if profile is None:
+            profile = self.notebooks[name] = NotebookProfile(name)
+        return profile
+
+    def phase(self, name: str) -> _PhaseTimer:
+        return _PhaseTimer(self.seconds, name)
+
+    def slowest(self, count: int) -> List[NotebookProfile]:
+        """Return the ``count`` notebooks with the largest total time."""
+        ranked = sorted(self.notebooks.values(), key=lambda item: (-item.total_seconds, item.notebook))
+        return ranked[:count]
+
+    def report(self) -> Dict[str, object]:
+        totals = ExtractionStats()
+        for profile in self.notebooks.values():
+            totals.update(profile.stats)
+        return {
+            "phases": {name: round(seconds, 6) for name, seconds in self.seconds.items()},
+            "totals": {
+                "notebooks": len(self.notebooks),
+                "cached": sum(profile.cached for profile in self.notebooks.values()),
+                "cells": sum(profile.cells for profile in self.notebooks.values()),
+                **totals.as_dict(),
+                "bytes_read": sum(profile.bytes_read for profile in self.notebooks.values()),
+                "peak_memory_bytes": max((p.peak_memory_bytes for p in self.notebooks.values()), default=0),
+            },
+            "notebooks": [profile.as_dict() for profile in self.slowest(len(self.notebooks))],
+        }
+
+    def write(self, path: Path) -> None:
+        """Write the report as JSON, or one CSV row per notebook for a ``.csv`` path."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        report = self.report()
+        if path.suffix.lower() == ".csv":
+            import csv
+
+            rows = report["notebooks"]
+            fields = list(rows[0]) if rows else ["notebook"]
+            with tmp_path.open("w", newline="", encoding="utf-8") as handle:
+                writer = csv.DictWriter(handle, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            tmp_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+
+def _format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def log_profile_summary(profiler: ScanProfiler, top: int = 10) -> None:
+    """Log project-wide phase times and the ``top`` slowest notebooks."""
+    phases = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in profiler.seconds.items())
+    logger.info(f"⏱️  Phases: {phases}", extra={"event": "profile_phases", "phases": profiler.seconds})
+    slowest = profiler.slowest(top)
+    if slowest:
+        logger.info(f"⏱️  Slowest {len(slowest)} notebook(s):")
+    for rank, profile in enumerate(slowest, start=1):
+        detail = "cached" if profile.cached else (
+            f"{profile.cells} cells, {_format_bytes(profile.bytes_read)}, "
+            f"peak {_format_bytes(profile.peak_memory_bytes)}"
+        )
+        logger.info(
+            f"  {rank:>2}. {profile.total_seconds:8.3f}s  {profile.notebook}  ({detail})",
+            extra={"event": "profile_notebook", "rank": rank, **profile.as_dict()},
+        )
+
+
+# Columns consumed per input path; None means "all columns" (no projection
+# was given, or it could not be evaluated statically).
+ColumnUsage = Dict[str, Optional[Set[str]]]
+
+
+def merge_columns(usage: ColumnUsage, path: str, columns: Optional[Set[str]]) -> None:
+    """Record that ``columns`` of ``path`` are read, widening to all columns on any full read."""
+    if path in usage and usage[path] is None:
+        return
+    if columns is None or path not in usage:
+        usage[path] = None if columns is None else set(columns)
+    else:
+        usage[path] |= columns
+
+
+class IOExtractor:
+    """Single-pass extraction of file inputs/outputs from a notebook's code cells.
+
+    Each cell goes through a substring prefilter, then one ``ast`` walk with
+    ``DependencyVisitor``. The regex patterns are only used for cells that
+    still fail to parse after IPython magics are blanked out.
+    """
+
+    def __init__(self, stats: Optional[ExtractionStats] = None, profile: Optional[NotebookProfile] = None) -> None:
+        self.inputs: Set[str] = set()
+        self.outputs: Set[str] = set()
+        self.columns: ColumnUsage = {}
+        self.var_sources: Dict[str, Set[str]] = defaultdict(set)
+        self.imports: Dict[str, str] = {}
+        self.stats = stats if stats is not None else ExtractionStats()
+        self.profile = profile
+
+    def _is_relevant(self, src: str) -> bool:
+        if any(token in src for token in PREFILTER_TOKENS):
+            return True
+        # Whole identifiers only, so a bound ``df`` does not match ``pdf`` or ``df_raw``.
+        return bool(self.var_sources) and not self.var_sources.keys().isdisjoint(_IDENTIFIER.findall(src))
+
+    def feed(self, src: str) -> None:
+        """Process one code cell."""
+        profile = self.profile
+        with _phase(profile, "prefilter"):
+            relevant = self._is_relevant(src)
+        if not relevant:
+            self.stats.cells_skipped += 1
+            return
+
+        with _phase(profile, "parse"):
+            # Magics are only blanked when the cell is not Python as written:
+            # a continuation line may itself start with ``%`` (the modulo operator).
+            try:
+                tree = ast.parse(src)
+            except SyntaxError:
+                code = _strip_magics(src)
+                tree = None
+                if code is not None:
+                    try:
+                        tree = ast.parse(code)
+                    except SyntaxError:
+                        pass
+
+        if tree is None:
+            self.stats.regex_fallbacks += 1
+            with _phase(profile, "regex"):
+                for path in extract_paths(src, READ_REGEXES):
+                    self.inputs.add(path)
+                    merge_columns(self.columns, path, None)
+                self.outputs.update(extract_paths(src, WRITE_REGEXES))
+            return
+
+        self.stats.cells_parsed += 1
+        with _phase(profile, "visit"):
+            DependencyVisitor(self.var_sources, self.inputs, self.outputs, self.columns, self.imports).visit(tree)
+
+
+def analyze_notebook(
+    nb_path: Path,
+    stats: Optional[ExtractionStats] = None,
+    profile: Optional[NotebookProfile] = None,
+) -> Tuple[Set[str], Set[str]]:
+    """Return (inputs, outputs) discovered in a notebook.
+
+    See ``analyze_notebook_usage`` for the columns read from each input
+    and for ``stats`` and ``profile``.
+    """
+    inputs, outputs, _ = analyze_notebook_usage(nb_path, stats, profile)
     return inputs, outputs
 
 
-def resolve_file_node(path_str: str, project_root: Path) -> str:
-    """Return a stable node identifier including path context when available."""
+def analyze_notebook_usage(
+    nb_path: Path,
+    stats: Optional[ExtractionStats] = None,
+    profile: Optional[NotebookProfile] = None,
+) -> Tuple[Set[str], Set[str], ColumnUsage]:
+    """Return (inputs, outputs, columns) discovered in a notebook.
+
+    ``columns`` maps each input to the columns read from it (see
+    ``ColumnUsage``). Cell handling counters are accumulated into ``stats``
+    when given. With a ``profile``, phase timings, cell counts, bytes read
+    and peak ``tracemalloc`` memory are recorded on it as well.
+    """
+    if profile is None:
+        extractor = IOExtractor(stats)
+        for src in iter_code_cells(nb_path):
+            extractor.feed(src)
+    else:
+        import tracemalloc
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        try:
+            with profile.phase("read"):
+                sources = list(iter_code_cells(nb_path))
+            notebook_stats = ExtractionStats()
+            extractor = IOExtractor(notebook_stats, profile)
+            for src in sources:
+                extractor.feed(src)
+            profile.peak_memory_bytes = max(profile.peak_memory_bytes, tracemalloc.get_traced_memory()[1] - baseline)
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+        profile.cached = False
+        profile.cells += len(sources)
+        profile.bytes_read += nb_path.stat().st_size
+        profile.stats.update(notebook_stats)
+        if stats is not None:
+            stats.update(notebook_stats)
+
+    inputs, outputs = extractor.inputs, extractor.outputs
+    if logger.isEnabledFor(logging.DEBUG):
+        for label, paths in (("Inputs", sorted(inputs)), ("Outputs", sorted(outputs))):
+            if paths:
+                logger.debug(
+                    f"{label} in {nb_path.name}: {', '.join(paths)}",
+                    extra={"event": f"notebook_{label.lower()}", "notebook": str(nb_path), "paths": paths},
+                )
+
+    return inputs, outputs, extractor.columns
+
+
+def _configured_dir(project_root: Path, env_var: str, default_relative: str) -> Path:
+    """Resolve a base directory the same way ``config.py`` does.
+
+    The process environment wins; otherwise the project's ``.env`` is consulted
+    (when python-dotenv is installed) without modifying ``os.environ``.
+    """
+    value = os.getenv(env_var)
+    if not value:
+        try:
+            from dotenv import dotenv_values
+        except ImportError:
+            dotenv_values = None
+        dotenv_path = project_root / ".env"
+        if dotenv_values is not None and dotenv_path.exists():
+            value = dotenv_values(dotenv_path).get(env_var)
+    if not value:
+        return project_root / default_relative
+
+    path = Path(value)
+    if not path.is_absolute():
+        path = project_root / path
+    return path.resolve()
+
+
+class FileIndex:
+    """Filename → paths index of a project tree, built lazily in one pass.
+
+    The tree under ``project_root`` is walked once with ``os.scandir``, along
+    with any ``DATA_DIR``/``OUTPUT_DIR`` that ``config.py`` would place
+    outside of it. Directories named in ``exclude_dirs`` are not descended.
+    """
+
+    def __init__(self, project_root: Path, exclude_dirs: Iterable[str] = DEFAULT_EXCLUDE_DIRS) -> None:
+        self.project_root = project_root.resolve()
+        self.exclude_dirs = frozenset(exclude_dirs)
+        self.search_dirs: List[Tuple[str, Path]] = []
+        for subdir in SEARCH_SUBDIRS:
+            env_var = OVERRIDABLE_SUBDIRS.get(subdir)
+            if env_var:
+                directory = _configured_dir(self.project_root, env_var, subdir)
+            else:
+                directory = self.project_root / subdir
+            self.search_dirs.append((subdir, directory))
+        self._by_name: Optional[Dict[str, List[Path]]] = None
+
+    def _scan(self) -> Dict[str, List[Path]]:
+        by_name: Dict[str, List[Path]] = defaultdict(list)
+        roots = [self.project_root]
+        for _, directory in self.search_dirs:
+            if not directory.is_relative_to(self.project_root):
+                roots.append(directory)
+
+        stack = [str(root) for root in roots]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in self.exclude_dirs:
+                                stack.append(entry.path)
+                        else:
+                            by_name[entry.name].append(Path(entry.path))
+            except OSError:
+                continue
+        return by_name
+
+    def _node_for(self, path: Path) -> str:
+        """Return the node identifier for an absolute path found in the tree."""
+        for label, directory in self.search_dirs:
+            if path.is_relative_to(directory):
+                return str(Path(label) / path.relative_to(directory))
+        if path.is_relative_to(self.project_root):
+            return str(path.relative_to(self.project_root))
+        return str(path)
+
+    def path_for(self, node: str) -> Path:
+        """Return the filesystem location of a file node (inverse of node naming)."""
+        path = Path(node)
+        if path.is_absolute():
+            return path
+        for label, directory in self.search_dirs:
+            if path.is_relative_to(label):
+                return directory / path.relative_to(label)
+        return self.project_root / path
+
+    def _rank(self, path: Path) -> Tuple[int, int, str]:
+        if path.parent == self.project_root:
+            return (0, 0, str(path))
+        for position, (_, directory) in enumerate(self.search_dirs, start=1):
+            if path.parent == directory:
+                return (position, 0, str(path))
+        return (len(self.search_dirs) + 1, len(path.parts), str(path))
+
+    def scan(self) -> None:
+        """Walk the tree now rather than on the first ``lookup``."""
+        if self._by_name is None:
+            self._by_name = self._scan()
+
+    def lookup(self, name: str) -> Optional[str]:
+        """Return the node for a bare filename, or None if it is not in the tree.
+
+        Ties are broken deterministically: the project root first, then the
+        search directories in ``SEARCH_SUBDIRS`` order, then the shallowest
+        and lexicographically smallest path.
+        """
+        self.scan()
+        matches = self._by_name.get(name)
+        if not matches:
+            return None
+        return self._node_for(min(matches, key=self._rank))
+
+
+def resolve_file_node(path_str: str, project_root: Path, index: Optional[FileIndex] = None) -> str:
+    """Return a stable node identifier including path context when available.
+
+    Bare filenames are looked up in ``index``; pass one shared index when
+    resolving many paths so the project tree is only walked once.
+    """
     path = Path(path_str)
 
     if path.is_absolute():
@@ -120,71 +882,943 @@ def resolve_file_node(path_str: str, project_root: Path) -> str:
     if path.parent != Path('.'):
         return str(path)
 
-    candidate = project_root / path
-    if candidate.exists():
-        return str(path)
+    if index is None:
+        index = FileIndex(project_root)
+    return index.lookup(path.name) or str(path)
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
 
-    for subdir in ("data", "output", "tests/data", "notebooks", "src", "tests"):
-        candidate = project_root / subdir / path
-        if candidate.exists():
-            return str(Path(subdir) / path)
+class ScanCache:
+    """On-disk cache of per-notebook scan results and dataset summaries.
 
-    for match in project_root.rglob(path.name):
+    Entries are keyed by the notebook path relative to the project root and
+    validated by ``mtime``/``size`` first, then by content hash. An unchanged
+    notebook therefore costs a single ``stat`` call. Dataset summaries (see
+    ``scan_dataset``) are keyed by node and validated by the mtimes of the
+    directories they were gathered from.
+    """
+
+    def __init__(
+        self, path: Path, entries: Optional[Dict[str, dict]] = None, datasets: Optional[Dict[str, dict]] = None
+    ) -> None:
+        self.path = path
+        self.entries: Dict[str, dict] = entries or {}
+        self.datasets: Dict[str, dict] = datasets or {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: Path) -> "ScanCache":
+        """Load a cache file, starting empty if it is missing, corrupt or outdated."""
         try:
-            return str(match.relative_to(project_root))
-        except ValueError:
-            return str(match)
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cls(path)
+        if not isinstance(payload, dict) or payload.get("version") != CACHE_VERSION:
+            return cls(path)
+        return cls(path, payload.get("notebooks", {}), payload.get("datasets", {}))
+
+    def lookup(
+        self, key: str, nb_path: Path, stat: os.stat_result
+    ) -> Optional[Tuple[Set[str], Set[str], ColumnUsage]]:
+        """Return cached (inputs, outputs, columns) for a notebook, or None on a miss."""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
 
-    return str(path)
+        if entry["mtime_ns"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+            # Touched but possibly unchanged (checkout, copy): fall back to the hash.
+            if file_digest(nb_path) != entry["sha256"]:
+                self.misses += 1
+                return None
+            entry["mtime_ns"] = stat.st_mtime_ns
+            entry["size"] = stat.st_size
 
+        self.hits += 1
+        columns = {path: None if cols is None else set(cols) for path, cols in entry["columns"].items()}
+        return set(entry["inputs"]), set(entry["outputs"]), columns
 
-def build_graph(project_root: Path) -> nx.DiGraph:
-    """Create a directed graph of notebooks and files."""
-    notebooks_dir = project_root / "notebooks"
+    def store(
+        self,
+        key: str,
+        nb_path: Path,
+        stat: os.stat_result,
+        inputs: Set[str],
+        outputs: Set[str],
+        columns: Optional[ColumnUsage] = None,
+    ) -> None:
+        """Record the scan result for a notebook."""
+        self.entries[key] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": file_digest(nb_path),
+            "inputs": sorted(inputs),
+            "outputs": sorted(outputs),
+            "columns": {path: None if cols is None else sorted(cols) for path, cols in (columns or {}).items()},
+        }
+
+    def prune(self, live_keys: Set[str]) -> None:
+        """Drop entries for notebooks that no longer exist."""
+        for key in set(self.entries) - live_keys:
+            del self.entries[key]
+
+    def lookup_dataset(self, node: str) -> Optional[dict]:
+        """Return the cached summary of a dataset node, or None if any of its directories changed."""
+        entry = self.datasets.get(node)
+        if entry is None:
+            return None
+        for directory, mtime_ns in entry["dirs"].items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime_ns:
+                    return None
+            except OSError:
+                return None
+        return entry
+
+    def store_dataset(self, node: str, summary: dict) -> None:
+        self.datasets[node] = summary
+
+    def prune_datasets(self, live_nodes: Set[str]) -> None:
+        """Drop summaries of dataset nodes no longer in the graph."""
+        for node in set(self.datasets) - live_nodes:
+            del self.datasets[node]
+
+    def save(self) -> None:
+        """Write the cache atomically next to its final location."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": CACHE_VERSION, "notebooks": self.entries, "datasets": self.datasets}
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(payload, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+# ---------------------------------------------------------------------------
+# Datasets
+# ---------------------------------------------------------------------------
+def is_dataset_path(path: str) -> bool:
+    """Whether an extracted path names a dataset: a glob pattern or a marked directory."""
+    return path.endswith(DATASET_DIR_MARKER) or _GLOB_MAGIC.search(path) is not None
+
+
+def _glob_regex(pattern: str) -> re.Pattern:
+    """Compile a relative glob pattern; ``*``/``?`` stay within one segment, ``**/`` spans any."""
+    parts = []
+    for segment in pattern.split("/"):
+        if segment == "**":
+            parts.append("(?:[^/]+/)*")
+            continue
+        out, pos = [], 0
+        while pos < len(segment):
+            char = segment[pos]
+            end = segment.find("]", pos + 2) if char == "[" else -1
+            if char == "*":
+                out.append("[^/]*")
+            elif char == "?":
+                out.append("[^/]")
+            elif end != -1:
+                body = segment[pos + 1:end]
+                out.append("[" + ("^" + body[1:] if body.startswith("!") else body).replace("\\", "\\\\") + "]")
+                pos = end
+            else:
+                out.append(re.escape(char))
+            pos += 1
+        parts.append("".join(out) + "/")
+    return re.compile("".join(parts)[:-1] + r"\Z")
+
+
+def scan_dataset(location: Path) -> dict:
+    """Summarise the files of a dataset directory or glob pattern in one ``os.scandir`` walk.
+
+    Returns ``files``, total ``bytes``, the newest ``mtime_ns`` (None when
+    empty) and ``dirs``, the ``st_mtime_ns`` of every directory walked, which
+    ``ScanCache.lookup_dataset`` uses to tell whether files were added or
+    removed since. A pattern is walked from its longest literal prefix and
+    no deeper than it can match. Directory datasets skip entries named with
+    one of ``DATASET_IGNORE_PREFIXES``.
+    """
+    parts = location.parts
+    literal = next((idx for idx, part in enumerate(parts) if _GLOB_MAGIC.search(part)), len(parts))
+    base = Path(*parts[:literal])
+    matcher = _glob_regex("/".join(parts[literal:])) if literal < len(parts) else None
+    max_depth = None if matcher is None or "**" in parts[literal:] else len(parts) - literal - 1
+
+    summary = {"files": 0, "bytes": 0, "mtime_ns": None, "dirs": {}}
+    stack = [(str(base), "", 0)]
+    while stack:
+        directory, relative, depth = stack.pop()
+        try:
+            summary["dirs"][directory] = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if matcher is None and entry.name.startswith(DATASET_IGNORE_PREFIXES):
+                        continue
+                    name = f"{relative}{entry.name}"
+                    if entry.is_dir():
+                        if max_depth is None or depth < max_depth:
+                            stack.append((entry.path, name + "/", depth + 1))
+                    elif matcher is None or matcher.match(name):
+                        stat = entry.stat()
+                        summary["files"] += 1
+                        summary["bytes"] += stat.st_size
+                        summary["mtime_ns"] = max(summary["mtime_ns"] or 0, stat.st_mtime_ns)
+        except OSError:
+            continue
+    return summary
+
+
+def annotate_datasets(graph: nx.DiGraph, index: FileIndex, cache: Optional[ScanCache] = None) -> int:
+    """Set ``files``, ``bytes`` and ``mtime_ns`` on every dataset node; return how many were scanned.
+
+    Summaries come from ``cache`` when their directories are unchanged, so
+    a large partitioned tree is only walked again after files were added
+    or removed.
+    """
+    datasets = [node for node, node_type in graph.nodes(data="node_type") if node_type == "dataset"]
+    scanned = 0
+    for node in datasets:
+        summary, fresh = dataset_summary(node, index, cache)
+        scanned += fresh
+        graph.nodes[node].update(files=summary["files"], bytes=summary["bytes"], mtime_ns=summary["mtime_ns"])
+    if cache is not None:
+        cache.prune_datasets(set(datasets))
+    return scanned
+
+
+def dataset_summary(node: str, index: FileIndex, cache: Optional[ScanCache] = None) -> Tuple[dict, bool]:
+    """Return a dataset node's ``scan_dataset`` summary and whether it had to be scanned."""
+    summary = cache.lookup_dataset(node) if cache is not None else None
+    if summary is not None:
+        return summary, False
+    summary = scan_dataset(index.path_for(node))
+    if cache is not None:
+        cache.store_dataset(node, summary)
+    return summary, True
+
+
+def _analyze_worker(
+    nb_path: Path, profile: Optional[NotebookProfile] = None
+) -> Tuple[Set[str], Set[str], ColumnUsage, ExtractionStats, Optional[NotebookProfile]]:
+    stats = ExtractionStats()
+    if profile is not None:
+        profile = NotebookProfile(profile.notebook)
+    inputs, outputs, columns = analyze_notebook_usage(nb_path, stats, profile)
+    return inputs, outputs, columns, stats, profile
+
+
+def analyze_notebooks(
+    nb_paths: Sequence[Path],
+    jobs: int = 1,
+    stats: Optional[ExtractionStats] = None,
+    profiles: Optional[Sequence[NotebookProfile]] = None,
+) -> List[Tuple[Set[str], Set[str], ColumnUsage]]:
+    """Analyse notebooks, returning results in the same order as ``nb_paths``.
+
+    With ``jobs > 1`` the work is spread over a process pool; parsing is
+    CPU-bound, so threads would serialise on the GIL. Workers are spawned
+    rather than forked so behaviour matches macOS and Windows. ``profiles``,
+    when given, holds one ``NotebookProfile`` per path to record into.
+    """
+    profiles = list(profiles) if profiles is not None else [None] * len(nb_paths)
+    workers = min(jobs, len(nb_paths))
+    if workers <= 1:
+        return [analyze_notebook_usage(nb_path, stats, profile) for nb_path, profile in zip(nb_paths, profiles)]
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(nb_paths) // (workers * 4))
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        outcomes = pool.map(_analyze_worker, nb_paths, profiles, chunksize=chunksize)
+        for profile, (inputs, outputs, columns, worker_stats, worker_profile) in zip(profiles, outcomes):
+            if stats is not None:
+                stats.update(worker_stats)
+            if profile is not None:
+                profile.update(worker_profile)
+            results.append((inputs, outputs, columns))
+    return results
+
+
+def add_notebook(
+    graph: nx.DiGraph,
+    nb_node: str,
+    inputs: Set[str],
+    outputs: Set[str],
+    project_root: Path,
+    index: Optional[FileIndex] = None,
+    columns: Optional[ColumnUsage] = None,
+    profile: Optional[NotebookProfile] = None,
+) -> None:
+    """Add a notebook node and its file edges to ``graph``.
+
+    Input edges carry a ``columns`` attribute: the sorted columns the notebook
+    reads from that file, or None when it reads all of them. Glob patterns
+    and directory reads/writes become ``dataset`` nodes (a node any notebook
+    uses as a dataset stays one). Time spent here is recorded as the
+    ``resolve`` phase of ``profile``.
+    """
+    with _phase(profile, "resolve"):
+        edges, datasets = notebook_edges(nb_node, inputs, outputs, project_root, index, columns)
+        graph.add_node(nb_node, node_type="notebook", label=nb_node)
+        for src, dst, used in edges:
+            file_node = dst if src == nb_node else src
+            if file_node not in graph:
+                graph.add_node(file_node, node_type="dataset" if file_node in datasets else "file", label=file_node)
+            elif file_node in datasets:
+                graph.nodes[file_node]["node_type"] = "dataset"
+            if src == nb_node:
+                graph.add_edge(src, dst)
+            else:
+                graph.add_edge(src, dst, columns=used)
+
+
+# (src, dst, sorted columns read or None)
+NotebookEdge = Tuple[str, str, Optional[List[str]]]
+
+
+def notebook_edges(
+    nb_node: str,
+    inputs: Set[str],
+    outputs: Set[str],
+    project_root: Path,
+    index: Optional[FileIndex] = None,
+    columns: Optional[ColumnUsage] = None,
+) -> Tuple[List[NotebookEdge], Set[str]]:
+    """Resolve a notebook's inputs and outputs to edges between nodes.
+
+    Returns the input edges then the output edges, each group sorted by
+    path, and the file nodes used as datasets. Output edges carry no columns.
+    """
+    edges: List[NotebookEdge] = []
+    datasets: Set[str] = set()
+
+    def file_node(path_str: str) -> str:
+        if not is_dataset_path(path_str):
+            return resolve_file_node(path_str, project_root, index)
+        node = resolve_file_node(path_str.rstrip(DATASET_DIR_MARKER), project_root, index)
+        datasets.add(node)
+        return node
+
+    for in_file in sorted(inputs):
+        used = (columns or {}).get(in_file)
+        edges.append((file_node(in_file), nb_node, None if used is None else sorted(used)))
+    for out_file in sorted(outputs):
+        edges.append((nb_node, file_node(out_file), None))
+    return edges, datasets
+
+
+def remove_notebook(graph: nx.DiGraph, nb_node: str) -> None:
+    """Remove a notebook node and any file nodes left without edges."""
+    if nb_node not in graph:
+        return
+    neighbours = set(graph.predecessors(nb_node)) | set(graph.successors(nb_node))
+    graph.remove_node(nb_node)
+    for node in neighbours:
+        if graph.degree(node) == 0:
+            graph.remove_node(node)
+
+
+def build_graph(
+    project_root: Path,
+    cache: Optional[ScanCache] = None,
+    jobs: int = 1,
+    exclude_dirs: Iterable[str] = DEFAULT_EXCLUDE_DIRS,
+    stats: Optional[ExtractionStats] = None,
+    profiler: Optional[ScanProfiler] = None,
+) -> nx.DiGraph:
+    """Create a directed graph of notebooks and files.
+
+    When a ``cache`` is supplied, unchanged notebooks are served from it,
+    changed ones are re-analysed and entries for deleted notebooks are dropped.
+    Notebooks that need analysis are spread over ``jobs`` worker processes;
+    results are merged in sorted order so the graph does not depend on ``jobs``.
+    Bare filenames are resolved against one ``FileIndex`` that skips
+    ``exclude_dirs``. Dataset nodes are summarised by ``annotate_datasets``.
+    Extraction counters for re-analysed notebooks are accumulated into
+    ``stats``; per-notebook and project-wide timings into ``profiler``.
+    """
+    results = scan_notebooks(project_root, cache, jobs, stats, profiler)
+
+    import networkx as nx
+
+    index = FileIndex(project_root, exclude_dirs)
+    if profiler is not None:
+        with profiler.phase("index"):
+            index.scan()
     graph = nx.DiGraph()
+    with _phase(profiler, "graph"):
+        for nb_node, (inputs, outputs, columns) in results.items():
+            profile = profiler.notebook(nb_node) if profiler is not None else None
+            add_notebook(graph, nb_node, inputs, outputs, project_root, index, columns, profile)
+    with _phase(profiler, "datasets"):
+        annotate_datasets(graph, index, cache)
+
+    if cache is not None:
+        with _phase(profiler, "cache_save"):
+            cache.prune(set(results))
+            cache.save()
+
+    return graph
+
+
+def scan_notebooks(
+    project_root: Path,
+    cache: Optional[ScanCache] = None,
+    jobs: int = 1,
+    stats: Optional[ExtractionStats] = None,
+    profiler: Optional[ScanProfiler] = None,
+) -> Dict[str, Tuple[Set[str], Set[str], ColumnUsage]]:
+    """Return ``(inputs, outputs, columns)`` for every notebook, keyed by node name in path order.
+
+    Unchanged notebooks come from ``cache``; the rest are analysed over
+    ``jobs`` processes and stored back into it (the caller saves the cache).
+    """
+    notebooks_dir = project_root / "notebooks"
+    nb_paths = sorted(notebooks_dir.rglob("*.ipynb"))
+    results: Dict[str, Tuple[Set[str], Set[str], ColumnUsage]] = {}
+    pending: List[Tuple[str, Path, Optional[os.stat_result]]] = []
 
-    for nb_path in notebooks_dir.rglob("*.ipynb"):
-        inputs, outputs = analyze_notebook(nb_path)
+    def profile_for(nb_node: str) -> Optional[NotebookProfile]:
+        return profiler.notebook(nb_node) if profiler is not None else None
+
+    for nb_path in nb_paths:
         nb_node = f"{nb_path.relative_to(project_root)}"
-        graph.add_node(nb_node, node_type="notebook", label=nb_node)
+        stat = None
+        if cache is not None:
+            profile = profile_for(nb_node)
+            with _phase(profile, "cache"):
+                stat = nb_path.stat()
+                cached = cache.lookup(nb_node, nb_path, stat)
+            if cached is not None:
+                if profile is not None:
+                    profile.cached = True
+                results[nb_node] = cached
+                continue
+        pending.append((nb_node, nb_path, stat))
+
+    with _phase(profiler, "analyze"):
+        scanned = analyze_notebooks(
+            [nb_path for _, nb_path, _ in pending],
+            jobs=jobs,
+            stats=stats,
+            profiles=[profile_for(nb_node) for nb_node, _, _ in pending] if profiler is not None else None,
+        )
+    for (nb_node, nb_path, stat), (inputs, outputs, columns) in zip(pending, scanned):
+        results[nb_node] = (inputs, outputs, columns)
+        if cache is not None:
+            with _phase(profile_for(nb_node), "cache"):
+                cache.store(nb_node, nb_path, stat, inputs, outputs, columns)
+
+    nb_nodes = [f"{nb_path.relative_to(project_root)}" for nb_path in nb_paths]
+    return {nb_node: results[nb_node] for nb_node in nb_nodes}
 
-        for in_file in inputs:
-            file_node = resolve_file_node(in_file, project_root)
-            graph.add_node(file_node, node_type="file", label=file_node)
-            graph.add_edge(file_node, nb_node)
 
-        for out_file in outputs:
-            file_node = resolve_file_node(out_file, project_root)
-            graph.add_node(file_node, node_type="file", label=file_node)
-            graph.add_edge(nb_node, file_node)
+# ---------------------------------------------------------------------------
+def focus_subgraph(graph: nx.DiGraph, node: str, depth: Optional[int] = None) -> nx.DiGraph:
+    """Return the upstream and downstream neighbourhood of ``node``.
+
+    Only nodes within ``depth`` hops in either direction are kept (all
+    ancestors and descendants when ``depth`` is None).
+    """
+    if node not in graph:
+        raise KeyError(f"Node {node!r} is not in the pipeline graph.")
+
+    keep = {node}
+    for neighbours in (graph.predecessors, graph.successors):
+        frontier = {node}
+        hops = 0
+        while frontier and (depth is None or hops < depth):
+            frontier = {nxt for current in frontier for nxt in neighbours(current)} - keep
+            keep |= frontier
+            hops += 1
+    return graph.subgraph(keep).copy()
+
+
+def _collapse_key(node: str, by: str) -> str:
+    if by == "dir":
+        parent = Path(node).parent
+        return f"{parent.as_posix()}/*" if parent != Path(".") else "*"
+    if by == "partition":
+        key = Path(node).as_posix()
+        for pattern, replacement in PARTITION_REWRITES:
+            key = pattern.sub(replacement, key)
+        return key
+    raise ValueError(f"Unknown collapse mode {by!r}; expected 'dir' or 'partition'.")
+
+
+def collapse_file_nodes(graph: nx.DiGraph, by: str = "dir", keep: Iterable[str] = ()) -> nx.DiGraph:
+    """Merge file nodes that share a directory (``by="dir"``) or partition pattern.
+
+    Groups of two or more files become a single ``group`` node whose label
+    carries the member count. Nodes listed in ``keep`` are never merged.
+    """
+    import networkx as nx
+
+    keep = set(keep)
+    groups: Dict[str, List[str]] = defaultdict(list)
+    for node, data in graph.nodes(data=True):
+        if data["node_type"] == "file" and node not in keep:
+            groups[_collapse_key(node, by)].append(node)
 
+    mapping: Dict[str, str] = {}
+    collapsed = nx.DiGraph()
+    for node, data in graph.nodes(data=True):
+        mapping[node] = node
+        if data["node_type"] != "file" or node in keep:
+            collapsed.add_node(node, **data)
+    for key, members in groups.items():
+        if len(members) == 1:
+            collapsed.add_node(members[0], **graph.nodes[members[0]])
+            continue
+        collapsed.add_node(key, node_type="group", label=f"{key} ({len(members)} files)", members=len(members))
+        for member in members:
+            mapping[member] = key
+
+    for src, dst in graph.edges():
+        if mapping[src] != mapping[dst]:
+            collapsed.add_edge(mapping[src], mapping[dst])
+    return collapsed
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    minutes, seconds = divmod(round(seconds), 60)
+    return f"{minutes}m {seconds:02d}s"
+
+
+def _node_label(data: dict) -> str:
+    """Return the display label, with any recorded runtime attributes appended."""
+    label = data["label"]
+    details = []
+    if data.get("duration") is not None:
+        details.append(_format_seconds(data["duration"]))
+    if data.get("peak_rss_bytes"):
+        details.append(f"peak {_format_bytes(data['peak_rss_bytes'])}")
+    if data.get("files") is not None:
+        details.append(f"{data['files']} file{'s' if data['files'] != 1 else ''}")
+    if data.get("node_type") != "notebook" and data.get("bytes") is not None:
+        details.append(_format_bytes(data["bytes"]))
+    if details:
+        label += "<br/>" + " · ".join(details)
+    return label
+
+
+def draw_graph_mermaid(graph: nx.DiGraph, out_path: Path, highlight: Sequence[str] = ()) -> None:
+    """Render graph as Mermaid text.
+
+    Nodes and edges are emitted in sorted order, so a graph updated in place
+    renders identically to a freshly built one. Lines are streamed to a temp
+    file that then atomically replaces ``out_path``, so previews never see a
+    half-written diagram. Runtime attributes set by ``apply_run_profile`` are
+    shown under the node labels, and the nodes and edges of the ``highlight``
+    path (e.g. from ``critical_path``) get the ``critical`` style. Dataset
+    nodes are drawn as cylinders with their file count and size. Nodes with
+    a ``stale`` attribute (set from ``fingerprints.stale_outputs``) get the
+    ``stale`` style.
+    """
+    nodes = sorted(graph.nodes(data=True), key=lambda item: item[0])
+    node_ids = {node: f"n{idx}" for idx, (node, _) in enumerate(nodes, start=1)}
+    classes: Dict[str, List[str]] = defaultdict(list)
+    highlight = list(highlight)
+    highlight_edges = set(zip(highlight, highlight[1:]))
+    critical_links: List[str] = []
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        handle.write(MERMAID_HEADER)
+        if highlight:
+            handle.write(MERMAID_CRITICAL_STYLE)
+        if any(data.get("stale") for _, data in nodes):
+            handle.write(MERMAID_STALE_STYLE)
+
+        for node, data in nodes:
+            label = _node_label(data).replace("\"", r"\"")
+            shape = MERMAID_DATASET_SHAPE if data["node_type"] == "dataset" else ('["', '"]')
+            handle.write(f'    {node_ids[node]}{shape[0]}{label}{shape[1]}\n')
+            classes[data["node_type"]].append(node_ids[node])
+            if data.get("stale"):
+                classes["stale"].append(node_ids[node])
+        classes["critical"] = [node_ids[node] for node in sorted(set(highlight)) if node in node_ids]
+
+        for position, (src, dst) in enumerate(sorted(graph.edges())):
+            handle.write(f"    {node_ids[src]} --> {node_ids[dst]}\n")
+            if (src, dst) in highlight_edges:
+                critical_links.append(str(position))
+
+        for class_name in ("notebook", "file", "dataset", "group", "stale", "critical"):
+            ids = classes.get(class_name, [])
+            for start in range(0, len(ids), MERMAID_CLASS_BATCH):
+                handle.write(f"    class {','.join(ids[start:start + MERMAID_CLASS_BATCH])} {class_name};\n")
+        for start in range(0, len(critical_links), MERMAID_CLASS_BATCH):
+            batch = ",".join(critical_links[start:start + MERMAID_CLASS_BATCH])
+            handle.write(f"    linkStyle {batch} {MERMAID_CRITICAL_LINK};\n")
+
+    os.replace(tmp_path, out_path)
+    logger.info(f"✅ Mermaid graph written to: {out_path}", extra={"event": "mermaid_written", "path": str(out_path)})
+
+
+def graph_view(
+    graph: nx.DiGraph,
+    focus: Optional[str] = None,
+    depth: Optional[int] = None,
+    collapse: Optional[str] = None,
+) -> nx.DiGraph:
+    """Apply the focus and collapse options used when rendering."""
+    if focus is not None:
+        graph = focus_subgraph(graph, focus, depth)
+    if collapse is not None:
+        graph = collapse_file_nodes(graph, by=collapse, keep=[focus] if focus else [])
     return graph
 
 
 # ---------------------------------------------------------------------------
-def draw_graph_mermaid(graph: nx.DiGraph, out_path: Path) -> None:
-    """Render graph as Mermaid text."""
-    node_ids = {node: f"n{idx}" for idx, node in enumerate(sorted(graph.nodes()), start=1)}
-    lines = [MERMAID_HEADER.rstrip()]
+# Column usage
+# ---------------------------------------------------------------------------
+def _file_columns(path: Path) -> Optional[List[str]]:
+    """Return the column names stored in a data file, or None if unknown."""
+    suffix = path.suffix.lower()
+    try:
+        if suffix == ".parquet":
+            import pyarrow.parquet as pq
+
+            return pq.read_schema(path).names
+        if suffix in (".arrow", ".feather"):
+            import pyarrow as pa
+
+            return pa.ipc.open_file(pa.memory_map(str(path), "r")).schema.names
+        if suffix in (".csv", ".tsv"):
+            import csv
+
+            with path.open(newline="", encoding="utf-8") as handle:
+                return next(csv.reader(handle, delimiter="\t" if suffix == ".tsv" else ","), None)
+    except (OSError, ValueError, ImportError):
+        return None
+    return None
+
+
+def _dataset_member(location: Path) -> Optional[Path]:
+    """Return one data file of a dataset directory or glob pattern, or None if it is empty."""
+    if _GLOB_MAGIC.search(str(location)):
+        return next((Path(match) for match in sorted(glob.glob(str(location), recursive=True))), None)
+    for dirpath, dirnames, filenames in os.walk(location):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if not name.startswith(("_", ".")):  # _SUCCESS, _metadata, .crc files
+                return Path(dirpath) / name
+    return None
+
+
+def column_report(graph: nx.DiGraph, index: FileIndex) -> Dict[str, Dict[str, Optional[List[str]]]]:
+    """Summarise which columns of each input file are consumed downstream.
+
+    For every file read by at least one notebook, ``used`` is the union of the
+    ``columns``/``usecols`` seen on its read edges (None if any reader takes
+    all columns) and ``unused`` lists the file's columns nobody reads (None
+    when ``used`` is None or the file's columns cannot be determined). A
+    dataset's columns are taken from its first member file.
+    """
+    report = {}
+    for node in sorted(graph.nodes):
+        node_type = graph.nodes[node].get("node_type")
+        if node_type not in ("file", "dataset"):
+            continue
+        readers = list(graph.out_edges(node, data="columns"))
+        if not readers:
+            continue
+        used: Optional[Set[str]] = set()
+        for _, _, cols in readers:
+            if cols is None:
+                used = None
+                break
+            used |= set(cols)
+
+        unused = None
+        location = index.path_for(node)
+        if node_type == "dataset" and used is not None:
+            location = _dataset_member(location)
+        available = _file_columns(location) if used is not None and location is not None else None
+        if available is not None:
+            unused = [name for name in available if name not in used]
+        report[node] = {"used": None if used is None else sorted(used), "unused": unused}
+    return report
 
+
+# ---------------------------------------------------------------------------
+# Runtime profile
+# ---------------------------------------------------------------------------
+def load_run_profile(path: Path) -> Dict[str, Dict[str, float]]:
+    """Return the runtime attributes recorded per node, or {} if none were saved."""
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(payload, dict) or payload.get("version") != RUN_PROFILE_VERSION:
+        return {}
+    return payload.get("nodes", {})
+
+
+def save_run_profile(graph: nx.DiGraph, path: Path) -> None:
+    """Merge the ``RUNTIME_ATTRIBUTES`` found on ``graph``'s nodes into the profile at ``path``.
+
+    Nodes that did not run keep the values from earlier runs.
+    """
+    nodes = load_run_profile(path)
     for node, data in graph.nodes(data=True):
-        label = data["label"].replace("\"", r"\"")
-        lines.append(f'    {node_ids[node]}["{label}"]')
+        attrs = {name: data[name] for name in RUNTIME_ATTRIBUTES if data.get(name) is not None}
+        if attrs:
+            nodes.setdefault(node, {}).update(attrs)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps({"version": RUN_PROFILE_VERSION, "nodes": nodes}, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def apply_run_profile(graph: nx.DiGraph, profile: Dict[str, Dict[str, float]]) -> None:
+    """Copy recorded runtime attributes onto the matching nodes of ``graph``."""
+    for node, attrs in profile.items():
+        if node in graph:
+            graph.nodes[node].update(attrs)
+
+
+def critical_path(graph: nx.DiGraph, weight: str = "duration") -> Tuple[List[str], float]:
+    """Return the heaviest path through the graph and its total weight.
+
+    Each node weighs its ``weight`` attribute (0 when missing), so with run
+    durations applied this is the chain of notebooks that bounds end-to-end
+    pipeline time no matter how many run in parallel. The path is extended
+    through zero-weight nodes to the last file it produces. Raises
+    ValueError if the graph has a cycle.
+    """
+    import networkx as nx
+
+    try:
+        order = list(nx.topological_sort(graph))
+    except nx.NetworkXUnfeasible as exc:
+        raise ValueError("The pipeline graph contains a cycle; it has no critical path.") from exc
+
+    total: Dict[str, float] = {}
+    previous: Dict[str, Optional[str]] = {}
+    for node in order:
+        parents = sorted(graph.predecessors(node))
+        parent = max(parents, key=lambda item: total[item]) if parents else None
+        previous[node] = parent
+        total[node] = (total[parent] if parent is not None else 0.0) + float(graph.nodes[node].get(weight) or 0.0)
+    if not total:
+        return [], 0.0
+
+    position = {node: idx for idx, node in enumerate(order)}
+    end = max(total, key=lambda node: (total[node], position[node]))
+    path = [end]
+    while previous[path[-1]] is not None:
+        path.append(previous[path[-1]])
+    path.reverse()
+    return path, total[end]
+
+
+def log_critical_path(graph: nx.DiGraph, path: Sequence[str], seconds: float) -> None:
+    """Log the critical path with per-node durations and sizes."""
+    logger.info(
+        f"🐢 Critical path ({_format_seconds(seconds)}): {' → '.join(path)}",
+        extra={"event": "critical_path", "path": list(path), "seconds": seconds},
+    )
+    for node in path:
+        data = graph.nodes[node]
+        details = _node_label({**data, "label": ""}).removeprefix("<br/>")
+        if details:
+            attrs = {name: data[name] for name in RUNTIME_ATTRIBUTES if name in data}
+            logger.info(f"   {node}: {details}", extra={"event": "critical_node", "node": node, **attrs})
 
-    for src, dst in graph.edges():
-        lines.append(f"    {node_ids[src]} --> {node_ids[dst]}")
 
-    notebook_nodes = [node_ids[n] for n, data in graph.nodes(data=True) if data["node_type"] == "notebook"]
-    file_nodes = [node_ids[n] for n, data in graph.nodes(data=True) if data["node_type"] == "file"]
+# ---------------------------------------------------------------------------
+# Watch mode
+# ---------------------------------------------------------------------------
+class GraphWatcher:
+    """Keep a pipeline graph up to date while notebooks are edited.
 
-    if notebook_nodes:
-        lines.append(f"    class {','.join(notebook_nodes)} notebook;")
-    if file_nodes:
-        lines.append(f"    class {','.join(file_nodes)} file;")
+    ``notebooks/`` is polled with ``stat`` calls only. Once a burst of changes
+    has settled for ``debounce`` seconds, just the affected notebooks are
+    re-analysed, their edges are replaced in the in-memory graph and the
+    Mermaid file is rewritten (and the ``lineage`` store, when given, synced).
+    """
 
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
-    print(f"✅ Mermaid graph written to: {out_path}")
+    def __init__(
+        self,
+        project_root: Path,
+        out_path: Path,
+        cache: Optional[ScanCache] = None,
+        interval: float = 0.5,
+        debounce: float = 0.3,
+        exclude_dirs: Iterable[str] = DEFAULT_EXCLUDE_DIRS,
+        jobs: int = 1,
+        view: Optional[Callable[[nx.DiGraph], nx.DiGraph]] = None,
+        lineage: Optional[LineageStore] = None,
+    ) -> None:
+        self.project_root = project_root
+        self.out_path = out_path
+        self.cache = cache
+        self.interval = interval
+        self.debounce = debounce
+        self.view = view
+        self.lineage = lineage
+        self.index = FileIndex(project_root, exclude_dirs)
+        self.snapshot = self._snapshot()
+        self.graph = build_graph(project_root, cache=cache, jobs=jobs, exclude_dirs=exclude_dirs)
+        self.draw()
+
+    def draw(self) -> None:
+        graph = self.view(self.graph) if self.view is not None else self.graph
+        draw_graph_mermaid(graph, self.out_path)
+        if self.lineage is not None:
+            self.lineage.sync(self.graph)
+
+    def _snapshot(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for nb_path in (self.project_root / "notebooks").rglob("*.ipynb"):
+            try:
+                stat = nb_path.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[nb_path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _scan(self, nb_path: Path, nb_node: str) -> Tuple[Set[str], Set[str], ColumnUsage]:
+        if self.cache is None:
+            return analyze_notebook_usage(nb_path)
+        stat = nb_path.stat()
+        cached = self.cache.lookup(nb_node, nb_path, stat)
+        if cached is not None:
+            return cached
+        inputs, outputs, columns = analyze_notebook_usage(nb_path)
+        self.cache.store(nb_node, nb_path, stat, inputs, outputs, columns)
+        return inputs, outputs, columns
+
+    def apply(self, snapshot: Dict[Path, Tuple[int, int]]) -> Set[str]:
+        """Bring the graph in line with ``snapshot``; return the notebooks touched."""
+        changed = {path for path, sig in snapshot.items() if self.snapshot.get(path) != sig}
+        removed = set(self.snapshot) - set(snapshot)
+        self.snapshot = snapshot
+        if not changed and not removed:
+            return set()
+
+        # New output files may have appeared since the index was built.
+        self.index = FileIndex(self.project_root, self.index.exclude_dirs)
+        touched = set()
+        for nb_path in sorted(removed):
+            nb_node = f"{nb_path.relative_to(self.project_root)}"
+            remove_notebook(self.graph, nb_node)
+            touched.add(nb_node)
+        for nb_path in sorted(changed):
+            nb_node = f"{nb_path.relative_to(self.project_root)}"
+            try:
+                inputs, outputs, columns = self._scan(nb_path, nb_node)
+            except (OSError, ValueError) as exc:
+                # Usually a notebook caught mid-save; the next poll picks it up.
+                logger.warning(
+                    f"⚠️  Could not read {nb_node}: {exc}",
+                    extra={"event": "notebook_unreadable", "notebook": nb_node, "error": str(exc)},
+                )
+                self.snapshot.pop(nb_path, None)
+                continue
+            remove_notebook(self.graph, nb_node)
+            add_notebook(self.graph, nb_node, inputs, outputs, self.project_root, self.index, columns)
+            touched.add(nb_node)
+        annotate_datasets(self.graph, self.index, self.cache)
+
+        if self.cache is not None:
+            self.cache.prune({f"{path.relative_to(self.project_root)}" for path in snapshot})
+            self.cache.save()
+        self.draw()
+        return touched
+
+    def poll(self) -> Set[str]:
+        """Check once for changes, waiting for them to settle before applying."""
+        current = self._snapshot()
+        if current == self.snapshot:
+            return set()
+        while True:
+            time.sleep(self.debounce)
+            latest = self._snapshot()
+            if latest == current:
+                break
+            current = latest
+        return self.apply(current)
+
+    def run(self) -> None:
+        """Poll until interrupted."""
+        notebooks_dir = self.project_root / "notebooks"
+        logger.info(
+            f"👀 Watching {notebooks_dir} (Ctrl+C to stop)",
+            extra={"event": "watch_started", "path": str(notebooks_dir)},
+        )
+        try:
+            while True:
+                time.sleep(self.interval)
+                started = time.perf_counter()
+                touched = self.poll()
+                if touched:
+                    elapsed = max(time.perf_counter() - started - self.debounce, 0.0)
+                    logger.info(
+                        f"🔄 Updated {len(touched)} notebook(s) in {elapsed:.2f}s",
+                        extra={"event": "watch_updated", "notebooks": sorted(touched), "seconds": elapsed},
+                    )
+        except KeyboardInterrupt:
+            logger.info("Stopped watching.", extra={"event": "watch_stopped"})
+
+
+# ---------------------------------------------------------------------------
+# Logging
+# ---------------------------------------------------------------------------
+# Attributes every LogRecord has; anything else on a record came from ``extra``.
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonLogFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        payload.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+def configure_logging(
+    level: int = logging.INFO, fmt: str = "text", names: Iterable[str] = ("pipeline_graph",)
+) -> None:
+    """Send the named loggers to stdout as plain messages (``fmt="text"``) or JSON lines.
+
+    Calling it again replaces the handler installed by the previous call.
+    """
+    import sys
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonLogFormatter() if fmt == "json" else logging.Formatter("%(message)s"))
+    handler.set_name("pipeline_graph")
+    for name in names:
+        target = logging.getLogger(name)
+        for existing in list(target.handlers):
+            if existing.get_name() == "pipeline_graph":
+                target.removeHandler(existing)
+        target.addHandler(handler)
+        target.setLevel(level)
+        target.propagate = False
 
 
 # ---------------------------------------------------------------------------
@@ -206,14 +1840,255 @@ def main() -> None:
         default=Path("pipeline.mmd"),
         help="Output Mermaid file (.md/.mmd).",
     )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=None,
+        help=f"Scan cache file (default: <root>/{DEFAULT_CACHE_PATH.as_posix()}).",
+    )
+    cache_mode = parser.add_mutually_exclusive_group()
+    cache_mode.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Scan every notebook without reading or writing the cache.",
+    )
+    cache_mode.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Ignore existing cache entries and rebuild the cache from scratch.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for notebook analysis (default: number of CPUs).",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="DIR",
+        help="Directory name to skip when resolving bare filenames (repeatable).",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and update the graph whenever notebooks change.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.5,
+        help="Seconds between polls in --watch mode.",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.3,
+        help="Seconds notebooks must stay unchanged before --watch updates the graph.",
+    )
+    parser.add_argument(
+        "--focus",
+        default=None,
+        metavar="NODE",
+        help="Only render the upstream/downstream neighbourhood of this node.",
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=None,
+        help="Hops to include around --focus (default: unlimited).",
+    )
+    parser.add_argument(
+        "--collapse",
+        choices=("dir", "partition"),
+        default=None,
+        help="Merge file nodes sharing a directory or partition pattern into one node.",
+    )
+    parser.add_argument(
+        "--columns",
+        action="store_true",
+        help="Print which columns of each input file are consumed and which are never read.",
+    )
+    lineage_mode = parser.add_mutually_exclusive_group()
+    lineage_mode.add_argument(
+        "--lineage",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help="SQLite lineage store to sync (default: <root>/.pipeline_graph/lineage.sqlite).",
+    )
+    lineage_mode.add_argument(
+        "--no-lineage",
+        action="store_true",
+        help="Do not update the lineage store queried by lineage_store.py.",
+    )
+    parser.add_argument(
+        "--critical-path",
+        action="store_true",
+        help=(
+            "Annotate nodes with the run times recorded by pipeline_run.py and highlight the "
+            "duration-weighted critical path."
+        ),
+    )
+    parser.add_argument(
+        "--stale",
+        action="store_true",
+        help=(
+            "Report outputs whose notebook or inputs changed since they were written, using the "
+            "content fingerprints in <root>/.pipeline_graph/fingerprints.sqlite, and colour them."
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_PROFILE_PATH,
+        default=None,
+        metavar="PATH",
+        help=(
+            "Record per-notebook phase timings, cells, bytes read and peak memory; write them as JSON, "
+            f"or CSV for a .csv path (default: <root>/{DEFAULT_PROFILE_PATH.as_posix()})."
+        ),
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="Number of slowest notebooks to summarise with --profile.",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Also log the inputs and outputs found in each notebook.",
+    )
+    parser.add_argument(
+        "--log-format",
+        choices=("text", "json"),
+        default="text",
+        help="Log as plain messages or as one JSON object per line.",
+    )
     args = parser.parse_args()
-
-    graph = build_graph(args.root)
-    if not graph:
-        print("⚠️  No notebook dependencies found.")
+    if args.profile is not None and args.watch:
+        parser.error("--profile cannot be combined with --watch")
+    configure_logging(logging.DEBUG if args.verbose else logging.INFO, args.log_format)
+
+    def view(graph: nx.DiGraph) -> nx.DiGraph:
+        return graph_view(graph, focus=args.focus, depth=args.depth, collapse=args.collapse)
+
+    cache = None
+    if not args.no_cache:
+        cache_path = args.cache or args.root / DEFAULT_CACHE_PATH
+        cache = ScanCache(cache_path) if args.rebuild else ScanCache.load(cache_path)
+
+    lineage = None
+    if not args.no_lineage:
+        from lineage_store import DEFAULT_LINEAGE_PATH, LineageStore
+
+        lineage = LineageStore(args.lineage or args.root / DEFAULT_LINEAGE_PATH)
+
+    if args.watch:
+        watcher = GraphWatcher(
+            args.root,
+            args.out,
+            cache=cache,
+            interval=args.interval,
+            debounce=args.debounce,
+            exclude_dirs=DEFAULT_EXCLUDE_DIRS | set(args.exclude),
+            jobs=args.jobs,
+            view=view,
+            lineage=lineage,
+        )
+        watcher.run()
         return
 
-    draw_graph_mermaid(graph, args.out)
+    stats = ExtractionStats()
+    profiler = ScanProfiler() if args.profile is not None else None
+    graph = build_graph(
+        args.root,
+        cache=cache,
+        jobs=args.jobs,
+        exclude_dirs=DEFAULT_EXCLUDE_DIRS | set(args.exclude),
+        stats=stats,
+        profiler=profiler,
+    )
+    logger.info(
+        f"Cells: {stats.cells_parsed} parsed, {stats.cells_skipped} skipped, "
+        f"{stats.regex_fallbacks} regex fallbacks",
+        extra={"event": "scan_stats", **stats.as_dict()},
+    )
+    highlight: List[str] = []
+    if graph and args.critical_path:
+        run_profile_path = args.root / DEFAULT_RUN_PROFILE_PATH
+        run_profile = load_run_profile(run_profile_path)
+        if not run_profile:
+            logger.warning(
+                f"⚠️  No run times recorded in {run_profile_path}; run utils/pipeline_run.py first.",
+                extra={"event": "run_profile_missing", "path": str(run_profile_path)},
+            )
+        apply_run_profile(graph, run_profile)
+        highlight, seconds = critical_path(graph)
+        log_critical_path(graph, highlight, seconds)
+
+    index = FileIndex(args.root, DEFAULT_EXCLUDE_DIRS | set(args.exclude))
+    if graph and args.stale:
+        from fingerprints import DEFAULT_FINGERPRINT_PATH, FingerprintDB, stale_outputs
+
+        with _phase(profiler, "stale"), FingerprintDB(args.root / DEFAULT_FINGERPRINT_PATH) as fingerprints:
+            report = stale_outputs(graph, index, fingerprints)
+        for node, reasons in report.items():
+            graph.nodes[node]["stale"] = reasons
+            logger.info(
+                f"🕰️  {node} is stale: {', '.join(reasons)}",
+                extra={"event": "stale_output", "file": node, "reasons": reasons},
+            )
+        logger.info(
+            f"🕰️  {len(report)} stale output(s); {fingerprints.hashed} file(s) re-hashed",
+            extra={"event": "stale_summary", "stale": len(report), "hashed": fingerprints.hashed},
+        )
+
+    if lineage is not None:
+        with _phase(profiler, "lineage"):
+            changes = lineage.sync(graph)
+        lineage.close()
+        if any(changes.values()):
+            logger.info(
+                f"🗃️  Lineage store {lineage.path}: {changes['added']} added, {changes['updated']} updated, "
+                f"{changes['removed']} removed notebook(s)",
+                extra={"event": "lineage_synced", "path": str(lineage.path), **changes},
+            )
+
+    if not graph:
+        logger.warning("⚠️  No notebook dependencies found.", extra={"event": "empty_graph"})
+    else:
+        with _phase(profiler, "render"):
+            draw_graph_mermaid(view(graph), args.out, highlight=highlight)
+
+    if graph and args.columns:
+        for node, usage in column_report(graph, index).items():
+            used = ", ".join(usage["used"]) if usage["used"] is not None else "all columns"
+            line = f"📊 {node}: uses {used}"
+            if usage["unused"]:
+                line += f"; never read: {', '.join(usage['unused'])}"
+            logger.info(line, extra={"event": "column_usage", "file": node, **usage})
+
+    if profiler is not None:
+        profile_path = args.root / DEFAULT_PROFILE_PATH if args.profile is DEFAULT_PROFILE_PATH else args.profile
+        profiler.write(profile_path)
+        log_profile_summary(profiler, args.profile_top)
+        logger.info(
+            f"✅ Profile written to: {profile_path}",
+            extra={"event": "profile_written", "path": str(profile_path)},
+        )
+
+
+def _as_directory(path: str) -> str:
+    """Mark ``path`` as a dataset directory unless it already is a dataset pattern."""
+    if path.endswith(DATASET_DIR_MARKER) or _GLOB_MAGIC.search(path):
+        return path
+    return path + DATASET_DIR_MARKER
 
 
 class DependencyVisitor(ast.NodeVisitor):
@@ -224,10 +2099,15 @@ class DependencyVisitor(ast.NodeVisitor):
         var_sources: Dict[str, Set[str]],
         inputs: Set[str],
         outputs: Set[str],
+        columns: Optional[ColumnUsage] = None,
+        imports: Optional[Dict[str, str]] = None,
     ) -> None:
         self.var_sources = var_sources
         self.inputs = inputs
         self.outputs = outputs
+        self.columns = columns if columns is not None else {}
+        # Local name -> fully qualified origin, e.g. "ds" -> "pyarrow.dataset".
+        self.imports = imports if imports is not None else {}
 
     # ------------------------------------------------------------------
     # AST helpers
@@ -254,15 +2134,66 @@ class DependencyVisitor(ast.NodeVisitor):
                 self.var_sources[name].update(sources)
         self.generic_visit(node)
 
+    def visit_comprehension(self, node: ast.comprehension) -> None:  # type: ignore[override]
+        sources = self._sources_from_iter(node.iter)
+        if sources:
+            for name in self._collect_name_targets(node.target):
+                self.var_sources[name].update(sources)
+        self.generic_visit(node)
+
+    def _visit_comprehension_expr(self, node: ast.AST, *elements: ast.AST) -> None:
+        # Bind the ``for`` targets before visiting the element that uses them:
+        # pd.read_csv(f) for f in DATA_DIR.glob("*.csv")
+        for generator in node.generators:
+            self.visit(generator)
+        for element in elements:
+            self.visit(element)
+
+    def visit_ListComp(self, node: ast.ListComp) -> None:  # type: ignore[override]
+        self._visit_comprehension_expr(node, node.elt)
+
+    def visit_SetComp(self, node: ast.SetComp) -> None:  # type: ignore[override]
+        self._visit_comprehension_expr(node, node.elt)
+
+    def visit_GeneratorExp(self, node: ast.GeneratorExp) -> None:  # type: ignore[override]
+        self._visit_comprehension_expr(node, node.elt)
+
+    def visit_DictComp(self, node: ast.DictComp) -> None:  # type: ignore[override]
+        self._visit_comprehension_expr(node, node.key, node.value)
+
+    def visit_Import(self, node: ast.Import) -> None:  # type: ignore[override]
+        for alias in node.names:
+            if alias.asname:
+                self.imports[alias.asname] = alias.name
+            else:
+                root = alias.name.split(".")[0]
+                self.imports[root] = root
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:  # type: ignore[override]
+        if node.module and not node.level:
+            for alias in node.names:
+                self.imports[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+
     def visit_Call(self, node: ast.Call) -> None:  # type: ignore[override]
         attr = self._call_attr(node.func)
-        if attr in READ_METHODS and node.args:
-            sources = self._resolve_arg_sources(node.args[0])
+        if attr in QUALIFIED_READ_METHODS and self._qualified_name(node.func) not in QUALIFIED_READ_METHODS[attr]:
+            attr = None
+        if attr in READ_METHODS or attr in QUALIFIED_READ_METHODS:
+            path_arg = self._extract_read_arg(node)
+            sources = self._resolve_arg_sources(path_arg) if path_arg is not None else set()
+            if attr in DIRECTORY_READ_METHODS:
+                # A suffix-less path handed to a dataset reader is a partition directory.
+                sources = {_as_directory(src) if not Path(src).suffix else src for src in sources}
             if sources:
                 self.inputs.update(sources)
+                used = self._extract_columns(node)
+                for source in sources:
+                    merge_columns(self.columns, source, used)
         elif attr in WRITE_METHODS:
             path_expr = self._extract_write_path(node)
             if path_expr:
+                if attr in DIRECTORY_WRITE_METHODS or any(kw.arg == PARTITION_KEYWORD for kw in node.keywords):
+                    path_expr = _as_directory(path_expr)
                 self.outputs.add(path_expr)
         self.generic_visit(node)
 
@@ -281,8 +2212,22 @@ class DependencyVisitor(ast.NodeVisitor):
         if isinstance(value, ast.Name):
             return set(self.var_sources.get(value.id, set()))
 
+        # csv_path = DATA_DIR / "input.csv" style bindings; plain strings such as
+        # mode = "w" or sep = "," are not paths and must not make cells relevant.
+        path = self._eval_path_expr(value)
+        if path and self._looks_like_path(value, path):
+            return {path}
+
         return set()
 
+    def _looks_like_path(self, node: ast.AST, path: str) -> bool:
+        """Whether a bound value is a file path: it has a suffix or is built on a ``*_DIR`` base."""
+        if Path(path).suffix or _GLOB_MAGIC.search(path):
+            return True
+        return any(
+            isinstance(child, ast.Name) and child.id.endswith(_DIR_NAME_SUFFIX) for child in ast.walk(node)
+        )
+
     def _sources_from_iter(self, node: ast.AST) -> Set[str]:
         if isinstance(node, ast.Name):
             return set(self.var_sources.get(node.id, set()))
@@ -300,16 +2245,33 @@ class DependencyVisitor(ast.NodeVisitor):
         if isinstance(arg, ast.Name):
             return set(self.var_sources.get(arg.id, set()))
 
-        if isinstance(arg, ast.BinOp):
-            path_str = self._eval_path_expr(arg)
-            if path_str:
-                return {path_str}
-
-        if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
-            return {arg.value}
+        path_str = self._eval_path_expr(arg)
+        if path_str:
+            return {path_str}
 
         return set()
 
+    def _extract_read_arg(self, node: ast.Call) -> Optional[ast.AST]:
+        if node.args:
+            return node.args[0]
+        for kw in node.keywords:
+            if kw.arg in READ_PATH_KEYWORDS:
+                return kw.value
+        return None
+
+    def _extract_columns(self, node: ast.Call) -> Optional[Set[str]]:
+        """Return the literal ``columns=``/``usecols=`` of a read, or None if absent or dynamic."""
+        for kw in node.keywords:
+            if kw.arg not in READ_COLUMN_KEYWORDS:
+                continue
+            if not isinstance(kw.value, (ast.List, ast.Tuple, ast.Set)):
+                return None
+            names = [self._literal_string(elt) for elt in kw.value.elts]
+            if any(name is None for name in names):
+                return None
+            return set(names)
+        return None
+
     def _extract_write_path(self, node: ast.Call) -> Optional[str]:
         candidates: Sequence[ast.AST] = []
         if node.args:
@@ -325,19 +2287,22 @@ class DependencyVisitor(ast.NodeVisitor):
             if isinstance(value, ast.Name) and value.id in self.var_sources:
                 sources = self.var_sources[value.id]
                 if sources:
-                    return next(iter(sources))
+                    # Sets iterate in hash order, which varies between processes (--jobs).
+                    return min(sources)
             if isinstance(value, ast.Constant) and isinstance(value.value, str):
                 return value.value
         return None
 
     def _extract_glob_sources(self, call: ast.Call) -> Set[str]:
         attr = self._call_attr(call.func)
-        if attr != "glob" or not call.args:
+        if attr not in ("glob", "rglob") or not call.args:
             return set()
 
         pattern = self._literal_string(call.args[0])
         if not pattern:
             return set()
+        if attr == "rglob":
+            pattern = f"**/{pattern}"
 
         base_path = self._eval_path_expr(getattr(call.func, "value", None))
         if base_path:
@@ -370,6 +2335,16 @@ class DependencyVisitor(ast.NodeVisitor):
             return func.id
         return None
 
+    def _qualified_name(self, func: ast.AST) -> Optional[str]:
+        """Dotted name of a call target, its root resolved through imports (ds.dataset -> pyarrow.dataset.dataset)."""
+        attrs = []
+        while isinstance(func, ast.Attribute):
+            attrs.append(func.attr)
+            func = func.value
+        if not isinstance(func, ast.Name):
+            return None
+        return ".".join([self.imports.get(func.id, func.id)] + attrs[::-1])
+
     def _literal_string(self, node: ast.AST) -> Optional[str]:
         if isinstance(node, ast.Constant) and isinstance(node.value, str):
             return node.value
@@ -380,6 +2355,21 @@ class DependencyVisitor(ast.NodeVisitor):
             return None
         if isinstance(node, ast.Constant) and isinstance(node.value, str):
             return node.value
+        if isinstance(node, ast.JoinedStr):
+            # f"{DATA_DIR}/input.csv" -> "data/input.csv"; a placeholder that is not a
+            # known base directory (f"data/{name}.csv") cannot be resolved statically,
+            # so the path is skipped rather than recorded as a bogus node.
+            parts = []
+            for value in node.values:
+                if isinstance(value, ast.Constant):
+                    parts.append(str(value.value))
+                    continue
+                plain = value.conversion == -1 and value.format_spec is None
+                resolved = self._eval_path_expr(value.value) if plain else None
+                if not resolved:
+                    return None
+                parts.append(resolved)
+            return "".join(parts)
         if isinstance(node, ast.Name):
             alias = BASE_DIR_ALIASES.get(node.id)
             if alias:
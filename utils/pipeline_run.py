@@ -0,0 +1,372 @@
+#!/usr/bin/env python
+"""
+Execute pipeline notebooks in dependency order.
+
+Features
+--------
+* Builds the file ⇄ notebook graph with `pipeline_graph.build_graph`.
+* Runs notebooks headless in topological order, independent branches in parallel.
+* Skips notebooks whose outputs are newer than all of their inputs (make-style).
+* ``--target`` limits the run to the notebooks upstream of given artifacts.
+* Records each notebook's wall time, peak RSS and bytes read/written on the graph,
+  saves them for ``pipeline_graph.py --critical-path`` and reports the critical path.
+* ``--compiled`` runs notebooks from cached bytecode in warm worker processes
+  instead of starting a kernel per notebook (see ``notebook_compiler.py``).
+* Logs through the ``pipeline_run`` logger; ``--log-format json`` emits one object per line.
+
+Usage
+-----
+python utils/pipeline_run.py --jobs 4
+python utils/pipeline_run.py --target output/report.parquet
+python utils/pipeline_run.py --dry-run   # show what would run
+python utils/pipeline_run.py --compiled  # no Jupyter kernels
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import networkx as nx
+
+from fingerprints import node_files
+from notebook_compiler import DEFAULT_COMPILED_DIR, run_notebook
+from pipeline_graph import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_RUN_PROFILE_PATH,
+    FileIndex,
+    ScanCache,
+    apply_run_profile,
+    build_graph,
+    configure_logging,
+    critical_path,
+    load_run_profile,
+    log_critical_path,
+    save_run_profile,
+)
+
+logger = logging.getLogger("pipeline_run")
+
+# Notebook run states reported by run_pipeline.
+RAN = "ran"
+SKIPPED = "skipped"
+FAILED = "failed"
+BLOCKED = "blocked"
+
+# Appended to Python notebooks before execution to report the kernel's peak RSS
+# (ru_maxrss is in KiB on Linux and in bytes on macOS; unavailable on Windows).
+RESOURCE_PROBE = """\
+import json as _probe_json, sys as _probe_sys
+try:
+    import resource as _probe_resource
+    _probe_peak = _probe_resource.getrusage(_probe_resource.RUSAGE_SELF).ru_maxrss
+    _probe_peak *= 1 if _probe_sys.platform == "darwin" else 1024
+except ImportError:
+    _probe_peak = None
+print(_probe_json.dumps({"peak_rss_bytes": _probe_peak}))
+"""
+
+
+def _probe_result(cell) -> Dict[str, int]:
+    for output in cell.get("outputs", []):
+        if output.get("name") == "stdout":
+            try:
+                return {key: value for key, value in json.loads(output["text"]).items() if value is not None}
+            except (ValueError, AttributeError):
+                break
+    return {}
+
+
+def execute_notebook(nb_path: Path, timeout: Optional[int] = None) -> Dict[str, int]:
+    """Run a notebook in a fresh kernel with its own directory as the working directory.
+
+    Returns kernel metrics gathered after the last cell (``peak_rss_bytes``
+    for Python kernels on POSIX). The notebook file itself is not modified.
+    """
+    try:
+        import nbclient
+        import nbformat
+    except ImportError as exc:
+        raise RuntimeError("Executing notebooks requires nbclient: run `uv add nbclient`.") from exc
+
+    nb = nbformat.read(nb_path, as_version=4)
+    language = nb.metadata.get("kernelspec", {}).get("language", "python")
+    probe = nbformat.v4.new_code_cell(RESOURCE_PROBE) if language == "python" else None
+    if probe is not None:
+        nb.cells.append(probe)
+    client = nbclient.NotebookClient(
+        nb,
+        timeout=timeout,
+        resources={"metadata": {"path": str(nb_path.parent)}},
+    )
+    client.execute()
+    return _probe_result(probe) if probe is not None else {}
+
+
+def notebook_dependencies(graph: nx.DiGraph) -> nx.DiGraph:
+    """Collapse the file ⇄ notebook graph into notebook → notebook dependencies."""
+    deps = nx.DiGraph()
+    for node, data in graph.nodes(data=True):
+        if data["node_type"] == "notebook":
+            deps.add_node(node)
+    for node, data in graph.nodes(data=True):
+        if data["node_type"] == "notebook":
+            continue
+        for producer in graph.predecessors(node):
+            for consumer in graph.successors(node):
+                if producer != consumer:
+                    deps.add_edge(producer, consumer)
+    return deps
+
+
+def select_notebooks(graph: nx.DiGraph, targets: Iterable[str]) -> Set[str]:
+    """Return the notebooks needed to (re)build the given file or notebook nodes."""
+    selected: Set[str] = set()
+    for target in targets:
+        if target not in graph:
+            raise KeyError(f"Target {target!r} is not a node in the pipeline graph.")
+        candidates = nx.ancestors(graph, target) | {target}
+        selected.update(n for n in candidates if graph.nodes[n]["node_type"] == "notebook")
+    return selected
+
+
+def _stat_node(path: Path) -> List[os.stat_result]:
+    """Return the stats of the files behind a path, glob pattern or directory (empty if nothing exists)."""
+    stats = []
+    for file in node_files(path):
+        try:
+            stats.append(file.stat())
+        except FileNotFoundError:
+            continue
+    return stats
+
+
+def _newest_mtime(path: Path) -> Optional[float]:
+    """Return the newest mtime for a path or glob pattern, or None if nothing exists."""
+    stats = _stat_node(path)
+    return max(stat.st_mtime for stat in stats) if stats else None
+
+
+def _node_bytes(path: Path) -> Optional[int]:
+    """Return the total size of the files behind a path or glob pattern, or None if nothing exists."""
+    stats = _stat_node(path)
+    return sum(stat.st_size for stat in stats) if stats else None
+
+
+def record_run(graph: nx.DiGraph, nb_node: str, index: FileIndex, seconds: float, metrics: Dict[str, int]) -> None:
+    """Store a finished run's measurements as attributes on the graph nodes.
+
+    The notebook node gets ``duration`` (wall seconds), ``bytes_read``,
+    ``bytes_written`` and any kernel ``metrics`` such as ``peak_rss_bytes``;
+    each of its input and output file nodes gets its current size as ``bytes``.
+    """
+    totals = {}
+    for attr, neighbours in (("bytes_read", graph.predecessors(nb_node)), ("bytes_written", graph.successors(nb_node))):
+        total = 0
+        for node in neighbours:
+            size = _node_bytes(index.path_for(node))
+            graph.nodes[node]["bytes"] = size
+            total += size or 0
+        totals[attr] = total
+    graph.nodes[nb_node].update(duration=seconds, **totals, **metrics)
+
+
+def _timed(execute: Callable[[Path], Optional[Dict[str, int]]], nb_path: Path) -> Tuple[float, Dict[str, int]]:
+    started = time.perf_counter()
+    metrics = execute(nb_path) or {}
+    return time.perf_counter() - started, metrics
+
+
+def is_up_to_date(graph: nx.DiGraph, nb_node: str, index: FileIndex) -> bool:
+    """Return True when every output exists and is newer than the notebook and its inputs."""
+    outputs = list(graph.successors(nb_node))
+    if not outputs:
+        return False
+
+    output_mtimes = [_newest_mtime(index.path_for(node)) for node in outputs]
+    if any(mtime is None for mtime in output_mtimes):
+        return False
+
+    sources = [index.path_for(nb_node)] + [index.path_for(node) for node in graph.predecessors(nb_node)]
+    input_mtimes = [mtime for mtime in map(_newest_mtime, sources) if mtime is not None]
+    return not input_mtimes or max(input_mtimes) < min(output_mtimes)
+
+
+def run_pipeline(
+    graph: nx.DiGraph,
+    project_root: Path,
+    jobs: int = 1,
+    targets: Optional[Iterable[str]] = None,
+    force: bool = False,
+    dry_run: bool = False,
+    execute: Callable[[Path], Optional[Dict[str, int]]] = execute_notebook,
+) -> Dict[str, str]:
+    """Run notebooks in topological order and return the state of each one.
+
+    A notebook starts once every upstream notebook has finished, with at most
+    ``jobs`` running at a time. It is skipped when up to date, unless
+    ``force`` is set or an upstream notebook ran in this invocation. When a
+    notebook fails, everything downstream of it is marked blocked. Notebooks
+    that run are measured and the results stored on ``graph`` (see
+    ``record_run``).
+    """
+    deps = notebook_dependencies(graph)
+    if targets:
+        deps = deps.subgraph(select_notebooks(graph, targets)).copy()
+    if not nx.is_directed_acyclic_graph(deps):
+        cycle = " -> ".join(edge[0] for edge in nx.find_cycle(deps))
+        raise ValueError(f"Notebook dependencies contain a cycle: {cycle}")
+
+    index = FileIndex(project_root)
+    states: Dict[str, str] = {}
+    waiting = {node: deps.in_degree(node) for node in deps}
+    ready: List[str] = sorted(node for node, count in waiting.items() if count == 0)
+    running: Dict[Future, str] = {}
+
+    def finish(node: str, state: str) -> None:
+        states[node] = state
+        if state == FAILED:
+            for downstream in nx.descendants(deps, node):
+                states.setdefault(downstream, BLOCKED)
+        for downstream in deps.successors(node):
+            waiting[downstream] -= 1
+            if waiting[downstream] == 0 and downstream not in states:
+                ready.append(downstream)
+        ready.sort()
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while ready or running:
+            while ready and len(running) < max(1, jobs):
+                node = ready.pop(0)
+                upstream_ran = any(states.get(up) == RAN for up in deps.predecessors(node))
+                if not (force or upstream_ran) and is_up_to_date(graph, node, index):
+                    logger.info(f"⏭️  {node} is up to date", extra={"event": "notebook_skipped", "notebook": node})
+                    finish(node, SKIPPED)
+                    continue
+                if dry_run:
+                    logger.info(f"▶️  would run {node}", extra={"event": "notebook_would_run", "notebook": node})
+                    finish(node, RAN)
+                    continue
+                logger.info(f"▶️  running {node}", extra={"event": "notebook_started", "notebook": node})
+                running[pool.submit(_timed, execute, index.path_for(node))] = node
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                error = future.exception()
+                if error is None:
+                    seconds, metrics = future.result()
+                    record_run(graph, node, index, seconds, metrics)
+                    logger.info(
+                        f"✅ {node} ({seconds:.1f}s)",
+                        extra={"event": "notebook_finished", "notebook": node, "seconds": seconds},
+                    )
+                    finish(node, RAN)
+                else:
+                    logger.error(
+                        f"❌ {node}: {error}",
+                        extra={"event": "notebook_failed", "notebook": node, "error": str(error)},
+                    )
+                    finish(node, FAILED)
+
+    return states
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run pipeline notebooks in dependency order.")
+    parser.add_argument(
+        "--root",
+        type=Path,
+        default=Path("."),
+        help="Project root containing data/, notebooks/ and output/ folders.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Maximum number of notebooks running at once (default: number of CPUs).",
+    )
+    parser.add_argument(
+        "--target",
+        action="append",
+        default=[],
+        help="Only run what is needed to build this file or notebook node (repeatable).",
+    )
+    parser.add_argument("--force", action="store_true", help="Run notebooks even when up to date.")
+    parser.add_argument("--dry-run", action="store_true", help="Print what would run without executing.")
+    parser.add_argument("--timeout", type=int, default=None, help="Per-cell timeout in seconds.")
+    parser.add_argument(
+        "--compiled",
+        action="store_true",
+        help="Run notebooks from cached bytecode in worker processes instead of Jupyter kernels.",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the pipeline_graph scan cache.")
+    parser.add_argument(
+        "--log-format",
+        choices=("text", "json"),
+        default="text",
+        help="Log as plain messages or as one JSON object per line.",
+    )
+    args = parser.parse_args()
+    if args.compiled and args.timeout is not None:
+        parser.error("--timeout applies to kernels and cannot be combined with --compiled")
+    configure_logging(fmt=args.log_format, names=("pipeline_graph", "pipeline_run"))
+
+    cache = None if args.no_cache else ScanCache.load(args.root / DEFAULT_CACHE_PATH)
+    graph = build_graph(args.root, cache=cache, jobs=args.jobs)
+    run_profile_path = args.root / DEFAULT_RUN_PROFILE_PATH
+    # Skipped notebooks keep their last measured run times for the critical path.
+    apply_run_profile(graph, load_run_profile(run_profile_path))
+
+    # Warm processes that keep compiled notebooks and their imports loaded between runs.
+    # Spawned, not forked: the scheduler's threads may hold locks a forked child would inherit.
+    workers = None
+    if args.compiled:
+        workers = ProcessPoolExecutor(max_workers=max(1, args.jobs), mp_context=multiprocessing.get_context("spawn"))
+
+    def execute(nb_path: Path) -> Dict[str, int]:
+        if workers is not None:
+            return workers.submit(run_notebook, nb_path, args.root / DEFAULT_COMPILED_DIR).result()
+        return execute_notebook(nb_path, timeout=args.timeout)
+
+    try:
+        states = run_pipeline(
+            graph,
+            args.root,
+            jobs=args.jobs,
+            targets=args.target,
+            force=args.force,
+            dry_run=args.dry_run,
+            execute=execute,
+        )
+    finally:
+        if workers is not None:
+            workers.shutdown()
+    counts = {state: sum(1 for value in states.values() if value == state) for state in (RAN, SKIPPED, FAILED, BLOCKED)}
+    summary = ", ".join(f"{count} {state}" for state, count in counts.items())
+    logger.info(
+        f"{summary} (dry run)" if args.dry_run else summary,
+        extra={"event": "run_summary", "dry_run": args.dry_run, **counts},
+    )
+    if not args.dry_run:
+        save_run_profile(graph, run_profile_path)
+        path, seconds = critical_path(graph)
+        if seconds:
+            log_critical_path(graph, path, seconds)
+    if counts[FAILED] or counts[BLOCKED]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()